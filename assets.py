@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import urllib.request
+import click
+from flask import current_app, request, url_for
+
+
+# Static assets. Stylesheets and scripts live in static/ (css/, js/ and the
+# third-party files in vendor/) instead of inline in the templates. A build
+# minifies them and copies each to static/dist/ under a name carrying a hash
+# of its content (css/app.css -> dist/css/app.3f2a9c1b0d4e.css), listed in
+# static/dist/manifest.json. Templates link assets with static_url('css/app.css'),
+# which gives the fingerprinted URL; those files are served with a one-year
+# immutable Cache-Control, so after the first page a navigation downloads
+# only the HTML. A changed file gets a new name, so no cache ever serves an
+# old version. Files from an earlier build are kept for pages still open.
+#
+# `flask assets-build` builds, once per deploy; the app only reads the
+# manifest, and before the first build static_url() links the plain files.
+# Third-party files are served from static/vendor/ like the rest:
+# `flask assets-vendor` downloads the pinned versions in VENDOR there to be
+# committed, and the build fails while any is missing. Until they are
+# there, static_url() links a missing one from its pinned CDN URL.
+
+VENDOR = {
+    'vendor/bootstrap.min.css':
+        'https://stackpath.bootstrapcdn.com/bootstrap/4.5.2/css/bootstrap.min.css',
+    'vendor/bootstrap.min.js':
+        'https://stackpath.bootstrapcdn.com/bootstrap/4.5.2/js/bootstrap.min.js',
+    'vendor/jquery.slim.min.js': 'https://code.jquery.com/jquery-3.5.1.slim.min.js',
+    'vendor/popper.min.js':
+        'https://cdn.jsdelivr.net/npm/@popperjs/core@2.5.4/dist/umd/popper.min.js',
+    'vendor/chart.umd.js': 'https://cdn.jsdelivr.net/npm/chart.js@4.4.4/dist/chart.umd.js',
+}
+
+DIST = 'dist'
+MANIFEST = os.path.join(DIST, 'manifest.json')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def minify_css(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,])\s*', r'\1', text)
+    # Only in declaration blocks (the innermost braces): in a selector,
+    # "a :hover" and "a:hover" differ.
+    text = re.sub(r'\{[^{}]*\}', lambda block: re.sub(r'\s*:\s*', ':', block.group(0)), text)
+    return text.replace(';}', '}').strip() + '\n'
+
+
+# After one of these a / starts a regular expression rather than a division.
+REGEX_AFTER = re.compile(r'(?:^|[(,=:\[!&|?{};+\-*%<>~^]|\b(?:return|typeof|case|do|else|in|of|'
+                         r'new|delete|void|throw|yield|await))\s*$')
+
+
+def _literal_end(text, start):
+    """The end of the string, template literal or regular expression at ``start``."""
+    quote = text[start]
+    i = start + 1
+    in_class = False
+    while i < len(text):
+        c = text[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '\n' and quote in '\'"/':
+            return i
+        if quote == '/' and c in '[]':
+            in_class = c == '['
+        elif c == quote and not in_class:
+            i += 1
+            if quote == '/':
+                while i < len(text) and text[i].isalpha():
+                    i += 1
+            return i
+        i += 1
+    return i
+
+
+def _newline(out):
+    while out and out[-1] in (' ', '\t', '\r'):
+        out.pop()
+    if out and out[-1] != '\n':
+        out.append('\n')
+
+
+def minify_js(text):
+    # Comments, indentation, trailing spaces and blank lines go. Strings,
+    # template literals and regular expressions are copied as they are, and
+    # line breaks are kept, so automatic semicolon insertion is unaffected.
+    out = []
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if c in '\'"`' or (c == '/' and text[i + 1:i + 2] not in ('/', '*')
+                           and REGEX_AFTER.search(''.join(out[-20:]))):
+            end = _literal_end(text, i)
+            out.append(text[i:end])
+            i = end
+        elif text.startswith('//', i):
+            end = text.find('\n', i)
+            i = len(text) if end < 0 else end
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            end = len(text) if end < 0 else end + 2
+            if '\n' in text[i:end]:
+                _newline(out)
+            elif out and out[-1] not in ('\n', ' '):
+                out.append(' ')
+            i = end
+        elif c == '\n':
+            _newline(out)
+            i += 1
+        elif c in ' \t\r' and (not out or out[-1] == '\n'):
+            i += 1
+        else:
+            out.append(c)
+            i += 1
+    _newline(out)
+    return ''.join(out)
+
+
+def _minify(name, data):
+    if '.min.' in name or name.startswith('vendor/'):
+        return data
+    if name.endswith('.css'):
+        return minify_css(data.decode()).encode()
+    if name.endswith('.js'):
+        return minify_js(data.decode()).encode()
+    return data
+
+
+def _sources(folder):
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != os.path.join(folder, DIST))
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            yield os.path.relpath(path, folder).replace(os.sep, '/'), path
+
+
+def _write(path, data):
+    # A temporary name of its own, so builds running at once do not collide.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.build-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(temp, 0o644)
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+class MissingVendorFiles(Exception):
+    """Some pinned third-party files are not in static/vendor/."""
+
+
+def build(folder):
+    """Minify and fingerprint every file in the static ``folder``; returns the manifest."""
+    missing = sorted(name for name in VENDOR if not os.path.exists(os.path.join(folder, name)))
+    if missing:
+        raise MissingVendorFiles(', '.join(missing))
+    manifest = {}
+    for name, path in _sources(folder):
+        with open(path, 'rb') as f:
+            data = _minify(name, f.read())
+        stem, ext = os.path.splitext(name)
+        built = f'{DIST}/{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+        target = os.path.join(folder, built)
+        if not os.path.exists(target):
+            _write(target, data)
+        manifest[name] = built
+    _write(os.path.join(folder, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+def _load(app):
+    path = os.path.join(app.static_folder, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def static_url(name):
+    """The URL of the static file ``name``, fingerprinted once built."""
+    state = current_app.extensions['assets']
+    if name in state['manifest']:
+        return url_for('static', filename=state['manifest'][name])
+    if name in state['cdn']:
+        return state['cdn'][name]
+    return url_for('static', filename=name)
+
+
+def _cache_forever(response):
+    if (request.endpoint == 'static' and response.status_code in (200, 304)
+            and request.view_args.get('filename', '').startswith(f'{DIST}/')):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+
+def init_assets(app):
+    manifest = _load(app)
+    app.extensions['assets'] = {
+        'manifest': manifest,
+        # Pinned third-party files not vendored yet.
+        'cdn': {name: url for name, url in VENDOR.items()
+                if not os.path.exists(os.path.join(app.static_folder, name))},
+        'digest': hashlib.sha1(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:10],
+    }
+    app.add_template_global(static_url)
+    app.after_request(_cache_forever)
+
+    @app.cli.command('assets-build')
+    def assets_build():
+        """Minify and fingerprint the static files."""
+        try:
+            manifest = build(app.static_folder)
+        except MissingVendorFiles as e:
+            raise click.ClickException(f'missing vendor files {e}; run `flask assets-vendor`')
+        click.echo(f'Built {len(manifest)} assets into static/{DIST}/.')
+
+    @app.cli.command('assets-vendor')
+    def assets_vendor():
+        """Download the third-party assets into static/vendor/."""
+        for name, url in VENDOR.items():
+            with urllib.request.urlopen(url, timeout=30) as response:
+                _write(os.path.join(app.static_folder, name), response.read())
+            click.echo(f'{name} <- {url}')
+        build(app.static_folder)
+        click.echo('Rebuilt the assets; commit static/vendor/.')
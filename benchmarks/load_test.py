@@ -0,0 +1,306 @@
+"""Drive every main route through Flask's test client and record latencies.
+
+    python benchmarks/load_test.py --scale 1k --requests 200
+    python benchmarks/load_test.py --db bench.db --compare benchmarks/results/old.json
+
+Seeds a fresh database with benchmarks/seed.py unless --db points at an
+existing one. For each route it reports p50/p95/p99 latency, SQL statements
+per request and fragment cache hit rate (both from the profiler's
+Server-Timing header) and throughput, and writes the numbers to a JSON file
+so two runs can be diffed. --processes
+runs each route from several forked workers, which is how concurrent writers
+against one database are measured.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import seed as seeding
+
+QUERIES = re.compile(r'desc="(\d+) queries"')
+FRAGMENTS = re.compile(r'frag;desc="(\d+) hits, (\d+) misses"')
+
+
+class Context:
+    """Ids the scenarios pick from, read once from the seeded database."""
+
+    def __init__(self, db, models):
+        # The first sponsor owns the most campaigns, so its pages are the
+        # heaviest ones a sponsor can open.
+        sponsor = models.Sponsor.query.order_by(models.Sponsor.id).first()
+        influencer = models.Influencer.query.order_by(models.Influencer.id).first()
+        self.usernames = {'admin': 'admin', 'sponsor': sponsor.user.username,
+                          'influencer': influencer.user.username}
+        self.sponsor_campaigns = db.session.scalars(
+            db.select(models.Campaign.id).where(models.Campaign.sponsor_id == sponsor.id)
+            .limit(500)).all()
+        self.public_campaigns = db.session.scalars(
+            db.select(models.Campaign.id).where(models.Campaign.is_public == True)
+            .limit(5000)).all()
+        self.influencers = db.session.scalars(
+            db.select(models.Influencer.id).limit(5000)).all()
+        self.ad_requests = db.session.scalars(
+            db.select(models.AdRequest.id)
+            .where(models.AdRequest.influencer_id == influencer.id).limit(500)).all() \
+            or db.session.scalars(db.select(models.AdRequest.id).limit(500)).all()
+
+
+# name -> (role, method, build(rng, ctx) -> (url, form data))
+SCENARIOS = {
+    'login': (None, 'POST', lambda rng, ctx: (
+        '/login', {'username': f'sponsor{rng.randint(1, 50)}', 'password': seeding.PASSWORD})),
+    'admin_find': ('admin', 'GET', lambda rng, ctx: ('/admin_find', None)),
+    'admin_find search': ('admin', 'GET', lambda rng, ctx: (
+        f'/admin_find?search={rng.choice(seeding.NICHES)}', None)),
+    'admin_info': ('admin', 'GET', lambda rng, ctx: ('/admin_info', None)),
+    'admin_stats': ('admin', 'GET', lambda rng, ctx: ('/admin_stats', None)),
+    'api admin_stats': ('admin', 'GET', lambda rng, ctx: ('/api/stats/admin', None)),
+    'sponsor_find': ('sponsor', 'GET', lambda rng, ctx: ('/sponsor_find', None)),
+    'sponsor_find reach': ('sponsor', 'GET', lambda rng, ctx: (
+        '/sponsor_find?min_reach=10K&sort=reach', None)),
+    'sponsor_campaigns': ('sponsor', 'GET', lambda rng, ctx: ('/sponsor_campaigns', None)),
+    'sponsor_profile': ('sponsor', 'GET', lambda rng, ctx: ('/sponsor_profile', None)),
+    'sponsor_stats': ('sponsor', 'GET', lambda rng, ctx: ('/sponsor_stats', None)),
+    'api sponsor_stats': ('sponsor', 'GET', lambda rng, ctx: ('/api/stats/sponsor', None)),
+    'campaign_details': ('sponsor', 'GET', lambda rng, ctx: (
+        f'/campaign_details/{rng.choice(ctx.sponsor_campaigns)}', None)),
+    'request_influencer': ('sponsor', 'GET', lambda rng, ctx: (
+        f'/request_influencer/create/{rng.choice(ctx.sponsor_campaigns)}', None)),
+    'influencer_find': ('influencer', 'GET', lambda rng, ctx: ('/influencer_find', None)),
+    'influencer_profile': ('influencer', 'GET', lambda rng, ctx: ('/influencer_profile', None)),
+    'influencer_stats': ('influencer', 'GET', lambda rng, ctx: ('/influencer_stats', None)),
+    'api influencer_stats': ('influencer', 'GET', lambda rng, ctx: ('/api/stats/influencer', None)),
+    'view_campaign': ('influencer', 'GET', lambda rng, ctx: (
+        f'/view_campaign/{rng.choice(ctx.public_campaigns)}', None)),
+    'view_influencer_details': ('sponsor', 'GET', lambda rng, ctx: (
+        f'/view_influencer_details/{rng.choice(ctx.influencers)}', None)),
+    'accept_request': ('influencer', 'POST', lambda rng, ctx: (
+        f'/accept_request/{rng.choice(ctx.ad_requests)}', {})),
+    'reject_request': ('influencer', 'POST', lambda rng, ctx: (
+        f'/reject_request/{rng.choice(ctx.ad_requests)}', {})),
+    'request_campaign': ('influencer', 'POST', lambda rng, ctx: (
+        f'/request_campaign/{rng.choice(ctx.public_campaigns)}', {})),
+}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def login(app, ctx, role):
+    client = app.test_client()
+    if role is not None:
+        username = ctx.usernames[role]
+        response = client.post('/login', data={'username': username, 'password': seeding.PASSWORD})
+        if response.status_code != 302:
+            raise RuntimeError(f'could not log in as {username}')
+    return client
+
+
+def measure(app, ctx, name, index, count, seed):
+    """Send ``count`` requests for one scenario.
+
+    Returns latencies, statement counts, errors and fragment cache (hits, misses).
+    """
+    role, method, build = SCENARIOS[name]
+    rng = random.Random(f'{seed}-{name}-{index}')
+    client = login(app, ctx, role)
+    latencies, queries, errors = [], [], 0
+    fragments = [0, 0]
+    for _ in range(count):
+        url, data = build(rng, ctx)
+        start = time.perf_counter()
+        response = client.open(url, method=method, data=data)
+        latencies.append((time.perf_counter() - start) * 1000)
+        match = QUERIES.search(response.headers.get('Server-Timing', ''))
+        queries.append(int(match.group(1)) if match else 0)
+        match = FRAGMENTS.search(response.headers.get('Server-Timing', ''))
+        if match:
+            fragments[0] += int(match.group(1))
+            fragments[1] += int(match.group(2))
+        errors += response.status_code >= 400
+    return latencies, queries, errors, fragments
+
+
+# Forked worker processes inherit the app and context through this module
+# global; the app drops the parent's pooled connections on fork.
+_forked = {}
+
+
+def _measure_in_process(name, index, count, seed):
+    app, ctx = _forked['app'], _forked['ctx']
+    with app.app_context():
+        return measure(app, ctx, name, index, count, seed)
+
+
+def run_scenario(app, ctx, name, requests, concurrency, seed, processes=1):
+    # One untimed request per scenario warms up templates and caches.
+    measure(app, ctx, name, -1, 1, seed)
+
+    workers = processes if processes > 1 else concurrency
+    counts = [requests // workers + (i < requests % workers) for i in range(workers)]
+    start = time.perf_counter()
+    if processes > 1:
+        _forked.update(app=app, ctx=ctx)
+        with multiprocessing.get_context('fork').Pool(processes) as pool:
+            parts = pool.starmap(_measure_in_process,
+                                 [(name, i, n, seed) for i, n in enumerate(counts)])
+    else:
+        parts = [None] * workers
+
+        def worker(i, n):
+            parts[i] = measure(app, ctx, name, i, n, seed)
+
+        threads = [threading.Thread(target=worker, args=(i, n)) for i, n in enumerate(counts)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    wall = time.perf_counter() - start
+
+    latencies = [value for part in parts for value in part[0]]
+    queries = [value for part in parts for value in part[1]]
+    hits, misses = sum(part[3][0] for part in parts), sum(part[3][1] for part in parts)
+    return {
+        'requests': len(latencies),
+        'errors': sum(part[2] for part in parts),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_queries': round(sum(queries) / len(queries), 2),
+        'max_queries': max(queries),
+        'throughput_rps': round(len(latencies) / wall, 1),
+        'fragment_hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+    }
+
+
+def _rate(value):
+    return '-' if value is None else f'{value:.0%}'
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True,
+                              capture_output=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)['routes']
+    print(f'\n{"route":<26}{"p95 before":>12}{"p95 now":>10}{"change":>9}'
+          f'{"queries":>10}')
+    for name, now in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        change = (now['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+        queries = f'{before["mean_queries"]:g}->{now["mean_queries"]:g}'
+        print(f'{name:<26}{before["p95_ms"]:>12.2f}{now["p95_ms"]:>10.2f}{change:>8.0f}%'
+              f'{queries:>10}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', choices=seeding.SCALES, default='1k')
+    parser.add_argument('--db', help='SQLite file to benchmark; seeded first if it does not exist')
+    parser.add_argument('--requests', type=int, default=100, help='timed requests per route')
+    parser.add_argument('--concurrency', type=int, default=1, help='client threads per route')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='worker processes per route, like a multi-worker server '
+                             '(overrides --concurrency)')
+    parser.add_argument('--routes', help='comma-separated subset of routes to run')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', help='where to write the JSON results')
+    parser.add_argument('--compare', help='earlier JSON results to diff against')
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.db or os.path.join(tempfile.mkdtemp(), f'load_{args.scale}.db'))
+    seeded = not os.path.exists(path)
+    if seeded:
+        seed_app = seeding.bench_app(path)
+        with seed_app.app_context():
+            seeding.db.create_all()
+            start = time.perf_counter()
+            seeding.seed(seeding.SCALES[args.scale], random.Random(args.seed))
+            print(f'seeded {path} in {time.perf_counter() - start:.1f}s')
+
+    from app import create_app
+    import models
+    # One client per route sends every request, so per-client rate limits
+    # would turn most of them away.
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'TESTING': True,
+                      'PROFILER_ENABLED': True, 'PROFILER_SLOW_QUERY_MS': float('inf'),
+                      'RATE_LIMITS': {}})
+
+    names = args.routes.split(',') if args.routes else list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'unknown routes: {", ".join(sorted(unknown))}')
+
+    results = {}
+    with app.app_context():
+        ctx = Context(models.db, models)
+        print(f'{"route":<26}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"queries":>9}'
+              f'{"req/s":>9}{"errors":>8}{"frag hits":>11}')
+        for name in names:
+            result = run_scenario(app, ctx, name, args.requests, args.concurrency, args.seed,
+                                  args.processes)
+            results[name] = result
+            print(f'{name:<26}{result["p50_ms"]:>9.2f}{result["p95_ms"]:>9.2f}'
+                  f'{result["p99_ms"]:>9.2f}{result["mean_queries"]:>9g}'
+                  f'{result["throughput_rps"]:>9.1f}{result["errors"]:>8}'
+                  f'{_rate(result["fragment_hit_rate"]):>11}')
+        rows = {table: models.db.session.execute(
+                    models.db.text(f'SELECT COUNT(*) FROM {table}')).scalar()
+                for table in ('users', 'sponsors', 'influencers', 'campaign', 'ad_request')}
+
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'scale': args.scale if seeded else None,
+            'rows': rows,
+            'requests_per_route': args.requests,
+            'concurrency': args.concurrency,
+            'processes': args.processes,
+            'database': {key: app.config[key] for key in (
+                'DB_SQLITE_JOURNAL_MODE', 'DB_SQLITE_SYNCHRONOUS', 'DB_SQLITE_BUSY_TIMEOUT_MS')},
+            'fragment_cache': app.config['FRAGMENT_CACHE_BACKEND'],
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+        },
+        'routes': results,
+    }
+    out = args.out or os.path.join(
+        ROOT, 'benchmarks', 'results',
+        f'{datetime.utcnow():%Y%m%dT%H%M%S}-{report["meta"]["commit"] or "local"}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nresults written to {out}')
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
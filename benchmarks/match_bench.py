@@ -0,0 +1,98 @@
+"""Time influencer matchmaking for a campaign, cold and from the cache.
+
+    python benchmarks/match_bench.py --rows 500000
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from models import db, User, Sponsor, Influencer, Campaign, CampaignMatch
+import matching
+
+# Niches and categories are drawn with a Zipf-like skew, so the first few are
+# shared by tens of thousands of influencers and the tail by a handful.
+NICHES = [f'niche{i}' for i in range(300)]
+CATEGORIES = [f'category{i}' for i in range(40)]
+
+
+def skewed(values):
+    return list(itertools.accumulate(1 / (rank + 1) for rank in range(len(values))))
+
+
+def seed(rows, rng):
+    now = datetime.utcnow()
+    niche_weights, category_weights = skewed(NICHES), skewed(CATEGORIES)
+    db.session.execute(User.__table__.insert(), [
+        {'id': i, 'name': f'user {i}', 'username': f'user{i}', 'email': f'user{i}@example.com',
+         'password': 'x', 'user_role': 'influencer', 'created_at': now}
+        for i in range(1, rows + 2)])
+    db.session.execute(Sponsor.__table__.insert(), [{'id': 1, 'user_id': rows + 1, 'industry': 'x'}])
+    influencers = []
+    for i in range(1, rows + 1):
+        reach = int(rng.paretovariate(1.2) * 1000)
+        influencers.append({
+            'id': i, 'user_id': i, 'reach': str(reach), 'reach_count': reach, 'created_at': now,
+            'niche': ' '.join(rng.choices(NICHES, cum_weights=niche_weights, k=2)),
+            'category': rng.choices(CATEGORIES, cum_weights=category_weights)[0],
+        })
+    db.session.execute(Influencer.__table__.insert(), influencers)
+    db.session.execute(Campaign.__table__.insert(), [
+        {'id': i + 1, 'title': niche, 'description': niche, 'niche': niche, 'budget': 100.0,
+         'is_public': True, 'start_date': now, 'end_date': now, 'sponsor_id': 1}
+        for i, niche in enumerate([NICHES[0], NICHES[1], NICHES[10], NICHES[200], CATEGORIES[0]])])
+    db.session.commit()
+    with db.engine.begin() as connection:
+        matching.rebuild(connection)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    path = os.environ.get('BENCH_DB') or os.path.join(tempfile.mkdtemp(), 'match_bench.db')
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        seed(args.rows, rng)
+        print(f'seeded {args.rows} influencers in {time.perf_counter() - start:.1f}s')
+
+        print(f'{"campaign niche":<16}{"matches":>8}{"cold ms":>10}{"cached ms":>11}')
+        for campaign in Campaign.query.order_by(Campaign.id):
+            def cold():
+                db.session.query(CampaignMatch).filter_by(campaign_id=campaign.id).delete()
+                db.session.commit()
+                return matching.top_matches(campaign)
+
+            cold_ms = timed(cold, args.repeat)
+            cached_ms = timed(lambda: matching.top_matches(campaign), args.repeat)
+            print(f'{campaign.niche:<16}{len(matching.top_matches(campaign)):>8}'
+                  f'{cold_ms:>10.2f}{cached_ms:>11.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Measure login throughput at each password hashing cost.
+
+    python benchmarks/password_bench.py --costs 12,13,14,15,16 --logins 100 --concurrency 4
+    python benchmarks/password_bench.py --hasher argon2 --costs 1,2,3,4
+
+For each cost (log2 of N for scrypt, time cost for argon2) a user is given a
+password hash of that cost and --concurrency client threads log in --logins
+times in total through the test client. Reported are the time of one hash,
+logins per second, p50/p95 login latency and how many logins were turned
+away with 503 because the hashing pool was full. Pick the highest cost whose
+throughput still covers the peak login rate with room to spare.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app
+from models import db, User
+import passwords
+
+COST_SETTINGS = {'scrypt': 'PASSWORD_SCRYPT_COST', 'argon2': 'PASSWORD_ARGON2_TIME_COST'}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def run(path, hasher, cost, args):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'TESTING': True,
+                      'PASSWORD_HASHER': hasher, COST_SETTINGS[hasher]: cost,
+                      'PASSWORD_HASH_THREADS': args.threads, 'PASSWORD_HASH_QUEUE': args.queue})
+    with app.app_context():
+        start = time.perf_counter()
+        password = passwords.make_hasher(app.config).hash('secret')
+        hash_ms = (time.perf_counter() - start) * 1000
+        db.session.execute(db.update(User).where(User.username == 'bench').values(password=password))
+        db.session.commit()
+
+    latencies, busy = [], [0]
+    lock = threading.Lock()
+    remaining = [args.logins]
+
+    def client():
+        test_client = app.test_client()
+        while True:
+            with lock:
+                if not remaining[0]:
+                    return
+                remaining[0] -= 1
+            start = time.perf_counter()
+            response = test_client.post('/login', data={'username': 'bench', 'password': 'secret'})
+            elapsed = time.perf_counter() - start
+            with lock:
+                if response.status_code == 503:
+                    busy[0] += 1
+                else:
+                    assert response.status_code == 302, response.status_code
+                    latencies.append(elapsed)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return hash_ms, len(latencies) / elapsed, latencies, busy[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hasher', choices=sorted(COST_SETTINGS), default='scrypt')
+    parser.add_argument('--costs', default='12,13,14,15,16')
+    parser.add_argument('--logins', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=4, help='client threads')
+    parser.add_argument('--threads', type=int, default=2, help='PASSWORD_HASH_THREADS')
+    parser.add_argument('--queue', type=int, default=16, help='PASSWORD_HASH_QUEUE')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'password_bench.db')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(name='Bench', username='bench', email='bench@example.com',
+                            password='secret', user_role='admin'))
+        db.session.commit()
+
+    print(f'{args.hasher}, {args.concurrency} clients, {args.threads} hashing threads, '
+          f'{os.cpu_count()} CPUs')
+    print(f'{"cost":>5} {"hash ms":>9} {"logins/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"503s":>5}')
+    for cost in map(int, args.costs.split(',')):
+        hash_ms, rate, latencies, busy = run(path, args.hasher, cost, args)
+        p50 = percentile(latencies, 50) * 1000 if latencies else 0
+        p95 = percentile(latencies, 95) * 1000 if latencies else 0
+        print(f'{cost:5} {hash_ms:9.1f} {rate:9.1f} {p50:8.1f} {p95:8.1f} {busy:5}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Compare the FTS5 search index against the old ilike scans.
+
+    python benchmarks/search_bench.py --rows 100000
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from models import db, User, Influencer, Campaign
+import search
+
+SYLLABLES = ['ka', 'ro', 'mi', 'tu', 'le', 'sa', 'no', 'vi', 'da', 'pe', 'zo', 'ri',
+             'fa', 'gu', 'ne', 'lo', 'ba', 'shi', 'te', 'mo']
+# A few thousand distinct words drawn with a Zipf-like skew, so some search
+# terms are common and most are selective, as in real titles and names.
+VOCABULARY = sorted({a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES})
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+
+def phrase(rng, n):
+    return ' '.join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=n))
+
+
+def seed(rows, rng):
+    now = datetime.utcnow()
+    db.session.execute(User.__table__.insert(), [
+        {'id': i, 'name': phrase(rng, 2).title(),
+         'username': f'user{i}', 'email': f'user{i}@example.com', 'password': 'x',
+         'user_role': 'influencer', 'created_at': now}
+        for i in range(1, rows + 1)])
+    db.session.execute(Influencer.__table__.insert(), [
+        {'id': i, 'user_id': i, 'category': phrase(rng, 1), 'niche': phrase(rng, 1),
+         'reach': '10K', 'created_at': now}
+        for i in range(1, rows + 1)])
+    db.session.execute(Campaign.__table__.insert(), [
+        {'id': i, 'title': phrase(rng, 3), 'description': phrase(rng, 12),
+         'niche': phrase(rng, 1), 'budget': 100.0, 'is_public': True,
+         'start_date': now, 'end_date': now, 'sponsor_id': 1}
+        for i in range(1, rows + 1)])
+    db.session.commit()
+    with db.engine.begin() as connection:
+        search.rebuild(connection)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=24)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    path = os.environ.get('BENCH_DB') or os.path.join(tempfile.mkdtemp(), 'search_bench.db')
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        seed(args.rows, rng)
+        print(f'seeded {args.rows} campaigns and influencers in {time.perf_counter() - start:.1f}s')
+
+        # One very common word, a few mid-frequency ones, a rare one, a prefix
+        # and a two-word query.
+        terms = [VOCABULARY[0], VOCABULARY[20], VOCABULARY[400], VOCABULARY[5000],
+                 VOCABULARY[300][:4], f'{VOCABULARY[10]} {VOCABULARY[50]}']
+        print(f'{"query":<16}{"kind":<12}{"ilike ms":>10}{"fts ms":>10}')
+        for term in terms:
+            def campaigns_ilike():
+                Campaign.query.filter(Campaign.title.ilike(f'%{term}%')) \
+                    .order_by(Campaign.id).limit(args.limit).all()
+
+            def campaigns_fts():
+                query, order = search.apply(Campaign.query, Campaign, term)
+                query.order_by(*order).limit(args.limit).all()
+
+            def influencers_ilike():
+                Influencer.query.join(User).filter(User.name.ilike(f'%{term}%')) \
+                    .order_by(Influencer.id).limit(args.limit).all()
+
+            def influencers_fts():
+                query, order = search.apply(Influencer.query, Influencer, term)
+                query.order_by(*order).limit(args.limit).all()
+
+            for kind, slow, fast in [('campaign', campaigns_ilike, campaigns_fts),
+                                     ('influencer', influencers_ilike, influencers_fts)]:
+                print(f'{term:<16}{kind:<12}{timed(slow, args.repeat):>10.2f}'
+                      f'{timed(fast, args.repeat):>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""Fill a database with synthetic users, campaigns and ad requests.
+
+    python benchmarks/seed.py --scale 100k [--db path/to/bench.db]
+
+The scale is the number of influencers; sponsors, campaigns and ad requests
+are derived from it. A few sponsors own most campaigns and a few campaigns
+draw most requests, niches and categories follow a Zipf-like skew and reach
+a Pareto tail. Every account's password is ``password`` (hashed once and
+shared); the admin logs in as ``admin``, the others as ``sponsor<N>`` and
+``influencer<N>``.
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask, current_app
+from models import db, User, Sponsor, Influencer, Campaign, AdRequest
+import matching
+import passwords
+import rollups
+import search
+
+SCALES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+NICHES = ['fitness', 'fashion', 'beauty', 'gaming', 'travel', 'food', 'technology', 'music',
+          'parenting', 'finance', 'health', 'photography', 'comedy', 'education', 'sports',
+          'pets', 'diy', 'cars', 'books', 'movies', 'art', 'yoga', 'vegan', 'crypto',
+          'skincare', 'hiking', 'cooking', 'coffee', 'design', 'gardening']
+CATEGORIES = ['Lifestyle', 'Technology', 'Health', 'Entertainment', 'Fashion', 'Food',
+              'Travel', 'Education', 'Finance', 'Sports', 'Family', 'Art']
+INDUSTRIES = ['Retail', 'Software', 'Consumer Goods', 'Media', 'Automotive', 'Banking',
+              'Hospitality', 'Telecom', 'Healthcare', 'Gaming']
+WORDS = ['summer', 'launch', 'spring', 'holiday', 'collection', 'challenge', 'review',
+         'giveaway', 'series', 'tour', 'week', 'drop', 'edition', 'promo', 'live']
+
+STATUSES = ['pending', 'accepted', 'rejected', 'completed']
+STATUS_WEIGHTS = [40, 30, 20, 10]
+
+PASSWORD = 'password'
+BATCH_SIZE = 10_000
+
+
+def sizes(influencers):
+    return {
+        'influencers': influencers,
+        'sponsors': max(1, influencers // 10),
+        'campaigns': max(1, influencers // 2),
+        'ad_requests': influencers * 2,
+    }
+
+
+def zipf(n):
+    return list(itertools.accumulate(1 / (rank + 1) for rank in range(n)))
+
+
+def format_reach(count):
+    if count >= 1_000_000:
+        return f'{count / 1_000_000:.1f}M'
+    if count >= 1_000:
+        return f'{count // 1_000}K'
+    return str(count)
+
+
+def _insert(model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(model.__table__.insert(), rows[start:start + BATCH_SIZE])
+
+
+def _users(first_id, count, role, password, now):
+    return [{'id': first_id + i, 'name': f'{role.title()} {i + 1}', 'username': f'{role}{i + 1}',
+             'email': f'{role}{i + 1}@example.com', 'password': password, 'user_role': role,
+             'created_at': now} for i in range(count)]
+
+
+def seed(influencers, rng=None):
+    """Insert a dataset of the given scale into the bound database."""
+    rng = rng or random.Random(42)
+    counts = sizes(influencers)
+    now = datetime.utcnow()
+    niche_weights, category_weights = zipf(len(NICHES)), zipf(len(CATEGORIES))
+
+    sponsor_user_ids = 2
+    influencer_user_ids = sponsor_user_ids + counts['sponsors']
+    password = passwords.make_hasher(current_app.config).hash(PASSWORD)
+    _insert(User, [{'id': 1, 'name': 'Admin', 'username': 'admin', 'email': 'admin@example.com',
+                    'password': password, 'user_role': 'admin', 'created_at': now}]
+            + _users(sponsor_user_ids, counts['sponsors'], 'sponsor', password, now)
+            + _users(influencer_user_ids, counts['influencers'], 'influencer', password, now))
+
+    _insert(Sponsor, [{'id': i + 1, 'user_id': sponsor_user_ids + i,
+                       'industry': rng.choice(INDUSTRIES), 'is_flagged': rng.random() < 0.01}
+                      for i in range(counts['sponsors'])])
+
+    rows = []
+    for i in range(counts['influencers']):
+        reach = min(int(rng.paretovariate(1.1) * 1_000), 500_000_000)
+        rows.append({
+            'id': i + 1, 'user_id': influencer_user_ids + i, 'created_at': now,
+            'category': rng.choices(CATEGORIES, cum_weights=category_weights)[0],
+            'niche': ' '.join(sorted(set(rng.choices(NICHES, cum_weights=niche_weights,
+                                                     k=rng.randint(1, 2))))),
+            'social_networks': ','.join(rng.sample(['instagram', 'youtube', 'tiktok', 'x'], 2)),
+            'reach': format_reach(reach), 'reach_count': reach,
+            'is_flagged': rng.random() < 0.01,
+        })
+    _insert(Influencer, rows)
+
+    sponsor_weights = zipf(counts['sponsors'])
+    rows = []
+    campaigns = []
+    for i in range(counts['campaigns']):
+        start = now - timedelta(days=rng.randint(0, 365))
+        end = start + timedelta(days=rng.randint(7, 180))
+        sponsor_id = rng.choices(range(1, counts['sponsors'] + 1), cum_weights=sponsor_weights)[0]
+        niche = rng.choices(NICHES, cum_weights=niche_weights)[0]
+        budget = round(rng.lognormvariate(8, 1.2), 2)
+        rows.append({
+            'id': i + 1, 'sponsor_id': sponsor_id, 'niche': niche, 'budget': budget,
+            'title': f'{niche.title()} {rng.choice(WORDS)} {rng.choice(WORDS)}',
+            'description': f'{rng.choice(WORDS).title()} {niche} campaign by sponsor {sponsor_id}.',
+            'start_date': start, 'end_date': end, 'is_public': rng.random() < 0.8,
+            'is_flagged': rng.random() < 0.02,
+        })
+        campaigns.append((sponsor_id, budget, start))
+    _insert(Campaign, rows)
+
+    campaign_weights = zipf(counts['campaigns'])
+    rows = []
+    for i in range(counts['ad_requests']):
+        campaign_id = rng.choices(range(1, counts['campaigns'] + 1), cum_weights=campaign_weights)[0]
+        sponsor_id, budget, start = campaigns[campaign_id - 1]
+        influencer_id = rng.randint(1, counts['influencers'])
+        rows.append({
+            'id': i + 1, 'campaign_id': campaign_id, 'sponsor_id': sponsor_id,
+            'influencer_id': influencer_id, 'influencer_name': f'influencer{influencer_id}',
+            'ad_name': f'Ad {i + 1}', 'description': 'Synthetic ad request.',
+            'terms': 'Two posts and one story.',
+            'payment': round(budget * rng.uniform(0.05, 0.3), 2),
+            'status': rng.choices(STATUSES, weights=STATUS_WEIGHTS)[0],
+            'created_by': rng.choice(['sponsor', 'influencer']),
+            'negotiation_status': 'no negotiation',
+            'created_at': start + timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+        })
+        if len(rows) == BATCH_SIZE:
+            _insert(AdRequest, rows)
+            rows = []
+    _insert(AdRequest, rows)
+    db.session.commit()
+
+    # Core inserts skip the flush hooks, so build the derived tables in one go.
+    with db.engine.begin() as connection:
+        if search.enabled():
+            search.rebuild(connection)
+        rollups.rebuild(connection)
+        matching.rebuild(connection)
+    return counts
+
+
+def bench_app(path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', choices=SCALES, default='1k')
+    parser.add_argument('--db', help='SQLite file to create (default: a temporary file)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), f'seed_{args.scale}.db')
+    if os.path.exists(path):
+        parser.error(f'{path} already exists')
+    app = bench_app(path)
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        counts = seed(SCALES[args.scale], random.Random(args.seed))
+    print(', '.join(f'{n} {name}' for name, n in counts.items())
+          + f' seeded into {path} in {time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Time the login/dashboard round trip with cookie and server-side sessions.
+
+    python benchmarks/session_bench.py --rounds 200 --views 20
+
+Each round logs a sponsor in, opens the dashboard --views times and logs out,
+so it covers session creation, reads and the id rotation on logout. The
+median per round and per dashboard view are reported for each backend.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app
+from models import db, User, Sponsor
+
+BACKENDS = {'cookie': None, 'sql': 'sql'}
+
+
+def median(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2] * 1000
+
+
+def run(backend, path, rounds, views):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'TESTING': True,
+                      'SESSION_BACKEND': backend})
+    client = app.test_client()
+    round_times, view_times = [], []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        response = client.post('/login', data={'username': 'sponsor', 'password': 'secret'})
+        assert response.status_code == 302, response.status_code
+        for _ in range(views):
+            view_start = time.perf_counter()
+            assert client.get('/sponsor_dashboard').status_code == 200
+            view_times.append(time.perf_counter() - view_start)
+        client.get('/logout')
+        round_times.append(time.perf_counter() - start)
+    return median(round_times), median(view_times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--views', type=int, default=20, help='dashboard views per login')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'session_bench.db')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+    with app.app_context():
+        db.create_all()
+        user = User(name='Sponsor', username='sponsor', email='sponsor@example.com',
+                    password='secret', user_role='sponsor')
+        db.session.add(Sponsor(user=user, industry='retail'))
+        db.session.commit()
+
+    print(f'{"sessions":10} {"round ms":>10} {"view ms":>10}')
+    for name, backend in BACKENDS.items():
+        # A warm-up round, so neither backend pays for the first imports.
+        run(backend, path, 1, 1)
+        round_ms, view_ms = run(backend, path, args.rounds, args.views)
+        print(f'{name:10} {round_ms:10.2f} {view_ms:10.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import hashlib
+from datetime import timezone
+from functools import wraps
+from flask import current_app, g, make_response, request, session
+from models import db
+from fragments import templates_digest
+
+
+# Conditional GET for read-only pages. A view decorated with @conditional
+# names the updated_at columns its page is built from; before the view runs,
+# those are read in one statement and hashed, together with the viewer and
+# the template sources, into an ETag. A client that already holds that
+# version gets 304 Not Modified and the page is neither loaded nor rendered.
+# Responses are private, so shared caches never keep a page meant for one
+# user, and must be revalidated unless the view allows a max-age.
+
+
+def _etag(kwargs, row):
+    parts = [current_app.extensions['conditional'], request.endpoint, sorted(kwargs.items()),
+             session.get('user_id'), session.get('user_role'),
+             [value.isoformat() if value is not None else None for value in row]]
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def conditional(validators=None, max_age=None):
+    """Answer conditional GETs for a view.
+
+    ``validators`` takes the view's arguments and returns a select of the
+    ``updated_at`` values (or ``max(updated_at)``) the page depends on; it
+    should be an indexed lookup. When it finds no row the view runs as usual.
+    Without ``validators`` the page only changes with the templates and the
+    viewer. ``max_age`` names a config key with the number of seconds a
+    client may reuse the response before asking again. The view can read
+    the ETag from ``g.etag``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(**kwargs)
+            row = db.session.execute(validators(**kwargs)).first() if validators else ()
+            if row is None:
+                return view(**kwargs)
+
+            etag = g.etag = _etag(kwargs, row)
+            # A page showing a pending flash message must not be reused.
+            if session.get('_flashes'):
+                return view(**kwargs)
+            stamps = [value for value in row if value is not None]
+            last_modified = max(stamps).replace(tzinfo=timezone.utc) if stamps else None
+            if _not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.cache_control.private = True
+            if max_age and current_app.config.get(max_age):
+                response.cache_control.max_age = current_app.config[max_age]
+            else:
+                response.cache_control.no_cache = True
+            response.vary.add('Cookie')
+            return response
+        return wrapper
+    return decorator
+
+
+def init_conditional(app):
+    # Pages link their assets by content hash, so a new asset build is a new
+    # version of every page too.
+    assets = app.extensions.get('assets')
+    app.extensions['conditional'] = templates_digest(app) + (assets['digest'] if assets else '')
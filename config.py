@@ -0,0 +1,80 @@
+import os
+
+
+class Config:
+    SECRET_KEY = 'your_secret_key'
+
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///connetify.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    DB_POOL_SIZE = 10
+    DB_MAX_OVERFLOW = 20
+    DB_POOL_TIMEOUT = 10
+    DB_POOL_RECYCLE = 1800
+    DB_STATEMENT_TIMEOUT_MS = 15000
+    DB_SQLITE_JOURNAL_MODE = 'WAL'
+    DB_SQLITE_SYNCHRONOUS = 'NORMAL'
+    DB_SQLITE_BUSY_TIMEOUT_MS = 5000
+
+    QUERY_BUDGET = 50
+    PAGE_SIZE = 24
+    PAGE_SIZE_MAX = 100
+    STATS_CHART_LIMIT = 20
+    STATS_CACHE_TTL = 300
+    STATS_MAX_AGE = 30
+    STATS_REFRESH_SECONDS = 60
+    MATCH_LIMIT = 50
+    MATCH_CANDIDATES = 1000
+    MATCH_CACHE_TTL = 3600
+    FEED_SIZE = 200
+    FEED_CANDIDATES = 1000
+    FEED_CACHE_TTL = 3600
+
+    FRAGMENT_CACHE_BACKEND = 'lru'
+    FRAGMENT_CACHE_SIZE = 10000
+    FRAGMENT_CACHE_TTL = 300
+    FRAGMENT_CACHE_URL = 'redis://localhost:6379/0'
+
+    PRINCIPAL_CACHE_SIZE = 10000
+    PRINCIPAL_CACHE_TTL = 30
+
+    PASSWORD_HASHER = 'scrypt'
+    PASSWORD_SCRYPT_COST = 15
+    PASSWORD_ARGON2_TIME_COST = 3
+    PASSWORD_ARGON2_MEMORY_KIB = 65536
+    PASSWORD_HASH_THREADS = 2
+    PASSWORD_HASH_QUEUE = 16
+
+    SESSION_BACKEND = 'sql'
+    SESSION_URL = 'redis://localhost:6379/1'
+    SESSION_CACHE_SIZE = 10000
+    SESSION_CACHE_TTL = 5
+    SESSION_IDLE_TIMEOUT = 7 * 24 * 3600
+    SESSION_TOUCH_INTERVAL = 60
+
+    RATE_LIMIT_BACKEND = 'memory'
+    RATE_LIMIT_URL = 'redis://localhost:6379/2'
+    RATE_LIMIT_SIZE = 100000
+    RATE_LIMITS = {
+        'search': {'per_minute': 60, 'burst': 20},
+        'stats': {'per_minute': 30, 'burst': 10},
+    }
+    ADMISSION_MAX_IN_FLIGHT = 64
+    ADMISSION_MAX_POOL_WAIT_MS = 500
+
+    PROFILER_ENABLED = False
+    PROFILER_SLOW_QUERY_MS = 100
+    PROFILER_SLOW_QUERY_LOG = None
+
+    JOB_POLL_INTERVAL = 1
+    JOB_RETRY_DELAY = 30
+    JOB_TIMEOUT = 600
+    JOB_KEEP_DAYS = 7
+    EXPORT_FOLDER = None
+
+    MAIL_SERVER = 'localhost'
+    MAIL_PORT = 25
+    MAIL_USE_TLS = False
+    MAIL_USERNAME = None
+    MAIL_PASSWORD = None
+    MAIL_DEFAULT_SENDER = 'Connetify <no-reply@connetify.local>'
+    NOTIFY_DIGEST_WINDOW = 900
@@ -0,0 +1,89 @@
+import os
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from models import db
+
+
+# Engine setup per database backend, driven by app.config.
+#
+# PostgreSQL gets a sized QueuePool with pre-ping (so connections dropped by a
+# restart or a proxy are replaced instead of failing a request) and a
+# server-side statement timeout. SQLite is switched to WAL mode on every new
+# connection, so readers no longer block the writer and the writer no longer
+# blocks readers, and waits DB_SQLITE_BUSY_TIMEOUT_MS for the write lock
+# instead of failing at once with "database is locked".
+#
+# Pooled engines use TimedQueuePool, which keeps a decaying average of how
+# long a request waited for a connection; admission control (ratelimit.py)
+# sheds load when it climbs.
+
+
+class TimedQueuePool(QueuePool):
+    half_life = 1.0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait = 0.0
+        self._wait_at = time.monotonic()
+
+    def _do_get(self):
+        start = time.monotonic()
+        try:
+            return super()._do_get()
+        finally:
+            now = time.monotonic()
+            self._wait = self.recent_wait(now) * 0.8 + (now - start) * 0.2
+            self._wait_at = now
+
+    def recent_wait(self, now=None):
+        """Average checkout wait in seconds, halving every half_life seconds without checkouts."""
+        now = time.monotonic() if now is None else now
+        return self._wait * 0.5 ** ((now - self._wait_at) / self.half_life)
+
+
+def engine_options(config):
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if url.get_backend_name() != 'sqlite' or url.database not in (None, '', ':memory:'):
+        options.setdefault('poolclass', TimedQueuePool)
+    if url.get_backend_name() == 'postgresql':
+        options.setdefault('pool_size', config['DB_POOL_SIZE'])
+        options.setdefault('max_overflow', config['DB_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', config['DB_POOL_TIMEOUT'])
+        options.setdefault('pool_recycle', config['DB_POOL_RECYCLE'])
+        options.setdefault('pool_pre_ping', True)
+        if config.get('DB_STATEMENT_TIMEOUT_MS'):
+            connect_args = options.setdefault('connect_args', {})
+            connect_args.setdefault('options',
+                                    f"-c statement_timeout={int(config['DB_STATEMENT_TIMEOUT_MS'])}")
+    return options
+
+
+def _sqlite_pragmas(config, in_memory):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {int(config['DB_SQLITE_BUSY_TIMEOUT_MS'])}")
+        if not in_memory:
+            cursor.execute(f"PRAGMA journal_mode = {config['DB_SQLITE_JOURNAL_MODE']}")
+            cursor.execute(f"PRAGMA synchronous = {config['DB_SQLITE_SYNCHRONOUS']}")
+        cursor.close()
+    return set_pragmas
+
+
+def init_database(app):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    db.init_app(app)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        if engine.dialect.name == 'sqlite':
+            in_memory = engine.url.database in (None, '', ':memory:')
+            event.listen(engine, 'connect', _sqlite_pragmas(app.config, in_memory))
+
+    # A server that preloads the app and then forks workers (gunicorn
+    # --preload) must not share pooled connections between processes; each
+    # child starts with an empty pool.
+    os.register_at_fork(after_in_child=lambda: [engine.dispose(close=False) for engine in engines])
@@ -0,0 +1,175 @@
+import csv
+import io
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from models import db, User, Sponsor, Influencer, Campaign, AdRequest
+from mail import send_email
+import jobs
+
+
+# Streaming exports of ad requests and campaigns for finance. The rows are
+# selected as plain column tuples (no ORM objects) with yield_per, which on
+# PostgreSQL fetches them through a server-side cursor, and each batch is
+# written out and sent before the next is fetched, so memory stays flat
+# however large the table is. The export reads one snapshot of the data.
+#
+# queue_export() leaves the same export to the job worker instead, which
+# writes it to EXPORT_FOLDER and mails the admin who asked for it.
+
+YIELD_PER = 1000
+
+FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+CAMPAIGN_STATUSES = {
+    'public': Campaign.is_public.is_(True),
+    'private': Campaign.is_public.is_(False),
+    'flagged': Campaign.is_flagged.is_(True),
+}
+
+
+def _date(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f'{name} must be a date like 2024-12-31.')
+
+
+def _adrequests(sponsor, status, start, end):
+    sponsor_user = aliased(User)
+    influencer_user = aliased(User)
+    statement = (
+        select(AdRequest.id, AdRequest.campaign_id, Campaign.title.label('campaign'),
+               AdRequest.sponsor_id, sponsor_user.username.label('sponsor'),
+               AdRequest.influencer_id, influencer_user.username.label('influencer'),
+               AdRequest.influencer_name, AdRequest.ad_name, AdRequest.description,
+               AdRequest.terms, AdRequest.payment, AdRequest.status,
+               AdRequest.negotiation_status, AdRequest.modified_terms,
+               AdRequest.modified_payment, AdRequest.created_by, AdRequest.created_at,
+               AdRequest.updated_at)
+        .join(Campaign, Campaign.id == AdRequest.campaign_id)
+        .join(Sponsor, Sponsor.id == AdRequest.sponsor_id)
+        .join(sponsor_user, sponsor_user.id == Sponsor.user_id)
+        .outerjoin(Influencer, Influencer.id == AdRequest.influencer_id)
+        .outerjoin(influencer_user, influencer_user.id == Influencer.user_id)
+        .order_by(AdRequest.created_at, AdRequest.id)
+    )
+    if sponsor:
+        statement = statement.where(sponsor_user.username == sponsor)
+    if status:
+        statement = statement.where(AdRequest.status == status)
+    if start:
+        statement = statement.where(AdRequest.created_at >= start)
+    if end:
+        statement = statement.where(AdRequest.created_at < end)
+    return statement
+
+
+def _campaigns(sponsor, status, start, end):
+    statement = (
+        select(Campaign.id, Campaign.sponsor_id, User.username.label('sponsor'),
+               Campaign.title, Campaign.description, Campaign.niche, Campaign.budget,
+               Campaign.is_public, Campaign.is_flagged, Campaign.start_date,
+               Campaign.end_date, Campaign.influencer_id, Campaign.image, Campaign.updated_at)
+        .join(Sponsor, Sponsor.id == Campaign.sponsor_id)
+        .join(User, User.id == Sponsor.user_id)
+        .order_by(Campaign.id)
+    )
+    if sponsor:
+        statement = statement.where(User.username == sponsor)
+    if status:
+        if status not in CAMPAIGN_STATUSES:
+            raise ValueError(f'Campaign status must be one of {", ".join(CAMPAIGN_STATUSES)}.')
+        statement = statement.where(CAMPAIGN_STATUSES[status])
+    # Campaigns running at any time in the range.
+    if start:
+        statement = statement.where(Campaign.end_date >= start)
+    if end:
+        statement = statement.where(Campaign.start_date < end)
+    return statement
+
+
+EXPORTS = {'adrequests': _adrequests, 'campaigns': _campaigns}
+
+
+def statement(kind, sponsor=None, status=None, start=None, end=None):
+    """The select for an export; ``start`` and ``end`` are inclusive YYYY-MM-DD dates.
+
+    Raises ValueError for a filter that cannot be applied.
+    """
+    start = _date(start, 'from') if start else None
+    end = _date(end, 'to') + timedelta(days=1) if end else None
+    return EXPORTS[kind](sponsor, status, start, end)
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return value
+
+
+def generate(statement, file_format):
+    """Yield the export as chunks of text, one per YIELD_PER rows."""
+    result = db.session.execute(statement.execution_options(yield_per=YIELD_PER))
+    columns = list(result.keys())
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if file_format == 'csv':
+        writer.writerow(columns)
+    for rows in result.partitions():
+        for row in rows:
+            if file_format == 'csv':
+                writer.writerow(row)
+            else:
+                buffer.write(json.dumps(dict(zip(columns, map(_value, row)))))
+                buffer.write('\n')
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_folder():
+    return current_app.config.get('EXPORT_FOLDER') or os.path.join(current_app.instance_path,
+                                                                   'exports')
+
+
+def queue_export(kind, file_format, filters, notify=None):
+    """Queue an export to a file; returns the file name it will have.
+
+    Raises ValueError for filters that cannot be applied, before queueing.
+    """
+    statement(kind, **filters)
+    filename = f'{kind}-{datetime.utcnow():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}.{file_format}'
+    jobs.enqueue('export', kind=kind, file_format=file_format, filters=filters,
+                 filename=filename, notify=notify)
+    return filename
+
+
+@jobs.task('export', max_attempts=2)
+def _write_export(kind, file_format, filters, filename, notify=None):
+    folder = export_folder()
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, filename)
+    with open(path + '.part', 'w', encoding='utf-8', newline='') as f:
+        for chunk in generate(statement(kind, **filters), file_format):
+            f.write(chunk)
+    os.replace(path + '.part', path)
+    if notify:
+        send_email([notify], f'Your {kind} export is ready',
+                   f'{filename} can now be downloaded from the admin info page.')
+
+
+def ready_exports(limit=10):
+    """The newest finished export files."""
+    folder = export_folder()
+    if not os.path.isdir(folder):
+        return []
+    names = [name for name in os.listdir(folder) if not name.endswith('.part')]
+    names.sort(key=lambda name: os.path.getmtime(os.path.join(folder, name)), reverse=True)
+    return names[:limit]
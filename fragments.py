@@ -0,0 +1,247 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+import click
+from flask import current_app, g, has_app_context, has_request_context
+from markupsafe import Markup
+from sqlalchemy import event
+from models import db, User, Sponsor, Influencer, Campaign
+
+
+# Fragment cache for the per-entity cards on list pages. A template wraps a
+# card in {% call fragment('name', entity, ...) %} and the body is rendered
+# once per version of the entities it shows; every later page reuses the
+# HTML. Each entity has a version counter that is bumped after a commit that
+# changed or deleted it, so an edited card is simply never read again and
+# ages out of the cache. Fragment keys also carry a digest of the template
+# sources, so a deploy with changed templates starts from an empty cache.
+#
+# FRAGMENT_CACHE_BACKEND picks where fragments live: 'lru' keeps them in
+# process memory (one cache per worker, so another worker may serve an old
+# card for up to FRAGMENT_CACHE_TTL after an edit), 'redis' shares them
+# between workers through a Redis-compatible server at FRAGMENT_CACHE_URL
+# and needs the redis package. Version keys there have no TTL, so run the
+# server with maxmemory-policy volatile-lru to have only fragments evicted.
+#
+# cached() keeps other rendered output (such as the stats API payloads) in
+# the same backend for a given number of seconds.
+
+CACHED = (User, Sponsor, Influencer, Campaign)
+
+log = logging.getLogger('connetify.fragments')
+
+# Hits and misses per fragment name since this process started.
+metrics = {}
+
+
+class LRUBackend:
+    errors = ()
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self.fragments = OrderedDict()
+        self.versions = {}
+        self.lock = threading.Lock()
+
+    def lookup(self, version_keys, key):
+        with self.lock:
+            versions = [self.versions.get(version_key, 0) for version_key in version_keys]
+            entry = self.fragments.get(key)
+            if entry is None:
+                return versions, None
+            if entry[0] < time.monotonic():
+                del self.fragments[key]
+                return versions, None
+            self.fragments.move_to_end(key)
+            return versions, entry[1]
+
+    def store(self, key, value, ttl=None):
+        with self.lock:
+            self.fragments[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self.fragments.move_to_end(key)
+            while len(self.fragments) > self.size:
+                self.fragments.popitem(last=False)
+
+    def bump(self, version_keys):
+        with self.lock:
+            for version_key in version_keys:
+                self.versions[version_key] = self.versions.get(version_key, 0) + 1
+
+    def clear(self):
+        with self.lock:
+            self.fragments.clear()
+            self.versions.clear()
+
+
+class RedisBackend:
+    def __init__(self, url, ttl):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.errors = (redis.RedisError,)
+
+    def lookup(self, version_keys, key):
+        # Versions and fragment come back in one round trip.
+        values = self.client.mget(version_keys + [key])
+        versions = [int(value) if value is not None else 0 for value in values[:-1]]
+        return versions, values[-1].decode() if values[-1] is not None else None
+
+    def store(self, key, value, ttl=None):
+        self.client.set(key, value, ex=ttl or self.ttl)
+
+    def bump(self, version_keys):
+        pipeline = self.client.pipeline(transaction=False)
+        for version_key in version_keys:
+            pipeline.incr(version_key)
+        pipeline.execute()
+
+    def clear(self):
+        for pattern in ('fragment:*', 'fragment-version:*'):
+            keys = list(self.client.scan_iter(match=pattern, count=1000))
+            for start in range(0, len(keys), 1000):
+                self.client.delete(*keys[start:start + 1000])
+
+
+def _version_key(obj):
+    return f'fragment-version:{type(obj).__name__.lower()}:{obj.id}'
+
+
+def _record(name, hit):
+    counts = metrics.setdefault(name, {'hits': 0, 'misses': 0})
+    counts['hits' if hit else 'misses'] += 1
+    profile = g.get('profile') if has_request_context() else None
+    if profile is not None:
+        profile['fragment_hits' if hit else 'fragment_misses'] += 1
+
+
+def fragment(name, *entities, vary=None, caller=None):
+    """Render the body of ``{% call fragment(name, *entities) %}``, or reuse it.
+
+    The body must depend only on ``entities`` (and ``vary``, for the odd value
+    that is not part of an entity); anything request-specific belongs
+    outside the call block.
+    """
+    cache = current_app.extensions.get('fragments')
+    if cache is None:
+        return caller()
+    backend = cache['backend']
+    version_keys = [_version_key(obj) for obj in entities]
+    key = ':'.join([cache['prefix'], name] + [version_key.split(':', 1)[1]
+                                              for version_key in version_keys])
+    if vary is not None:
+        key += f':{vary}'
+
+    try:
+        versions, value = backend.lookup(version_keys, key)
+    except backend.errors:
+        log.warning('fragment cache unavailable, rendering %s uncached', name, exc_info=True)
+        return caller()
+    stamp = '.'.join(map(str, versions))
+    if value is not None:
+        value_stamp, _, html = value.partition('\n')
+        if value_stamp == stamp:
+            _record(name, True)
+            return Markup(html)
+
+    _record(name, False)
+    html = caller()
+    try:
+        backend.store(key, f'{stamp}\n{html}')
+    except backend.errors:
+        log.warning('could not store fragment %s', name, exc_info=True)
+    return html
+
+
+def cached(name, key, build, ttl):
+    """Return the string ``build()``, reusing it under ``key`` for ``ttl`` seconds."""
+    cache = current_app.extensions.get('fragments')
+    if cache is None:
+        return build()
+    backend = cache['backend']
+    key = f'{cache["prefix"]}:{name}:{key}'
+    try:
+        value = backend.lookup([], key)[1]
+    except backend.errors:
+        log.warning('fragment cache unavailable, building %s uncached', name, exc_info=True)
+        return build()
+    if value is not None:
+        _record(name, True)
+        return value
+
+    _record(name, False)
+    value = build()
+    try:
+        backend.store(key, value, ttl)
+    except backend.errors:
+        log.warning('could not store %s', name, exc_info=True)
+    return value
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_stale(session, flush_context):
+    stale = session.info.setdefault('stale_fragments', set())
+    with session.no_autoflush:
+        for obj in session.dirty:
+            if isinstance(obj, CACHED) and session.is_modified(obj):
+                stale.add(_version_key(obj))
+    for obj in session.deleted:
+        if isinstance(obj, CACHED):
+            stale.add(_version_key(obj))
+
+
+@event.listens_for(db.session, 'after_commit')
+def _bump_versions(session):
+    # Bumped only once the change is visible to other connections, so a
+    # concurrent request cannot cache the old row under the new version.
+    stale = session.info.pop('stale_fragments', None)
+    cache = current_app.extensions.get('fragments') if has_app_context() else None
+    if not stale or cache is None:
+        return
+    try:
+        cache['backend'].bump(sorted(stale))
+    except cache['backend'].errors:
+        log.error('could not bump fragment versions %s', sorted(stale), exc_info=True)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_stale(session):
+    session.info.pop('stale_fragments', None)
+
+
+def templates_digest(app):
+    digest = hashlib.sha1()
+    folder = os.path.join(app.root_path, app.template_folder)
+    for root, dirs, files in sorted(os.walk(folder)):
+        for filename in sorted(files):
+            with open(os.path.join(root, filename), 'rb') as f:
+                digest.update(filename.encode() + b'\0' + f.read())
+    return digest.hexdigest()[:10]
+
+
+def init_fragments(app):
+    name = app.config.get('FRAGMENT_CACHE_BACKEND')
+    ttl = app.config.get('FRAGMENT_CACHE_TTL', 300)
+    if name == 'lru':
+        backend = LRUBackend(app.config.get('FRAGMENT_CACHE_SIZE', 10000), ttl)
+    elif name == 'redis':
+        backend = RedisBackend(app.config['FRAGMENT_CACHE_URL'], ttl)
+    elif name:
+        raise ValueError(f'Unknown FRAGMENT_CACHE_BACKEND {name!r}')
+    if name:
+        app.extensions['fragments'] = {'backend': backend,
+                                       'prefix': f'fragment:{templates_digest(app)}'}
+    app.add_template_global(fragment)
+
+    @app.cli.command('fragments-clear')
+    def fragments_clear():
+        """Drop every cached fragment and version counter."""
+        cache = app.extensions.get('fragments')
+        if cache is None or isinstance(cache['backend'], LRUBackend):
+            click.echo('The fragment cache is not shared; it is cleared when the workers restart.')
+            return
+        cache['backend'].clear()
+        click.echo('Fragment cache cleared.')
@@ -0,0 +1,319 @@
+import csv
+import json
+import os
+import time
+from datetime import datetime
+import click
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from models import db, User, Sponsor, Influencer, Campaign, parse_reach
+import matching
+import passwords
+import rollups
+import search
+
+
+# Bulk import of influencers (with their user accounts) and campaigns from a
+# CSV or NDJSON file. The file is read as a stream, BATCH_SIZE rows at a
+# time: the rows are validated, their usernames and emails are checked
+# against the database in one query, and the batch is inserted with
+# executemany in a transaction of its own, together with its search,
+# matchmaking and stats entries (Core inserts skip the flush hooks that keep
+# those in step). A bad row is skipped and reported by line; the rest of
+# the file still loads.
+#
+# Passwords already hashed (scrypt$... or $argon2...) load as they are.
+# Plaintext ones are stored as given, and each batch queues hash-passwords
+# jobs for them (see passwords.py) with the batch's transaction: hashing
+# them here would take a good fraction of a second per row. They are
+# hashed once `flask jobs-worker` gets to the jobs; for a large file,
+# hashing them before the import and loading the hashes avoids the wait.
+
+BATCH_SIZE = 5000
+
+FORMATS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+# column -> maximum length (None for unbounded); every column is required.
+INFLUENCER_COLUMNS = {'name': 100, 'username': None, 'email': None, 'password': None,
+                      'category': 100, 'niche': 100, 'reach': 100}
+CAMPAIGN_COLUMNS = {'sponsor': None, 'title': 100, 'description': None, 'niche': 50,
+                    'budget': None, 'start_date': None, 'end_date': None}
+
+TRUE = {'1', 'true', 'yes', 'y', 'on', 'public'}
+FALSE = {'0', 'false', 'no', 'n', 'off', 'private'}
+
+
+class Report:
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.hashing = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.errors.append((line, message))
+
+    def write_csv(self, f):
+        writer = csv.writer(f)
+        writer.writerow(['line', 'error'])
+        writer.writerows(self.errors)
+
+
+def format_for(filename):
+    """The format of a file, from its extension."""
+    file_format = FORMATS.get(os.path.splitext(filename or '')[1].lower())
+    if file_format is None:
+        raise ValueError(f'Cannot tell the format of {filename!r}; '
+                         f'use one of {", ".join(sorted(FORMATS))}.')
+    return file_format
+
+
+def read_rows(stream, file_format):
+    """Yield (line number, row) from a text stream; the row is None if unreadable."""
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, None
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _columns(row, columns):
+    if not isinstance(row, dict):
+        raise ValueError('not a JSON object')
+    values = {}
+    for column, max_length in columns.items():
+        value = row.get(column)
+        value = '' if value is None else str(value).strip()
+        if not value:
+            raise ValueError(f'{column} is required')
+        if max_length and len(value) > max_length:
+            raise ValueError(f'{column} is longer than {max_length} characters')
+        values[column] = value
+    return values
+
+
+def _influencer(row):
+    values = _columns(row, INFLUENCER_COLUMNS)
+    if '@' not in values['email']:
+        raise ValueError(f'email {values["email"]!r} is not an email address')
+    try:
+        values['reach_count'] = parse_reach(values['reach'])
+    except ValueError:
+        raise ValueError(f'reach {values["reach"]!r} is not a number such as 12000, 15K or 1.5M')
+    social_networks = row.get('social_networks') or ''
+    if isinstance(social_networks, list):
+        social_networks = ','.join(map(str, social_networks))
+    values['social_networks'] = str(social_networks).strip()
+    if passwords.has_hash_prefix(values['password']) and not passwords.is_hash(values['password']):
+        raise ValueError('password is not a valid scrypt or argon2 hash')
+    return values
+
+
+def _date(values, column):
+    try:
+        return datetime.strptime(values[column], '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f'{column} {values[column]!r} is not a date like 2024-12-31')
+
+
+def _campaign(row):
+    values = _columns(row, CAMPAIGN_COLUMNS)
+    try:
+        values['budget'] = float(values['budget'])
+    except ValueError:
+        raise ValueError(f'budget {values["budget"]!r} is not a number')
+    if not 0 <= values['budget'] < float('inf'):
+        raise ValueError('budget must be a number of at least 0')
+    values['start_date'] = _date(values, 'start_date')
+    values['end_date'] = _date(values, 'end_date')
+    if values['end_date'] < values['start_date']:
+        raise ValueError('end_date is before start_date')
+    is_public = row.get('is_public')
+    if is_public is None or is_public == '':
+        values['is_public'] = True
+    elif isinstance(is_public, bool):
+        values['is_public'] = is_public
+    elif str(is_public).strip().lower() in TRUE | FALSE:
+        values['is_public'] = str(is_public).strip().lower() in TRUE
+    else:
+        raise ValueError(f'is_public {is_public!r} is not yes or no')
+    image = str(row.get('image') or '').strip()
+    if len(image) > 200:
+        raise ValueError('image is longer than 200 characters')
+    values['image'] = image or None
+    return values
+
+
+def _validate(batch, parse, report):
+    valid = []
+    for line, row in batch:
+        try:
+            valid.append((line, parse(row)))
+        except ValueError as e:
+            report.error(line, str(e))
+    return valid
+
+
+def _insert(table, rows):
+    return db.session.execute(table.insert().returning(table.c.id, sort_by_parameter_order=True),
+                              rows).scalars().all()
+
+
+def _import_influencers(batch, report):
+    valid = _validate(batch, _influencer, report)
+    if not valid:
+        return []
+    usernames = {values['username'] for line, values in valid}
+    emails = {values['email'] for line, values in valid}
+    taken = db.session.execute(select(User.username, User.email).where(
+        or_(User.username.in_(usernames), User.email.in_(emails)))).all()
+    usernames = {row.username for row in taken}
+    emails = {row.email for row in taken}
+
+    accepted = []
+    for line, values in valid:
+        if values['username'] in usernames:
+            report.error(line, f'username {values["username"]!r} already exists')
+        elif values['email'] in emails:
+            report.error(line, f'email {values["email"]!r} already exists')
+        else:
+            usernames.add(values['username'])
+            emails.add(values['email'])
+            accepted.append((line, values))
+    if not accepted:
+        return []
+
+    user_ids = _insert(User.__table__, [
+        {'name': values['name'], 'username': values['username'], 'email': values['email'],
+         'password': values['password'], 'user_role': 'influencer'}
+        for line, values in accepted])
+    plaintext = [user_id for user_id, (line, values) in zip(user_ids, accepted)
+                 if not passwords.is_hash(values['password'])]
+    passwords.queue_hashing(plaintext)
+    report.hashing += len(plaintext)
+    rows = [{'user_id': user_id, 'category': values['category'], 'niche': values['niche'],
+             'reach': values['reach'], 'reach_count': values['reach_count'],
+             'social_networks': values['social_networks']}
+            for user_id, (line, values) in zip(user_ids, accepted)]
+    for row, influencer_id in zip(rows, _insert(Influencer.__table__, rows)):
+        row['id'] = influencer_id
+
+    connection = db.session.connection()
+    search.inserted(connection, 'influencer', [row['id'] for row in rows])
+    matching.inserted(connection, 'influencer', rows)
+    rollups.inserted(connection, Influencer, rows)
+    return [line for line, values in accepted]
+
+
+def _import_campaigns(batch, report):
+    valid = _validate(batch, _campaign, report)
+    if not valid:
+        return []
+    sponsors = dict(db.session.execute(
+        select(User.username, Sponsor.id).join(Sponsor.user)
+        .where(User.username.in_({values['sponsor'] for line, values in valid}))).all())
+
+    accepted = []
+    for line, values in valid:
+        if values['sponsor'] not in sponsors:
+            report.error(line, f'no sponsor with username {values["sponsor"]!r}')
+        else:
+            accepted.append((line, values))
+    if not accepted:
+        return []
+
+    rows = [{'sponsor_id': sponsors[values['sponsor']], 'title': values['title'],
+             'description': values['description'], 'image': values['image'],
+             'niche': values['niche'], 'budget': values['budget'],
+             'is_public': values['is_public'], 'start_date': values['start_date'],
+             'end_date': values['end_date']}
+            for line, values in accepted]
+    for row, campaign_id in zip(rows, _insert(Campaign.__table__, rows)):
+        row['id'] = campaign_id
+
+    connection = db.session.connection()
+    search.inserted(connection, 'campaign', [row['id'] for row in rows])
+    matching.inserted(connection, 'campaign', rows)
+    rollups.inserted(connection, Campaign, rows)
+    return [line for line, values in accepted]
+
+
+IMPORTERS = {'influencers': _import_influencers, 'campaigns': _import_campaigns}
+
+
+def import_file(kind, stream, file_format, batch_size=BATCH_SIZE):
+    """Import ``kind`` ('influencers' or 'campaigns') from a text stream.
+
+    Returns a Report of the rows read, the rows imported and an error per
+    rejected row.
+    """
+    report = Report()
+    for batch in _batches(read_rows(stream, file_format), batch_size):
+        report.rows += len(batch)
+        hashing = report.hashing
+        try:
+            lines = IMPORTERS[kind](batch, report)
+            db.session.commit()
+        except IntegrityError as e:
+            # Another writer took a username or email since the batch was
+            # checked; nothing of the batch was kept.
+            db.session.rollback()
+            lines = []
+            report.hashing = hashing
+            failed = {line for line, message in report.errors}
+            for line, row in batch:
+                if line not in failed:
+                    report.error(line, f'batch not imported: {e.orig}')
+        report.imported += len(lines)
+    report.errors.sort()
+    return report
+
+
+def init_imports(app):
+    @app.cli.command('bulk-import')
+    @click.argument('kind', type=click.Choice(sorted(IMPORTERS)))
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'file_format', type=click.Choice(sorted(set(FORMATS.values()))),
+                  help='File format; by default taken from the extension.')
+    @click.option('--errors', type=click.File('w'),
+                  help='Write the rejected rows (line, error) to this CSV file.')
+    def bulk_import(kind, path, file_format, errors):
+        """Import influencers or campaigns from a CSV or NDJSON file."""
+        if file_format is None:
+            try:
+                file_format = format_for(path)
+            except ValueError as e:
+                raise click.UsageError(str(e))
+        start = time.perf_counter()
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            report = import_file(kind, f, file_format)
+        click.echo(f'Imported {report.imported} of {report.rows} {kind} in '
+                   f'{time.perf_counter() - start:.1f}s; {len(report.errors)} rows rejected.')
+        if report.hashing:
+            click.echo(f'{report.hashing} plaintext passwords are queued for hashing; '
+                       f'run `flask jobs-worker` to hash them.')
+        if errors:
+            report.write_csv(errors)
+            return
+        for line, message in report.errors[:20]:
+            click.echo(f'  line {line}: {message}')
+        if len(report.errors) > 20:
+            click.echo(f'  ... and {len(report.errors) - 20} more; use --errors to save them all.')
@@ -0,0 +1,209 @@
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import traceback
+from datetime import datetime, timedelta
+import click
+from sqlalchemy import delete, func, select, update
+from models import db, Job
+
+
+# Background jobs. Work that does not have to be finished before the response
+# goes out (rebuilding rollups, writing exports, sending mail) is enqueued as
+# a row of the jobs table, in the same transaction as the change that asked
+# for it, and run by `flask jobs-worker`. A job that raises is retried after
+# JOB_RETRY_DELAY seconds, doubling with every attempt, until its task's
+# max_attempts; then it stays failed with its traceback. Workers claim a job
+# with one UPDATE ... RETURNING (FOR UPDATE SKIP LOCKED on PostgreSQL), so
+# several can run side by side. A job whose worker died is treated as a
+# failed attempt once it has been running for JOB_TIMEOUT seconds, so one
+# that keeps killing its worker does not take down every worker in turn.
+
+log = logging.getLogger('connetify.jobs')
+
+# name -> {'function': ..., 'max_attempts': ...}
+TASKS = {}
+
+
+def task(name, max_attempts=3):
+    """Register a function as the job ``name``; it is called with the payload as keywords."""
+    def decorator(function):
+        TASKS[name] = {'function': function, 'max_attempts': max_attempts}
+        return function
+    return decorator
+
+
+def enqueue(name, run_at=None, delay=None, **payload):
+    """Queue the job ``name``; it is saved when the current transaction commits.
+
+    ``run_at`` (a UTC datetime) or ``delay`` (seconds) schedules it for later.
+    The payload must be JSON-serializable.
+    """
+    if name not in TASKS:
+        raise ValueError(f'Unknown job {name!r}')
+    if run_at is None:
+        run_at = datetime.utcnow() + timedelta(seconds=delay or 0)
+    job = Job(name=name, payload=json.dumps(payload), run_at=run_at,
+              max_attempts=TASKS[name]['max_attempts'])
+    db.session.add(job)
+    return job
+
+
+def claim(worker):
+    """Mark the oldest due job as running for ``worker`` and return it, or None."""
+    now = datetime.utcnow()
+    table = Job.__table__
+    due = (select(table.c.id)
+           .where(table.c.status == 'queued', table.c.run_at <= now)
+           .order_by(table.c.run_at, table.c.id).limit(1)
+           .with_for_update(skip_locked=True).scalar_subquery())
+    job = db.session.execute(
+        update(table).where(table.c.id == due, table.c.status == 'queued')
+        .values(status='running', locked_by=worker, locked_at=now, attempts=table.c.attempts + 1)
+        .returning(table.c.id, table.c.name, table.c.payload, table.c.attempts,
+                   table.c.max_attempts)).first()
+    db.session.commit()
+    return job
+
+
+def _finish(job_id, **values):
+    db.session.execute(update(Job.__table__).where(Job.__table__.c.id == job_id).values(**values))
+    db.session.commit()
+
+
+def _failed(job, error, retry_delay, *where):
+    """Requeue a failed attempt with backoff, or fail the job once its attempts are used up."""
+    table = Job.__table__
+    if job.name in TASKS and job.attempts < job.max_attempts:
+        delay = retry_delay * 2 ** (job.attempts - 1)
+        values = dict(status='queued', locked_by=None, locked_at=None,
+                      run_at=datetime.utcnow() + timedelta(seconds=delay))
+    else:
+        delay = None
+        values = dict(status='failed', locked_by=None, finished_at=datetime.utcnow())
+    done = db.session.execute(update(table).where(table.c.id == job.id, *where)
+                              .values(last_error=error, **values)).rowcount
+    db.session.commit()
+    return done, delay
+
+
+def run(job, retry_delay):
+    """Run a claimed job and record the outcome; returns True if it succeeded."""
+    try:
+        TASKS[job.name]['function'](**json.loads(job.payload))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        done, delay = _failed(job, traceback.format_exc(), retry_delay)
+        if delay is not None:
+            log.warning('job %s (%s) failed, retrying in %ss', job.id, job.name, delay, exc_info=True)
+        else:
+            log.error('job %s (%s) failed for good', job.id, job.name, exc_info=True)
+        return False
+    _finish(job.id, status='done', locked_by=None, finished_at=datetime.utcnow())
+    return True
+
+
+def sweep(timeout, keep_days, retry_delay):
+    """Fail the attempts of jobs whose worker stopped answering and drop old finished ones.
+
+    A stale job counts as a failed attempt, retried with the same backoff as
+    a job that raised, so one that keeps killing its worker ends up failed.
+    """
+    now = datetime.utcnow()
+    table = Job.__table__
+    stale = db.session.execute(
+        select(table.c.id, table.c.name, table.c.attempts, table.c.max_attempts,
+               table.c.locked_by, table.c.locked_at)
+        .where(table.c.status == 'running', table.c.locked_at < now - timedelta(seconds=timeout))
+    ).all()
+    for job in stale:
+        error = f'worker {job.locked_by} stopped answering; running since {job.locked_at}'
+        # Skipped if another worker's sweep or the job itself got there first.
+        done, delay = _failed(job, error, retry_delay, table.c.status == 'running',
+                              table.c.locked_at == job.locked_at)
+        if not done:
+            continue
+        if delay is not None:
+            log.warning('job %s (%s): %s, retrying in %ss', job.id, job.name, error, delay)
+        else:
+            log.error('job %s (%s): %s, failed for good', job.id, job.name, error)
+    db.session.execute(delete(table).where(table.c.status == 'done',
+                                           table.c.finished_at < now - timedelta(days=keep_days)))
+    db.session.commit()
+
+
+def work(config, worker, stop, once=False):
+    """Run jobs until ``stop`` is set (or, with ``once``, until none is due)."""
+    done = failed = 0
+    next_sweep = datetime.utcnow()
+    while not stop.is_set():
+        if datetime.utcnow() >= next_sweep:
+            sweep(config['JOB_TIMEOUT'], config['JOB_KEEP_DAYS'], config['JOB_RETRY_DELAY'])
+            next_sweep = datetime.utcnow() + timedelta(seconds=config['JOB_TIMEOUT'] / 2)
+        job = claim(worker)
+        if job is None:
+            if once:
+                break
+            stop.wait(config['JOB_POLL_INTERVAL'])
+            continue
+        if run(job, config['JOB_RETRY_DELAY']):
+            done += 1
+        else:
+            failed += 1
+        db.session.close()
+    return done, failed
+
+
+def init_jobs(app):
+    @app.cli.command('jobs-worker')
+    @click.option('--once', is_flag=True, help='Exit when no job is due instead of waiting.')
+    def jobs_worker(once):
+        """Run queued background jobs."""
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        stop = threading.Event()
+        # Finish the current job on SIGTERM/Ctrl-C, then exit.
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+        click.echo(f'Worker {worker} running jobs: {", ".join(sorted(TASKS))}')
+        done, failed = work(app.config, worker, stop, once=once)
+        click.echo(f'{done} jobs done, {failed} failed.')
+
+    @app.cli.command('jobs-enqueue')
+    @click.argument('name')
+    @click.option('--delay', type=int, default=0, help='Seconds to wait before running it.')
+    @click.option('--payload', default='{}', help='Keyword arguments for the job, as JSON.')
+    def jobs_enqueue(name, delay, payload):
+        """Queue a background job, e.g. from cron."""
+        try:
+            job = enqueue(name, delay=delay, **json.loads(payload))
+        except ValueError as e:
+            raise click.UsageError(f'{e}; known jobs: {", ".join(sorted(TASKS))}')
+        db.session.commit()
+        click.echo(f'Queued job {job.id} ({name}).')
+
+    @app.cli.command('jobs-status')
+    @click.option('--retry-failed', is_flag=True, help='Queue the failed jobs again.')
+    def jobs_status(retry_failed):
+        """Show the number of jobs in each state and the latest failures."""
+        table = Job.__table__
+        if retry_failed:
+            count = db.session.execute(
+                update(table).where(table.c.status == 'failed')
+                .values(status='queued', attempts=0, run_at=datetime.utcnow(),
+                        finished_at=None)).rowcount
+            db.session.commit()
+            click.echo(f'Queued {count} failed jobs again.')
+        counts = db.session.execute(select(table.c.status, func.count()).group_by(table.c.status))
+        for status, count in sorted(counts):
+            click.echo(f'{status:8} {count}')
+        failures = db.session.execute(
+            select(table.c.id, table.c.name, table.c.finished_at, table.c.last_error)
+            .where(table.c.status == 'failed').order_by(table.c.finished_at.desc()).limit(5))
+        for job in failures:
+            error = (job.last_error or '').strip().splitlines()
+            click.echo(f'failed job {job.id} ({job.name}) at {job.finished_at}: '
+                       f'{error[-1] if error else ""}')
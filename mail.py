@@ -0,0 +1,24 @@
+from flask_mail import Mail, Message
+import jobs
+
+
+# Outgoing mail. Views never talk to the mail server themselves: they queue a
+# send-email job, which `flask jobs-worker` delivers once the view's
+# transaction has committed. A slow or unreachable SMTP server therefore
+# delays the mail, never a response, and a failed delivery is retried.
+
+mail = Mail()
+
+
+@jobs.task('send-email', max_attempts=5)
+def _deliver(recipients, subject, body):
+    mail.send(Message(subject, recipients=recipients, body=body))
+
+
+def send_email(recipients, subject, body):
+    """Queue a plain-text email to the ``recipients`` addresses."""
+    return jobs.enqueue('send-email', recipients=list(recipients), subject=subject, body=body)
+
+
+def init_mail(app):
+    mail.init_app(app)
@@ -0,0 +1,398 @@
+import math
+import re
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from sqlalchemy import and_, delete, event, inspect, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from models import (db, Influencer, Campaign, AdRequest, InfluencerRollup, MatchTerm,
+                    CampaignMatch, InfluencerFeed)
+from pagination import paginate
+import queries
+
+
+# Influencer suggestions for a campaign. Every influencer's niche and category
+# words are kept in an inverted index (match_terms) whose posting lists are
+# ordered by reach, so candidates for a campaign are read from the index
+# instead of scanning the influencers table. Candidates are scored on niche
+# and category overlap, reach and past acceptance rate, and the top list is
+# cached per campaign in campaign_matches. The index and the cache are kept
+# in sync from the same flush that changes a campaign or an influencer.
+#
+# The same index drives the other direction: each influencer gets a feed of
+# recommended public campaigns, cached in influencer_feeds and served with
+# keyset pagination.
+
+FIELDS = {'influencer': ('niche', 'category'), 'campaign': ('niche',)}
+
+# Columns that change what a campaign or influencer matches; edits to other
+# columns leave the index and cache alone.
+TRACKED = {
+    Influencer: ('niche', 'category', 'reach_count', 'is_flagged'),
+    Campaign: ('niche', 'budget', 'is_public', 'is_flagged', 'end_date'),
+}
+
+NICHE_WEIGHT = 3.0
+CATEGORY_WEIGHT = 2.0
+REACH_WEIGHT = 1.5
+ACCEPTANCE_WEIGHT = 2.0
+
+# Acceptance rate is smoothed towards PRIOR so an influencer with one accepted
+# request does not outrank one with forty accepted out of fifty.
+ACCEPTANCE_PRIOR = 0.5
+ACCEPTANCE_SMOOTHING = 5
+
+# Reach of 100M or more gets the full reach score.
+REACH_CEILING = 8
+
+FEED_NICHE_WEIGHT = 3.0
+FEED_CATEGORY_WEIGHT = 2.0
+FEED_BUDGET_WEIGHT = 1.5
+FEED_RUNWAY_WEIGHT = 1.0
+
+# A budget of 1M or more gets the full budget score, and a campaign with this
+# many days left (or more) the full runway score.
+BUDGET_CEILING = 6
+RUNWAY_DAYS = 90
+
+
+def terms(text):
+    return sorted({word[:50] for word in re.findall(r'\w+', (text or '').lower()) if len(word) > 1})
+
+
+def _kind(obj):
+    if isinstance(obj, Influencer):
+        return 'influencer'
+    if isinstance(obj, Campaign):
+        return 'campaign'
+
+
+def _postings(kind, entity_id, values, weight=0):
+    return [{'kind': kind, 'entity_id': entity_id, 'field': field, 'term': term,
+             'weight': weight or 0}
+            for field in FIELDS[kind] for term in terms(values[field])]
+
+
+def _object_postings(obj):
+    kind = _kind(obj)
+    values = {field: getattr(obj, field) for field in FIELDS[kind]}
+    # Forms assign the budget as the string typed in, such as '1500.50'.
+    weight = obj.reach_count if kind == 'influencer' else int(float(obj.budget or 0))
+    return _postings(kind, obj.id, values, weight)
+
+
+def _changed(obj):
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in TRACKED[type(obj)])
+
+
+def _invalidate(connection, campaign_ids=(), influencer_ids=(), influencer_terms=()):
+    table = CampaignMatch.__table__
+    stale = set(campaign_ids)
+    if influencer_ids:
+        stale.update(connection.scalars(
+            select(table.c.campaign_id).where(table.c.influencer_id.in_(list(influencer_ids)))))
+    if influencer_terms:
+        # An influencer that now shares a word with a campaign may belong in
+        # its list even if it was not there before.
+        stale.update(connection.scalars(
+            select(MatchTerm.entity_id)
+            .where(MatchTerm.kind == 'campaign', MatchTerm.field == 'niche',
+                   MatchTerm.term.in_(sorted(influencer_terms)))))
+    if stale:
+        connection.execute(delete(table).where(table.c.campaign_id.in_(sorted(stale))))
+
+
+def _invalidate_feeds(connection, influencer_ids=(), campaign_ids=(), campaign_terms=()):
+    table = InfluencerFeed.__table__
+    if influencer_ids:
+        connection.execute(delete(table).where(table.c.influencer_id.in_(sorted(influencer_ids))))
+    if campaign_ids:
+        connection.execute(delete(table).where(table.c.influencer_id.in_(
+            select(table.c.influencer_id).where(table.c.campaign_id.in_(sorted(campaign_ids)))
+            .scalar_subquery())))
+    if campaign_terms:
+        # A new or changed campaign belongs in the feed of every influencer
+        # sharing one of its niche words.
+        connection.execute(delete(table).where(table.c.influencer_id.in_(
+            select(MatchTerm.entity_id)
+            .where(MatchTerm.kind == 'influencer', MatchTerm.field.in_(FIELDS['influencer']),
+                   MatchTerm.term.in_(sorted(campaign_terms)))
+            .scalar_subquery())))
+
+
+@event.listens_for(db.session, 'after_flush')
+def _sync_matches(session, flush_context):
+    changed = []
+    removed = {kind: set() for kind in FIELDS}
+    with session.no_autoflush:
+        for obj in session.new:
+            if _kind(obj):
+                changed.append(obj)
+        for obj in session.dirty:
+            if _kind(obj) and session.is_modified(obj) and _changed(obj):
+                changed.append(obj)
+        for obj in session.deleted:
+            if _kind(obj):
+                removed[_kind(obj)].add(obj.id)
+        postings = [row for obj in changed for row in _object_postings(obj)]
+    if not changed and not any(removed.values()):
+        return
+
+    connection = session.connection()
+    ids = {kind: set(removed[kind]) for kind in FIELDS}
+    for obj in changed:
+        ids[_kind(obj)].add(obj.id)
+    for kind, entity_ids in ids.items():
+        if entity_ids:
+            connection.execute(delete(MatchTerm).where(
+                MatchTerm.kind == kind, MatchTerm.entity_id.in_(sorted(entity_ids))))
+    if postings:
+        connection.execute(MatchTerm.__table__.insert(), postings)
+
+    _invalidate(connection, campaign_ids=ids['campaign'], influencer_ids=ids['influencer'],
+                influencer_terms={row['term'] for row in postings if row['kind'] == 'influencer'})
+    _invalidate_feeds(connection, influencer_ids=ids['influencer'], campaign_ids=ids['campaign'],
+                      campaign_terms={row['term'] for row in postings if row['kind'] == 'campaign'})
+
+
+def score(words, niche, category, reach_count, accepted, rejected):
+    """Score one influencer against a campaign's niche ``words`` (a set)."""
+    niche_overlap = len(words & set(terms(niche))) / len(words)
+    category_overlap = len(words & set(terms(category))) / len(words)
+    reach = min(1.0, math.log10((reach_count or 0) + 1) / REACH_CEILING)
+    acceptance = ((accepted + ACCEPTANCE_PRIOR * ACCEPTANCE_SMOOTHING)
+                  / (accepted + rejected + ACCEPTANCE_SMOOTHING))
+    return (NICHE_WEIGHT * niche_overlap + CATEGORY_WEIGHT * category_overlap
+            + REACH_WEIGHT * reach + ACCEPTANCE_WEIGHT * acceptance)
+
+
+def rank(campaign, limit):
+    """Score the influencers sharing a niche word with ``campaign``.
+
+    Only the ``MATCH_CANDIDATES`` biggest-reach influencers of each posting
+    list are scored, which bounds the work however many influencers share a
+    common word. Returns up to ``limit`` (influencer_id, score) pairs.
+    """
+    words = set(terms(campaign.niche))
+    if not words:
+        return []
+    per_list = current_app.config.get('MATCH_CANDIDATES', 1000)
+
+    candidates = set()
+    for field in FIELDS['influencer']:
+        for word in words:
+            candidates.update(db.session.scalars(
+                select(MatchTerm.entity_id)
+                .where(MatchTerm.kind == 'influencer', MatchTerm.field == field,
+                       MatchTerm.term == word)
+                .order_by(MatchTerm.weight.desc()).limit(per_list)))
+    if not candidates:
+        return []
+
+    rows = db.session.execute(
+        select(Influencer.id, Influencer.niche, Influencer.category, Influencer.reach_count,
+               InfluencerRollup.accepted, InfluencerRollup.completed, InfluencerRollup.rejected)
+        .outerjoin(InfluencerRollup, InfluencerRollup.influencer_id == Influencer.id)
+        .where(Influencer.id.in_(sorted(candidates)), Influencer.is_flagged.isnot(True))
+    ).all()
+    scored = [
+        (row.id, score(words, row.niche, row.category, row.reach_count,
+                       (row.accepted or 0) + (row.completed or 0), row.rejected or 0))
+        for row in rows
+    ]
+    scored.sort(key=lambda pair: (-pair[1], pair[0]))
+    return scored[:limit]
+
+
+def _cached(campaign_id):
+    ttl = timedelta(seconds=current_app.config.get('MATCH_CACHE_TTL', 3600))
+    rows = db.session.execute(
+        select(CampaignMatch.influencer_id, CampaignMatch.score, CampaignMatch.computed_at)
+        .where(CampaignMatch.campaign_id == campaign_id).order_by(CampaignMatch.position)
+    ).all()
+    if rows and rows[0].computed_at > datetime.utcnow() - ttl:
+        return [(row.influencer_id, row.score) for row in rows]
+
+
+def _store(campaign_id, ranked):
+    # On a connection of its own, so that filling the cache from a GET
+    # neither commits nor rolls back the request's session.
+    table = CampaignMatch.__table__
+    now = datetime.utcnow()
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(delete(table).where(table.c.campaign_id == campaign_id))
+            if ranked:
+                connection.execute(table.insert(), [
+                    {'campaign_id': campaign_id, 'position': position,
+                     'influencer_id': influencer_id, 'score': value, 'computed_at': now}
+                    for position, (influencer_id, value) in enumerate(ranked)])
+    except (IntegrityError, OperationalError):
+        # Another request filled the cache first (its list is just as good),
+        # or is writing and holds the lock; this list is served uncached.
+        pass
+
+
+def top_matches(campaign):
+    """Return the best ``MATCH_LIMIT`` (influencer, score) pairs for ``campaign``."""
+    limit = current_app.config.get('MATCH_LIMIT', 50)
+    ranked = _cached(campaign.id)
+    if ranked is None:
+        ranked = rank(campaign, limit)
+        _store(campaign.id, ranked)
+    ranked = ranked[:limit]
+    if not ranked:
+        return []
+
+    influencers = {i.id: i for i in queries.influencers_with_user()
+                   .filter(Influencer.id.in_([i for i, _ in ranked]))}
+    return [(influencers[i], value) for i, value in ranked if i in influencers]
+
+
+def _eligible(now):
+    return and_(Campaign.is_public == True, Campaign.is_flagged.isnot(True),
+                Campaign.end_date >= now)
+
+
+def campaign_score(words, campaign_niche, budget, end_date, now):
+    """Score one campaign for an influencer whose words are ``words``.
+
+    ``words`` maps each of the influencer's words to the field it came from.
+    """
+    niche_words = set(terms(campaign_niche))
+    if not niche_words:
+        return 0.0
+    niche = sum(1 for word in niche_words if words.get(word) == 'niche') / len(niche_words)
+    category = sum(1 for word in niche_words if words.get(word) == 'category') / len(niche_words)
+    budget = min(1.0, math.log10((budget or 0) + 1) / BUDGET_CEILING)
+    runway = min(1.0, max(0.0, (end_date - now).days / RUNWAY_DAYS))
+    return (FEED_NICHE_WEIGHT * niche + FEED_CATEGORY_WEIGHT * category
+            + FEED_BUDGET_WEIGHT * budget + FEED_RUNWAY_WEIGHT * runway)
+
+
+def recommend(influencer, limit):
+    """Score the open campaigns sharing a word with ``influencer``.
+
+    Reads the ``FEED_CANDIDATES`` biggest-budget campaigns of each of the
+    influencer's posting lists. Returns up to ``limit`` (campaign_id, score)
+    pairs, best first.
+    """
+    words = {}
+    for field in reversed(FIELDS['influencer']):
+        words.update((word, field) for word in terms(getattr(influencer, field)))
+    if not words:
+        return []
+    per_list = current_app.config.get('FEED_CANDIDATES', 1000)
+    now = datetime.utcnow()
+
+    candidates = set()
+    for word in words:
+        candidates.update(db.session.scalars(
+            select(MatchTerm.entity_id)
+            .where(MatchTerm.kind == 'campaign', MatchTerm.field == 'niche', MatchTerm.term == word)
+            .order_by(MatchTerm.weight.desc()).limit(per_list)))
+    if not candidates:
+        return []
+
+    rows = db.session.execute(
+        select(Campaign.id, Campaign.niche, Campaign.budget, Campaign.end_date)
+        .where(Campaign.id.in_(sorted(candidates)), _eligible(now))
+    ).all()
+    scored = [(row.id, campaign_score(words, row.niche, row.budget, row.end_date, now))
+              for row in rows]
+    scored.sort(key=lambda pair: (-pair[1], pair[0]))
+    return scored[:limit]
+
+
+def _feed_computed_at(influencer_id):
+    return db.session.scalar(
+        select(InfluencerFeed.computed_at).where(InfluencerFeed.influencer_id == influencer_id)
+        .order_by(InfluencerFeed.position).limit(1))
+
+
+def _store_feed(influencer_id, ranked):
+    # Like _store(), away from the request's session.
+    table = InfluencerFeed.__table__
+    now = datetime.utcnow()
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(delete(table).where(table.c.influencer_id == influencer_id))
+            if ranked:
+                connection.execute(table.insert(), [
+                    {'influencer_id': influencer_id, 'position': position,
+                     'campaign_id': campaign_id, 'score': value, 'computed_at': now}
+                    for position, (campaign_id, value) in enumerate(ranked)])
+    except (IntegrityError, OperationalError):
+        pass
+
+
+def recommended_campaigns(influencer, param='recommended'):
+    """One page of ``influencer``'s recommended campaigns, best first.
+
+    Campaigns the influencer already has an ad request for are dropped with
+    an anti-join when the page is read, so the cached feed does not need to
+    change when a request is made.
+    """
+    ttl = timedelta(seconds=current_app.config.get('FEED_CACHE_TTL', 3600))
+    computed_at = _feed_computed_at(influencer.id)
+    if computed_at is None or computed_at <= datetime.utcnow() - ttl:
+        ranked = recommend(influencer, current_app.config.get('FEED_SIZE', 200))
+        if ranked or computed_at is not None:
+            _store_feed(influencer.id, ranked)
+
+    requested = (select(AdRequest.id)
+                 .where(AdRequest.campaign_id == Campaign.id,
+                        AdRequest.influencer_id == influencer.id))
+    query = (Campaign.query
+             .join(InfluencerFeed, InfluencerFeed.campaign_id == Campaign.id)
+             .filter(InfluencerFeed.influencer_id == influencer.id,
+                     _eligible(datetime.utcnow()), ~requested.exists()))
+    return paginate(query, InfluencerFeed.position, param=param)
+
+
+def inserted(connection, kind, rows):
+    """Index rows inserted through Core, which the flush hook does not see.
+
+    ``rows`` are dicts with the entity's id and FIELDS, and its reach_count
+    (influencers) or budget (campaigns).
+    """
+    postings = [posting for row in rows for posting in _postings(
+        kind, row['id'], row,
+        row['reach_count'] if kind == 'influencer' else int(float(row['budget'] or 0)))]
+    if not postings:
+        return
+    connection.execute(MatchTerm.__table__.insert(), postings)
+    words = {posting['term'] for posting in postings}
+    if kind == 'influencer':
+        _invalidate(connection, influencer_terms=words)
+    else:
+        _invalidate_feeds(connection, campaign_terms=words)
+
+
+def rebuild(connection, batch_size=5000):
+    connection.execute(delete(InfluencerFeed))
+    connection.execute(delete(CampaignMatch))
+    connection.execute(delete(MatchTerm))
+    sources = [
+        ('influencer', select(Influencer.id, Influencer.niche, Influencer.category,
+                              Influencer.reach_count)),
+        ('campaign', select(Campaign.id, Campaign.niche, Campaign.budget)),
+    ]
+    for kind, statement in sources:
+        result = connection.execution_options(yield_per=batch_size).execute(statement)
+        for rows in result.partitions():
+            postings = [p for row in rows
+                        for p in _postings(kind, row.id, row._mapping,
+                                           int(row[-1] or 0) if kind == 'campaign' else row[-1])]
+            if postings:
+                connection.execute(MatchTerm.__table__.insert(), postings)
+
+
+def init_matching(app):
+    @app.cli.command('matches-rebuild')
+    def matches_rebuild():
+        """Rebuild the matchmaking index and clear the cached lists and feeds."""
+        with db.engine.begin() as connection:
+            rebuild(connection)
+        click.echo('Match index rebuilt.')
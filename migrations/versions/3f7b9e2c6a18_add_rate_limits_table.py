@@ -0,0 +1,35 @@
+"""Add rate_limits table for shared token buckets
+
+Revision ID: 3f7b9e2c6a18
+Revises: 6c0e8f3a2d45
+Create Date: 2026-10-18 20:12:09.734106
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f7b9e2c6a18'
+down_revision = '6c0e8f3a2d45'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rate_limits',
+    sa.Column('key', sa.String(length=200), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('available', sa.Float(), nullable=False),
+    sa.Column('updated', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    with op.batch_alter_table('rate_limits', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_rate_limits_updated'), ['updated'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('rate_limits', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_rate_limits_updated'))
+
+    op.drop_table('rate_limits')
@@ -0,0 +1,54 @@
+"""Add numeric influencer reach_count
+
+Revision ID: 4a9e6c1d8b27
+Revises: d27c9f4e1b85
+Create Date: 2026-10-18 14:12:40.318206
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a9e6c1d8b27'
+down_revision = 'd27c9f4e1b85'
+branch_labels = None
+depends_on = None
+
+SUFFIXES = {'K': 1_000, 'M': 1_000_000, 'B': 1_000_000_000}
+
+
+def _parse_reach(value):
+    # Frozen copy of models.parse_reach; values it cannot read become 0.
+    text = str(value or '').strip().upper().replace(',', '')
+    multiplier = 1
+    if text and text[-1] in SUFFIXES:
+        multiplier = SUFFIXES[text[-1]]
+        text = text[:-1]
+    try:
+        return max(0, int(float(text) * multiplier))
+    except (ValueError, OverflowError):
+        return 0
+
+
+def upgrade():
+    with op.batch_alter_table('influencers', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('reach_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.create_index(batch_op.f('ix_influencers_reach_count'), ['reach_count'], unique=False)
+
+    connection = op.get_bind()
+    influencers = sa.table('influencers', sa.column('id'), sa.column('reach'), sa.column('reach_count'))
+    rows = connection.execute(sa.select(influencers.c.id, influencers.c.reach)).all()
+    updates = [{'row_id': row.id, 'count': _parse_reach(row.reach)} for row in rows]
+    if updates:
+        connection.execute(
+            influencers.update().where(influencers.c.id == sa.bindparam('row_id'))
+            .values(reach_count=sa.bindparam('count')),
+            updates,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('influencers', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_influencers_reach_count'))
+        batch_op.drop_column('reach_count')
@@ -0,0 +1,46 @@
+"""Add full-text search index
+
+Revision ID: 5b1f0c2e7a91
+Revises: c3dad1e5a3ce
+Create Date: 2026-10-18 09:12:04.118265
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1f0c2e7a91'
+down_revision = 'c3dad1e5a3ce'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+        "kind, entity_id UNINDEXED, title, description, niche, "
+        "category, industry, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    op.execute(
+        "INSERT INTO search_index (rowid, kind, entity_id, title, description, niche, category, industry) "
+        "SELECT id * 4 + 1, 'campaign', id, title, description, niche, '', '' FROM campaign"
+    )
+    op.execute(
+        "INSERT INTO search_index (rowid, kind, entity_id, title, description, niche, category, industry) "
+        "SELECT i.id * 4 + 2, 'influencer', i.id, u.name, '', i.niche, i.category, '' "
+        "FROM influencers i JOIN users u ON u.id = i.user_id"
+    )
+    op.execute(
+        "INSERT INTO search_index (rowid, kind, entity_id, title, description, niche, category, industry) "
+        "SELECT s.id * 4 + 3, 'sponsor', s.id, u.name, '', '', '', s.industry "
+        "FROM sponsors s JOIN users u ON u.id = s.user_id"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TABLE IF EXISTS search_index")
@@ -0,0 +1,28 @@
+"""Add claimed_by and claimed_at to notifications for digest claims
+
+Revision ID: 7a3c5e9d1f62
+Revises: 3f7b9e2c6a18
+Create Date: 2026-10-18 22:41:53.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3c5e9d1f62'
+down_revision = '3f7b9e2c6a18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('claimed_by', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_column('claimed_at')
+        batch_op.drop_column('claimed_by')
@@ -0,0 +1,110 @@
+"""Add stats rollup tables
+
+Revision ID: 8e4d2a6b3c10
+Revises: 5b1f0c2e7a91
+Create Date: 2026-10-18 11:40:52.630114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4d2a6b3c10'
+down_revision = '5b1f0c2e7a91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stats_rollup',
+    sa.Column('key', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_table('sponsor_rollup',
+    sa.Column('sponsor_id', sa.Integer(), nullable=False),
+    sa.Column('campaigns', sa.Integer(), nullable=False),
+    sa.Column('budget_total', sa.Float(), nullable=False),
+    sa.Column('influencers', sa.Integer(), nullable=False),
+    sa.Column('adrequests', sa.Integer(), nullable=False),
+    sa.Column('accepted', sa.Integer(), nullable=False),
+    sa.Column('pending', sa.Integer(), nullable=False),
+    sa.Column('rejected', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['sponsor_id'], ['sponsors.id'], ),
+    sa.PrimaryKeyConstraint('sponsor_id')
+    )
+    with op.batch_alter_table('sponsor_rollup', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_sponsor_rollup_budget_total'), ['budget_total'], unique=False)
+
+    op.create_table('influencer_rollup',
+    sa.Column('influencer_id', sa.Integer(), nullable=False),
+    sa.Column('adrequests', sa.Integer(), nullable=False),
+    sa.Column('accepted', sa.Integer(), nullable=False),
+    sa.Column('pending', sa.Integer(), nullable=False),
+    sa.Column('rejected', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.Column('earnings', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['influencer_id'], ['influencers.id'], ),
+    sa.PrimaryKeyConstraint('influencer_id')
+    )
+    op.create_table('sponsor_influencer_rollup',
+    sa.Column('sponsor_id', sa.Integer(), nullable=False),
+    sa.Column('influencer_id', sa.Integer(), nullable=False),
+    sa.Column('adrequests', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['influencer_id'], ['influencers.id'], ),
+    sa.ForeignKeyConstraint(['sponsor_id'], ['sponsors.id'], ),
+    sa.PrimaryKeyConstraint('sponsor_id', 'influencer_id')
+    )
+
+    # Backfill from the existing rows, mirroring rollups.rebuild().
+    op.execute(
+        "INSERT INTO stats_rollup (key, value) "
+        "SELECT 'influencers', COUNT(*) FROM influencers "
+        "UNION ALL SELECT 'sponsors', COUNT(*) FROM sponsors "
+        "UNION ALL SELECT 'campaigns_public', COUNT(*) FROM campaign WHERE is_public "
+        "UNION ALL SELECT 'campaigns_private', COUNT(*) FROM campaign WHERE NOT is_public "
+        "UNION ALL SELECT 'adrequests', COUNT(*) FROM ad_request "
+        "UNION ALL SELECT 'adrequests_' || status, COUNT(*) FROM ad_request GROUP BY status"
+    )
+    op.execute(
+        "INSERT INTO sponsor_influencer_rollup (sponsor_id, influencer_id, adrequests) "
+        "SELECT sponsor_id, influencer_id, COUNT(*) FROM ad_request "
+        "WHERE influencer_id IS NOT NULL GROUP BY sponsor_id, influencer_id"
+    )
+    op.execute(
+        "INSERT INTO influencer_rollup "
+        "(influencer_id, adrequests, accepted, pending, rejected, completed, earnings) "
+        "SELECT influencer_id, COUNT(*), "
+        "SUM(CASE WHEN status = 'accepted' THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN status = 'rejected' THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN status = 'accepted' THEN payment ELSE 0 END) "
+        "FROM ad_request WHERE influencer_id IS NOT NULL GROUP BY influencer_id"
+    )
+    op.execute(
+        "INSERT INTO sponsor_rollup "
+        "(sponsor_id, campaigns, budget_total, influencers, adrequests, accepted, pending, rejected, completed) "
+        "SELECT s.id, "
+        "(SELECT COUNT(*) FROM campaign c WHERE c.sponsor_id = s.id), "
+        "(SELECT COALESCE(SUM(c.budget), 0) FROM campaign c WHERE c.sponsor_id = s.id), "
+        "(SELECT COUNT(*) FROM sponsor_influencer_rollup p WHERE p.sponsor_id = s.id), "
+        "(SELECT COUNT(*) FROM ad_request a WHERE a.sponsor_id = s.id), "
+        "(SELECT COUNT(*) FROM ad_request a WHERE a.sponsor_id = s.id AND a.status = 'accepted'), "
+        "(SELECT COUNT(*) FROM ad_request a WHERE a.sponsor_id = s.id AND a.status = 'pending'), "
+        "(SELECT COUNT(*) FROM ad_request a WHERE a.sponsor_id = s.id AND a.status = 'rejected'), "
+        "(SELECT COUNT(*) FROM ad_request a WHERE a.sponsor_id = s.id AND a.status = 'completed') "
+        "FROM sponsors s"
+    )
+
+
+def downgrade():
+    op.drop_table('sponsor_influencer_rollup')
+    op.drop_table('influencer_rollup')
+    with op.batch_alter_table('sponsor_rollup', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_sponsor_rollup_budget_total'))
+
+    op.drop_table('sponsor_rollup')
+    op.drop_table('stats_rollup')
@@ -0,0 +1,47 @@
+"""Add updated_at columns for conditional GETs
+
+Revision ID: a7d2f5c8e913
+Revises: e3a58d0f7b14
+Create Date: 2026-10-18 17:12:05.431027
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d2f5c8e913'
+down_revision = 'e3a58d0f7b14'
+branch_labels = None
+depends_on = None
+
+# table -> (column to backfill updated_at from, whether it is indexed)
+TABLES = {
+    'users': ('created_at', True),
+    'sponsors': (None, False),
+    'influencers': ('created_at', True),
+    'campaign': (None, True),
+    'ad_request': ('created_at', False),
+    'stats_rollup': (None, True),
+    'sponsor_rollup': (None, True),
+    'influencer_rollup': (None, False),
+}
+
+
+def upgrade():
+    for table, (source, indexed) in TABLES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+            if indexed:
+                batch_op.create_index(batch_op.f(f'ix_{table}_updated_at'), ['updated_at'],
+                                      unique=False)
+        backfill = f'COALESCE({source}, CURRENT_TIMESTAMP)' if source else 'CURRENT_TIMESTAMP'
+        op.execute(f'UPDATE {table} SET updated_at = {backfill}')
+
+
+def downgrade():
+    for table, (source, indexed) in reversed(TABLES.items()):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            if indexed:
+                batch_op.drop_index(batch_op.f(f'ix_{table}_updated_at'))
+            batch_op.drop_column('updated_at')
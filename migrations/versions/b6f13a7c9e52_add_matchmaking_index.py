@@ -0,0 +1,76 @@
+"""Add matchmaking index and cached campaign matches
+
+Revision ID: b6f13a7c9e52
+Revises: 4a9e6c1d8b27
+Create Date: 2026-10-18 15:02:11.540377
+
+"""
+import re
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6f13a7c9e52'
+down_revision = '4a9e6c1d8b27'
+branch_labels = None
+depends_on = None
+
+
+def _terms(text):
+    # Frozen copy of matching.terms.
+    return sorted({word[:50] for word in re.findall(r'\w+', (text or '').lower()) if len(word) > 1})
+
+
+def upgrade():
+    op.create_table('match_terms',
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('field', sa.String(length=20), nullable=False),
+    sa.Column('term', sa.String(length=50), nullable=False),
+    sa.Column('weight', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'entity_id', 'field', 'term')
+    )
+    with op.batch_alter_table('match_terms', schema=None) as batch_op:
+        batch_op.create_index('ix_match_terms_posting', ['kind', 'field', 'term', 'weight'], unique=False)
+
+    op.create_table('campaign_matches',
+    sa.Column('campaign_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('influencer_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaign.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['influencer_id'], ['influencers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('campaign_id', 'position')
+    )
+    with op.batch_alter_table('campaign_matches', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_campaign_matches_influencer_id'), ['influencer_id'], unique=False)
+
+    # Backfill the index, mirroring matching.rebuild(). The match lists fill
+    # in lazily the first time each campaign is viewed.
+    connection = op.get_bind()
+    postings = []
+    for row in connection.execute(sa.text(
+            "SELECT id, niche, category, reach_count FROM influencers")):
+        for field, value in (('niche', row.niche), ('category', row.category)):
+            postings += [{'kind': 'influencer', 'entity_id': row.id, 'field': field,
+                          'term': term, 'weight': row.reach_count or 0} for term in _terms(value)]
+    for row in connection.execute(sa.text("SELECT id, niche FROM campaign")):
+        postings += [{'kind': 'campaign', 'entity_id': row.id, 'field': 'niche',
+                      'term': term, 'weight': 0} for term in _terms(row.niche)]
+    if postings:
+        match_terms = sa.table('match_terms', sa.column('kind'), sa.column('entity_id'),
+                               sa.column('field'), sa.column('term'), sa.column('weight'))
+        connection.execute(match_terms.insert(), postings)
+
+
+def downgrade():
+    with op.batch_alter_table('campaign_matches', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_campaign_matches_influencer_id'))
+
+    op.drop_table('campaign_matches')
+    with op.batch_alter_table('match_terms', schema=None) as batch_op:
+        batch_op.drop_index('ix_match_terms_posting')
+
+    op.drop_table('match_terms')
@@ -0,0 +1,46 @@
+"""Add cached influencer campaign feeds
+
+Revision ID: e3a58d0f7b14
+Revises: b6f13a7c9e52
+Create Date: 2026-10-18 16:20:48.117903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a58d0f7b14'
+down_revision = 'b6f13a7c9e52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('influencer_feeds',
+    sa.Column('influencer_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('campaign_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaign.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['influencer_id'], ['influencers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('influencer_id', 'position')
+    )
+    with op.batch_alter_table('influencer_feeds', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_influencer_feeds_campaign_id'), ['campaign_id'], unique=False)
+
+    # Campaign postings are now ordered by budget.
+    op.execute(
+        "UPDATE match_terms SET weight = "
+        "(SELECT CAST(budget AS INTEGER) FROM campaign WHERE campaign.id = match_terms.entity_id) "
+        "WHERE kind = 'campaign'"
+    )
+
+
+def downgrade():
+    op.execute("UPDATE match_terms SET weight = 0 WHERE kind = 'campaign'")
+    with op.batch_alter_table('influencer_feeds', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_influencer_feeds_campaign_id'))
+
+    op.drop_table('influencer_feeds')
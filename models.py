@@ -0,0 +1,278 @@
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import validates
+from datetime import datetime
+
+db = SQLAlchemy()
+
+
+class User(db.Model):
+    __tablename__ = 'users'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name = db.Column(db.String(100), nullable=False)
+    username = db.Column(db.String, unique=True, nullable=False)
+    email = db.Column(db.String, unique=True, nullable=False)
+    password = db.Column(db.String, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    user_role = db.Column(db.String(50), nullable=False)
+    
+
+    sponsor = db.relationship('Sponsor', back_populates='user', uselist=False)
+    influencer = db.relationship('Influencer', back_populates='user', uselist=False)
+
+    def __repr__(self):
+        return f'<User {self.username}>'
+
+class Sponsor(db.Model):
+    __tablename__ = 'sponsors'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    industry = db.Column(db.String, nullable=False)
+    is_flagged = db.Column(db.Boolean, default=False, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    user = db.relationship('User', back_populates='sponsor')
+    ad_requests = db.relationship('AdRequest', backref='sponsor', lazy=True)
+    
+    def __repr__(self):
+        return f'<Sponsor {self.user.username}>'
+
+REACH_SUFFIXES = {'K': 1_000, 'M': 1_000_000, 'B': 1_000_000_000}
+
+
+def parse_reach(value):
+    """Turn a reach like ``"12,000"``, ``"15K"`` or ``"1.5M"`` into an int."""
+    text = str(value).strip().upper().replace(',', '')
+    multiplier = 1
+    if text and text[-1] in REACH_SUFFIXES:
+        multiplier = REACH_SUFFIXES[text[-1]]
+        text = text[:-1]
+    try:
+        count = int(float(text) * multiplier)
+    except OverflowError:
+        raise ValueError(f'Invalid reach: {value!r}')
+    if count < 0:
+        raise ValueError(f'Invalid reach: {value!r}')
+    return count
+
+
+class Influencer(db.Model):
+    __tablename__ = 'influencers'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    profile_pic = db.Column(db.String(100), default='default_profile_pic.jpg')
+    category = db.Column(db.String(100), nullable=False)  
+    niche = db.Column(db.String(100), nullable=False) 
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    social_networks = db.Column(db.String, nullable=True)
+    reach = db.Column(db.String(100), nullable=False)
+    reach_count = db.Column(db.Integer, nullable=False, default=0, index=True)
+    is_flagged = db.Column(db.Boolean, default=False, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    ad_requests = db.relationship('AdRequest', backref='influencer', lazy=True)
+    
+    user = db.relationship('User', back_populates='influencer')
+    campaigns = db.relationship('Campaign', back_populates='influencer')
+
+    @validates('reach')
+    def validate_reach(self, key, value):
+        self.reach_count = parse_reach(value)
+        return value
+    
+    def __repr__(self):
+        return f'<Influencer {self.user.username}>'
+    
+class Campaign(db.Model):
+    __table_args__ = (
+        db.Index('ix_campaign_sponsor_id_budget', 'sponsor_id', 'budget'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    image = db.Column(db.String(200), nullable=True)
+    niche = db.Column(db.String(50), nullable=False)
+    budget = db.Column(db.Float, nullable=False)  
+    is_public = db.Column(db.Boolean, nullable=False, default=True, index=True)
+    start_date = db.Column(db.DateTime, nullable=False)
+    end_date = db.Column(db.DateTime, nullable=False)
+    is_flagged = db.Column(db.Boolean, default=False, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    influencer_id = db.Column(db.Integer, db.ForeignKey('influencers.id'))
+    influencer = db.relationship('Influencer', back_populates='campaigns')
+    sponsor_id = db.Column(db.Integer, db.ForeignKey('sponsors.id'), nullable=False)
+    
+    ad_requests = db.relationship('AdRequest', back_populates='campaign', cascade='all, delete-orphan')
+    sponsor = db.relationship('Sponsor', backref='campaigns')
+
+    def __repr__(self):
+        return f'<Campaign {self.title}>'
+    
+class AdRequest(db.Model):
+    # Matched to the lookups in the views: an influencer's or sponsor's requests
+    # by status (and who created them), a campaign's requests newest first, and
+    # the admin listings ordered by creation time.
+    __table_args__ = (
+        db.Index('ix_ad_request_influencer_id_status', 'influencer_id', 'status', 'created_by'),
+        db.Index('ix_ad_request_sponsor_id_status', 'sponsor_id', 'status', 'created_by'),
+        db.Index('ix_ad_request_campaign_id_created_at', 'campaign_id', 'created_at'),
+        db.Index('ix_ad_request_status_created_at', 'status', 'created_at'),
+        db.Index('ix_ad_request_created_at', 'created_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    ad_name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.String(500), nullable=False)
+    terms = db.Column(db.String(500), nullable=True)
+    payment = db.Column(db.Float, nullable=False)
+    influencer_name = db.Column(db.String(100), nullable=True)
+    influencer_id = db.Column(db.Integer, db.ForeignKey('influencers.id'), nullable=True)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id'), nullable=False)
+    
+    negotiation_status = db.Column(db.String(20), nullable=False, default='no negotiation')
+    modified_terms = db.Column(db.Text, nullable=True)
+    modified_payment = db.Column(db.Float, nullable=True)
+    created_by = db.Column(db.String(20), nullable=False) 
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    
+    campaign = db.relationship('Campaign', back_populates='ad_requests')  
+    sponsor_id = db.Column(db.Integer, db.ForeignKey('sponsors.id'), nullable=False)
+    status = db.Column(db.String(50), default='pending')
+
+
+class StatsRollup(db.Model):
+    __tablename__ = 'stats_rollup'
+    key = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Float, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+class SponsorRollup(db.Model):
+    __tablename__ = 'sponsor_rollup'
+    sponsor_id = db.Column(db.Integer, db.ForeignKey('sponsors.id'), primary_key=True)
+    campaigns = db.Column(db.Integer, nullable=False, default=0)
+    budget_total = db.Column(db.Float, nullable=False, default=0, index=True)
+    influencers = db.Column(db.Integer, nullable=False, default=0)
+    adrequests = db.Column(db.Integer, nullable=False, default=0)
+    accepted = db.Column(db.Integer, nullable=False, default=0)
+    pending = db.Column(db.Integer, nullable=False, default=0)
+    rejected = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+class InfluencerRollup(db.Model):
+    __tablename__ = 'influencer_rollup'
+    influencer_id = db.Column(db.Integer, db.ForeignKey('influencers.id'), primary_key=True)
+    adrequests = db.Column(db.Integer, nullable=False, default=0)
+    accepted = db.Column(db.Integer, nullable=False, default=0)
+    pending = db.Column(db.Integer, nullable=False, default=0)
+    rejected = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    earnings = db.Column(db.Float, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class SponsorInfluencerRollup(db.Model):
+    __tablename__ = 'sponsor_influencer_rollup'
+    sponsor_id = db.Column(db.Integer, db.ForeignKey('sponsors.id'), primary_key=True)
+    influencer_id = db.Column(db.Integer, db.ForeignKey('influencers.id'), primary_key=True)
+    adrequests = db.Column(db.Integer, nullable=False, default=0)
+
+
+class MatchTerm(db.Model):
+    # Inverted index for matchmaking: one row per word of an influencer's niche
+    # or category (or a campaign's niche). ``weight`` is the influencer's reach
+    # or the campaign's budget, so each posting list can be read best first.
+    __tablename__ = 'match_terms'
+    __table_args__ = (
+        db.Index('ix_match_terms_posting', 'kind', 'field', 'term', 'weight'),
+    )
+    kind = db.Column(db.String(20), primary_key=True)
+    entity_id = db.Column(db.Integer, primary_key=True)
+    field = db.Column(db.String(20), primary_key=True)
+    term = db.Column(db.String(50), primary_key=True)
+    weight = db.Column(db.Integer, nullable=False, default=0)
+
+
+class CampaignMatch(db.Model):
+    __tablename__ = 'campaign_matches'
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id', ondelete='CASCADE'),
+                            primary_key=True)
+    position = db.Column(db.Integer, primary_key=True)
+    influencer_id = db.Column(db.Integer, db.ForeignKey('influencers.id', ondelete='CASCADE'),
+                              nullable=False, index=True)
+    score = db.Column(db.Float, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class InfluencerFeed(db.Model):
+    __tablename__ = 'influencer_feeds'
+    influencer_id = db.Column(db.Integer, db.ForeignKey('influencers.id', ondelete='CASCADE'),
+                              primary_key=True)
+    position = db.Column(db.Integer, primary_key=True)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id', ondelete='CASCADE'),
+                            nullable=False, index=True)
+    score = db.Column(db.Float, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class Job(db.Model):
+    # Work for `flask jobs-worker` (see jobs.py). Workers pick the oldest due
+    # queued job, so (status, run_at) is the claim lookup.
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.name} {self.status}>'
+
+
+class Notification(db.Model):
+    # Pending ad request notifications, waiting to go out in the recipient's
+    # next digest email (see notifications.py); rows are deleted once sent.
+    # claimed_by marks the rows a send-digests job is sending.
+    __tablename__ = 'notifications'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False,
+                        index=True)
+    message = db.Column(db.String(500), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_by = db.Column(db.String(32), nullable=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+
+
+class LoginSession(db.Model):
+    # Server-side sessions (see sessions.py), keyed by the random id in the
+    # session cookie. user_id is indexed so revoke() can log a user out.
+    __tablename__ = 'login_sessions'
+    id = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=True,
+                        index=True)
+    data = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_seen = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class RateLimit(db.Model):
+    # Token buckets shared by the workers (see ratelimit.py). tokens is what
+    # is left after the last request and available what it found; updated
+    # is a Unix time.
+    __tablename__ = 'rate_limits'
+    key = db.Column(db.String(200), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    available = db.Column(db.Float, nullable=False)
+    updated = db.Column(db.Float, nullable=False, index=True)
@@ -0,0 +1,101 @@
+import logging
+import secrets
+import smtplib
+from datetime import datetime, timedelta
+from itertools import groupby
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import bindparam, delete, or_, select, update
+from models import db, User, Sponsor, Influencer, Job, Notification
+from mail import mail
+import jobs
+
+
+# Ad request notifications, sent as digests. A view that changes an ad
+# request calls notify() for the other party, which only adds a Notification
+# row to the view's transaction. The first pending notification schedules a
+# send-digests job NOTIFY_DIGEST_WINDOW seconds later; that job sends every
+# recipient with pending notifications a single email listing all of them,
+# over one SMTP connection, and deletes what it sent. A sponsor getting 500
+# requests an hour receives at most 3600 / NOTIFY_DIGEST_WINDOW emails.
+#
+# Two writers can both find no queued job and schedule one each, so the job
+# first claims the pending rows in a transaction of its own; a second job
+# running alongside finds nothing left to claim and sends nothing twice.
+# Claims of a worker that died lapse after JOB_TIMEOUT seconds.
+
+log = logging.getLogger('connetify.notifications')
+
+
+def notify(ad_request, actor_role, message):
+    """Tell the other party of ``ad_request`` that ``actor_role`` made a change."""
+    if actor_role == 'sponsor' and ad_request.influencer_id is not None:
+        user_id = select(Influencer.user_id).where(Influencer.id == ad_request.influencer_id)
+    elif actor_role == 'influencer':
+        user_id = select(Sponsor.user_id).where(Sponsor.id == ad_request.sponsor_id)
+    else:
+        return
+    db.session.add(Notification(user_id=user_id.scalar_subquery(), message=message[:500]))
+
+    queued = db.session.scalar(select(Job.id).where(Job.status == 'queued',
+                                                    Job.name == 'send-digests').limit(1))
+    if queued is None:
+        jobs.enqueue('send-digests', delay=current_app.config['NOTIFY_DIGEST_WINDOW'])
+
+
+def _digest(name, email, rows):
+    count = len(rows)
+    lines = [f'Hi {name},', '', f'There {"is" if count == 1 else "are"} {count} '
+             f'new {"update" if count == 1 else "updates"} on your ad requests:', '']
+    lines += [f'- {row.created_at:%Y-%m-%d %H:%M} UTC: {row.message}' for row in rows]
+    lines += ['', 'Log in to Connetify to respond.']
+    return Message(f'Connetify: {count} new {"update" if count == 1 else "updates"}',
+                   recipients=[email], body='\n'.join(lines))
+
+
+@jobs.task('send-digests', max_attempts=5)
+def send_digests():
+    table = Notification.__table__
+    claim = secrets.token_hex(16)
+    now = datetime.utcnow()
+    lapsed = now - timedelta(seconds=current_app.config['JOB_TIMEOUT'])
+    db.session.execute(update(table)
+                       .where(or_(table.c.claimed_by.is_(None), table.c.claimed_at < lapsed))
+                       .values(claimed_by=claim, claimed_at=now))
+    db.session.commit()
+
+    pending = db.session.execute(
+        select(Notification.id, Notification.user_id, Notification.message,
+               Notification.created_at, User.name, User.email)
+        .join(User, User.id == Notification.user_id)
+        .where(Notification.claimed_by == claim)
+        .order_by(Notification.user_id, Notification.id)).all()
+    if not pending:
+        return
+
+    # (user_id, last notification id) of every digest that went out, or that
+    # the server refused for good.
+    sent = []
+    try:
+        with mail.connect() as connection:
+            for user_id, rows in groupby(pending, key=lambda row: row.user_id):
+                rows = list(rows)
+                try:
+                    connection.send(_digest(rows[0].name, rows[0].email, rows))
+                except smtplib.SMTPRecipientsRefused:
+                    log.warning('digest for user %s refused by the mail server', user_id,
+                                exc_info=True)
+                sent.append({'user': user_id, 'last': rows[-1].id})
+    finally:
+        if sent:
+            db.session.execute(
+                delete(table).where(table.c.claimed_by == claim,
+                                    table.c.user_id == bindparam('user'),
+                                    table.c.id <= bindparam('last')),
+                sent)
+        # What was not sent (the rest, if the connection failed) is released
+        # for the retry; notifications that arrived meanwhile were never claimed.
+        db.session.execute(update(table).where(table.c.claimed_by == claim)
+                           .values(claimed_by=None, claimed_at=None))
+        db.session.commit()
+    log.info('sent %s digests for %s notifications', len(sent), len(pending))
@@ -0,0 +1,124 @@
+import base64
+import json
+from datetime import datetime
+from flask import abort, current_app, request, url_for
+from sqlalchemy import tuple_
+
+
+# Keyset ("seek") pagination. Instead of OFFSET, each page remembers the sort
+# key of its first and last row and the next query starts right after it, so
+# fetching page 500 costs the same as fetching page 1 and rows inserted while
+# someone is paging never shift the results.
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and 'dt' in value:
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps({'v': [_encode_value(v) for v in values], 'd': direction})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload['d'] not in ('next', 'prev'):
+            raise ValueError(payload['d'])
+        return [_decode_value(v) for v in payload['v']], payload['d']
+    except (ValueError, KeyError, TypeError):
+        abort(400, 'Invalid page cursor.')
+
+
+def get_page_size():
+    default = current_app.config.get('PAGE_SIZE', 24)
+    maximum = current_app.config.get('PAGE_SIZE_MAX', 100)
+    size = request.args.get('per_page', default, type=int)
+    return max(1, min(size, maximum))
+
+
+class Page:
+    def __init__(self, items, keys, param, has_next, has_prev):
+        self.items = items
+        self.param = param
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self._keys = keys
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.items:
+            return encode_cursor(self._keys[-1], 'next')
+
+    @property
+    def prev_cursor(self):
+        if self.has_prev and self.items:
+            return encode_cursor(self._keys[0], 'prev')
+
+    def _url(self, cursor):
+        args = request.args.to_dict()
+        args.update(request.view_args or {})
+        args[self.param] = cursor
+        return url_for(request.endpoint, **args)
+
+    @property
+    def next_url(self):
+        cursor = self.next_cursor
+        return self._url(cursor) if cursor else None
+
+    @property
+    def prev_url(self):
+        cursor = self.prev_cursor
+        return self._url(cursor) if cursor else None
+
+
+def paginate(query, *columns, param='cursor', descending=False, per_page=None):
+    """Fetch one page of ``query`` ordered by ``columns``.
+
+    The last column must be unique (normally the primary key) so the sort
+    key identifies exactly one row. Columns may also be expressions such as
+    a search rank. The cursor is read from ``request.args[param]``.
+    """
+    per_page = per_page or get_page_size()
+    cursor = request.args.get(param)
+    key = tuple_(*columns)
+
+    direction = 'next'
+    if cursor:
+        values, direction = decode_cursor(cursor)
+        if len(values) != len(columns):
+            abort(400, 'Invalid page cursor.')
+        forward = (direction == 'next') != descending
+        query = query.filter(key > tuple_(*values) if forward else key < tuple_(*values))
+
+    ascending = (direction == 'next') != descending
+    order = [c.asc() if ascending else c.desc() for c in columns]
+    rows = query.add_columns(*columns).order_by(*order).limit(per_page + 1).all()
+
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == 'prev':
+        rows.reverse()
+        has_next, has_prev = True, more
+    else:
+        has_next, has_prev = more, bool(cursor)
+    items = [row[0] for row in rows]
+    keys = [list(row[1:]) for row in rows]
+    return Page(items, keys, param, has_next, has_prev)
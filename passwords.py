@@ -0,0 +1,254 @@
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import click
+from flask import current_app
+from sqlalchemy import select, update
+from models import db, User
+import jobs
+
+
+# Password hashing. PASSWORD_HASHER picks the algorithm new hashes use:
+# 'scrypt' (hashlib, cost PASSWORD_SCRYPT_COST = log2 of N, 2 ** cost * 1 KiB
+# of memory per hash) or 'argon2' (needs the argon2-cffi package, costs
+# PASSWORD_ARGON2_TIME_COST and PASSWORD_ARGON2_MEMORY_KIB). Hashes from
+# either algorithm verify; one made with another algorithm or other costs is
+# replaced on the user's next login, as are the plaintext passwords from
+# before hashing (`flask passwords-hash` converts those all at once).
+#
+# Views hash and verify on a pool of PASSWORD_HASH_THREADS threads with room
+# for PASSWORD_HASH_QUEUE more waiting, so a burst of logins cannot take
+# every CPU (or, with scrypt, 2 ** cost KiB each of memory) from the other
+# requests; past that, hash_password() and check_password() raise Busy.
+# benchmarks/password_bench.py measures logins per second at each cost.
+#
+# A bulk import stores plaintext passwords as they are and queues
+# hash-passwords jobs for the worker, since hashing thousands of them at
+# the default cost would hold the import (and the hashing threads) for
+# minutes; until its job runs, such a user signs in through the plaintext
+# path like any other.
+
+log = logging.getLogger('connetify.passwords')
+
+
+class Busy(Exception):
+    """Every hashing thread is busy and the queue is full."""
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode().rstrip('=')
+
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+class ScryptHasher:
+    name = 'scrypt'
+    prefix = 'scrypt$'
+    r = 8
+    p = 1
+    FORMAT = re.compile(r'scrypt\$([1-9]|[12][0-9]|30)\$[1-9][0-9]{0,2}\$[1-9][0-9]{0,2}'
+                        r'\$[A-Za-z0-9+/]{2,}\$[A-Za-z0-9+/]{2,}')
+
+    def __init__(self, cost=15):
+        self.cost = cost
+
+    def _derive(self, password, salt, cost, r, p):
+        n = 2 ** cost
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=2 * 128 * r * n, dklen=32)
+
+    def hash(self, password):
+        salt = os.urandom(16)
+        key = self._derive(password, salt, self.cost, self.r, self.p)
+        return f'scrypt${self.cost}${self.r}${self.p}${_b64(salt)}${_b64(key)}'
+
+    @classmethod
+    def identify(cls, stored):
+        if cls.FORMAT.fullmatch(stored) is None:
+            return False
+        try:
+            for part in stored.split('$')[4:]:
+                _unb64(part)
+        except ValueError:
+            return False
+        return True
+
+    def verify(self, stored, password):
+        try:
+            _, cost, r, p, salt, key = stored.split('$')
+            derived = self._derive(password, _unb64(salt), int(cost), int(r), int(p))
+            return hmac.compare_digest(derived, _unb64(key))
+        except ValueError:
+            # A malformed hash (bad base64, or costs scrypt refuses) matches nothing.
+            return False
+
+    def needs_rehash(self, stored):
+        return stored.split('$')[1:4] != [str(self.cost), str(self.r), str(self.p)]
+
+
+class Argon2Hasher:
+    name = 'argon2'
+    prefix = '$argon2'
+
+    def __init__(self, time_cost=3, memory_kib=65536):
+        import argon2
+        self.hasher = argon2.PasswordHasher(time_cost=time_cost, memory_cost=memory_kib,
+                                            parallelism=1)
+        self.errors = (argon2.exceptions.VerificationError, argon2.exceptions.InvalidHashError)
+
+    def hash(self, password):
+        return self.hasher.hash(password)
+
+    @classmethod
+    def identify(cls, stored):
+        return stored.startswith(cls.prefix)
+
+    def verify(self, stored, password):
+        try:
+            return self.hasher.verify(stored, password)
+        except self.errors:
+            return False
+
+    def needs_rehash(self, stored):
+        return self.hasher.check_needs_rehash(stored)
+
+
+HASHERS = {'scrypt': ScryptHasher, 'argon2': Argon2Hasher}
+
+
+def make_hasher(config):
+    """The hasher for new passwords under ``config``."""
+    name = config.get('PASSWORD_HASHER', 'scrypt')
+    if name == 'scrypt':
+        return ScryptHasher(config.get('PASSWORD_SCRYPT_COST', 15))
+    if name == 'argon2':
+        return Argon2Hasher(config.get('PASSWORD_ARGON2_TIME_COST', 3),
+                            config.get('PASSWORD_ARGON2_MEMORY_KIB', 65536))
+    raise ValueError(f'Unknown PASSWORD_HASHER {name!r}')
+
+
+def is_hash(stored):
+    return any(hasher.identify(stored) for hasher in HASHERS.values())
+
+
+def has_hash_prefix(stored):
+    """Whether ``stored`` is meant as a hash, even a malformed one, and not plaintext."""
+    return stored.startswith(tuple(hasher.prefix for hasher in HASHERS.values()))
+
+
+def _verify(hasher, stored, password):
+    """(matches, needs rehash) for a stored hash or legacy plaintext password."""
+    if hasher.identify(stored):
+        matches = hasher.verify(stored, password)
+        return matches, matches and hasher.needs_rehash(stored)
+    for other in HASHERS.values():
+        if other.identify(stored):
+            # Verifying needs only the parameters kept in the hash itself.
+            try:
+                other = other()
+            except ImportError as e:
+                log.error('cannot check a %s password hash: %s', other.name, e)
+                return False, False
+            return other.verify(stored, password), True
+    if has_hash_prefix(stored):
+        # A malformed hash matches nothing, not even its own text as a password.
+        return False, False
+    return hmac.compare_digest(stored.encode(), password.encode()), True
+
+
+def _submit(fn, *args):
+    state = current_app.extensions['passwords']
+    if not state['slots'].acquire(blocking=False):
+        raise Busy()
+    try:
+        return state['pool'].submit(fn, *args).result()
+    finally:
+        state['slots'].release()
+
+
+def hash_password(password):
+    """Hash a new password with the configured hasher."""
+    return _submit(current_app.extensions['passwords']['hasher'].hash, password)
+
+
+# Users per hash-passwords job: about a minute of hashing at the default
+# cost, well inside JOB_TIMEOUT.
+HASH_JOB_SIZE = 500
+
+
+def queue_hashing(user_ids):
+    """Queue jobs hashing the plaintext passwords of ``user_ids``, as left by a bulk import."""
+    for start in range(0, len(user_ids), HASH_JOB_SIZE):
+        jobs.enqueue('hash-passwords', user_ids=user_ids[start:start + HASH_JOB_SIZE])
+
+
+@jobs.task('hash-passwords')
+def _hash_passwords(user_ids):
+    hasher = current_app.extensions['passwords']['hasher']
+    table = User.__table__
+    rows = db.session.execute(select(table.c.id, table.c.password)
+                              .where(table.c.id.in_(user_ids))).all()
+    # All hashed before the first write, so the database is not locked meanwhile.
+    hashed = [(user_id, password, hasher.hash(password))
+              for user_id, password in rows if not has_hash_prefix(password)]
+    for user_id, password, new in hashed:
+        # Skipped if the user signed in (and was rehashed) or changed it since.
+        db.session.execute(update(table).where(table.c.id == user_id, table.c.password == password)
+                           .values(password=new))
+
+
+def check_password(user, password):
+    """Whether ``password`` is ``user``'s; rehashes it on the user if it is out of date.
+
+    ``user`` may be None (no such account); a hash is still computed so the
+    answer takes as long as for a wrong password.
+    """
+    state = current_app.extensions['passwords']
+    hasher = state['hasher']
+    if user is None:
+        if state['dummy'] is None:
+            state['dummy'] = _submit(hasher.hash, os.urandom(16).hex())
+        _submit(hasher.verify, state['dummy'], password)
+        return False
+    matches, rehash = _submit(_verify, hasher, user.password, password)
+    if matches and rehash:
+        user.password = _submit(hasher.hash, password)
+    return matches
+
+
+def init_passwords(app):
+    hasher = make_hasher(app.config)
+    threads = app.config.get('PASSWORD_HASH_THREADS', 2)
+    app.extensions['passwords'] = {
+        'hasher': hasher,
+        'dummy': None,
+        'pool': ThreadPoolExecutor(threads, thread_name_prefix='password'),
+        'slots': threading.BoundedSemaphore(threads + app.config.get('PASSWORD_HASH_QUEUE', 16)),
+    }
+
+    @app.errorhandler(Busy)
+    def busy(error):
+        return ('The server is busy signing other people in; please try again in a moment.',
+                503, {'Retry-After': '1'})
+
+    @app.cli.command('passwords-hash')
+    def passwords_hash():
+        """Hash every password that is still stored in plaintext."""
+        table = User.__table__
+        count = 0
+        for user_id, password in db.session.execute(select(table.c.id, table.c.password)).all():
+            if not has_hash_prefix(password):
+                db.session.execute(update(table).where(table.c.id == user_id)
+                                   .values(password=hasher.hash(password)))
+                count += 1
+                if count % 100 == 0:
+                    db.session.commit()
+        db.session.commit()
+        click.echo(f'Hashed {count} plaintext passwords.')
@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, flash, g, has_app_context, jsonify, redirect, session, url_for
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, joinedload
+from models import db, User, Sponsor, Influencer
+
+
+# The logged-in user and their sponsor or influencer profile. A view wrapped
+# in @login_required(role=...) (@api_login_required for JSON views) finds
+# them in g.user and g.account (None for admins) instead of querying for
+# them. A user is loaded together with their
+# profile in one statement and kept in a per-process cache for
+# PRINCIPAL_CACHE_TTL seconds; each request merges the cached copy into its
+# session without a query, so views can still change and commit it. A commit
+# that changes a user or profile (a profile edit, flagging) drops the user
+# from this process's cache; other processes see the change within the TTL.
+
+
+class PrincipalCache:
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self.users = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.users.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.users[user_id]
+                return None
+            self.users.move_to_end(user_id)
+            return entry[1]
+
+    def put(self, user_id, user):
+        with self.lock:
+            self.users[user_id] = (time.monotonic() + self.ttl, user)
+            self.users.move_to_end(user_id)
+            while len(self.users) > self.size:
+                self.users.popitem(last=False)
+
+    def drop(self, user_ids):
+        with self.lock:
+            for user_id in user_ids:
+                self.users.pop(user_id, None)
+
+
+def _load(user_id):
+    # A session of its own, closed right away, leaves detached copies with
+    # every column and both profiles loaded; those are safe to share.
+    with Session(db.engine, expire_on_commit=False) as s:
+        return s.scalars(select(User).where(User.id == user_id)
+                         .options(joinedload(User.sponsor), joinedload(User.influencer))).first()
+
+
+def load_principal():
+    """Set g.user and g.account for the logged-in user and return the user, or None."""
+    if 'user' in g:
+        return g.user
+    user_id = session.get('user_id')
+    if user_id is None:
+        return None
+    cache = current_app.extensions.get('principal')
+    user = cache.get(user_id) if cache else None
+    if user is None:
+        user = _load(user_id)
+        if user is None:
+            return None
+        if cache:
+            cache.put(user_id, user)
+
+    g.user = db.session.merge(user, load=False)
+    g.account = {'sponsor': g.user.sponsor, 'influencer': g.user.influencer}.get(g.user.user_role)
+    return g.user
+
+
+def _allowed(role):
+    if role is not None and session.get('user_role') != role:
+        return None
+    user = load_principal()
+    if user is None or (role is not None and user.user_role != role):
+        return None
+    return user
+
+
+def login_required(role=None):
+    """Send the visitor to the login page unless someone (with ``role``) is logged in."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if _allowed(role) is None:
+                flash('You need to log in first.', 'warning')
+                return redirect(url_for('auth.login'))
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def api_login_required(role=None):
+    """Like login_required, for JSON views: 401 for visitors, 403 for another role."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if _allowed(role) is None:
+                if 'user_id' not in session:
+                    return jsonify(error='You need to log in first.'), 401
+                return jsonify(error='You are not allowed to see this.'), 403
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changed(session, flush_context):
+    changed = session.info.setdefault('changed_principals', set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            changed.add(obj.id)
+        elif isinstance(obj, (Sponsor, Influencer)):
+            changed.add(obj.user_id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _drop_changed(session):
+    changed = session.info.pop('changed_principals', None)
+    cache = current_app.extensions.get('principal') if has_app_context() else None
+    if changed and cache is not None:
+        cache.drop(changed)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_changed(session):
+    session.info.pop('changed_principals', None)
+
+
+def init_principal(app):
+    if app.config.get('PRINCIPAL_CACHE_TTL'):
+        app.extensions['principal'] = PrincipalCache(app.config.get('PRINCIPAL_CACHE_SIZE', 10000),
+                                                     app.config['PRINCIPAL_CACHE_TTL'])
@@ -0,0 +1,102 @@
+import logging
+import os
+import time
+from flask import g, has_request_context, request, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Per-request cost breakdown. When PROFILER_ENABLED is set every response gets
+# a Server-Timing header with the time spent in SQL, in template rendering and
+# in total (browser dev tools show it on the network tab), and statements
+# slower than PROFILER_SLOW_QUERY_MS are written to the slow-query log with
+# the route that sent them. Pages with cached fragments also report their
+# fragment cache hits and misses.
+
+slow_query_log = logging.getLogger('connetify.slow_queries')
+
+
+def _profile():
+    if has_request_context():
+        return g.get('profile')
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    # Pushed by the statement counter in queries.py.
+    started = conn.info['statement_start'].pop()
+    profile = _profile()
+    if profile is None:
+        return
+    elapsed = (time.perf_counter() - started) * 1000
+    profile['sql_count'] += 1
+    profile['sql_ms'] += elapsed
+    if elapsed >= profile['slow_ms']:
+        slow_query_log.warning('%.1f ms %s %s\n%s', elapsed, request.method, request.endpoint,
+                               ' '.join(statement.split()))
+
+
+@event.listens_for(Engine, 'handle_error')
+def _failed_statement(context):
+    # A statement that raised gets no after_cursor_execute.
+    conn = context.connection
+    if conn is not None and conn.info.get('statement_start'):
+        conn.info['statement_start'].pop()
+
+
+def _start_render(sender, template, context, **extra):
+    profile = _profile()
+    if profile is not None:
+        profile['render_start'].append(time.perf_counter())
+
+
+def _end_render(sender, template, context, **extra):
+    profile = _profile()
+    if profile is not None and profile['render_start']:
+        started = profile['render_start'].pop()
+        # Only the outermost render counts, so nested renders are not added twice.
+        if not profile['render_start']:
+            profile['render_ms'] += (time.perf_counter() - started) * 1000
+
+
+def server_timing(profile, total_ms):
+    entries = [
+        f'db;dur={profile["sql_ms"]:.1f};desc="{profile["sql_count"]} queries"',
+        f'tpl;dur={profile["render_ms"]:.1f}',
+        f'total;dur={total_ms:.1f}',
+    ]
+    if profile['fragment_hits'] or profile['fragment_misses']:
+        entries.append(f'frag;desc="{profile["fragment_hits"]} hits, '
+                       f'{profile["fragment_misses"]} misses"')
+    return ', '.join(entries)
+
+
+def init_profiler(app):
+    path = app.config.get('PROFILER_SLOW_QUERY_LOG')
+    # The logger is global: a second app (as in tests) must not add the file again.
+    if path and not any(getattr(handler, 'baseFilename', None) == os.path.abspath(path)
+                        for handler in slow_query_log.handlers):
+        handler = logging.FileHandler(path)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        slow_query_log.addHandler(handler)
+
+    before_render_template.connect(_start_render, app)
+    template_rendered.connect(_end_render, app)
+
+    @app.before_request
+    def start_profile():
+        if app.config.get('PROFILER_ENABLED'):
+            g.profile = {
+                'start': time.perf_counter(), 'sql_count': 0, 'sql_ms': 0.0,
+                'render_ms': 0.0, 'render_start': [],
+                'fragment_hits': 0, 'fragment_misses': 0,
+                'slow_ms': app.config.get('PROFILER_SLOW_QUERY_MS', 100),
+            }
+
+    @app.after_request
+    def add_server_timing(response):
+        profile = g.pop('profile', None)
+        if profile is not None:
+            total_ms = (time.perf_counter() - profile['start']) * 1000
+            response.headers['Server-Timing'] = server_timing(profile, total_ms)
+        return response
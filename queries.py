@@ -0,0 +1,64 @@
+import time
+from flask import g, has_request_context, request, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import joinedload
+from models import Sponsor, Influencer, Campaign
+
+
+# List queries used by the views. Every relationship a template touches per
+# row is loaded up front so a page costs a fixed number of SELECTs instead of
+# one extra SELECT per card.
+
+def influencers_with_user():
+    return Influencer.query.options(joinedload(Influencer.user))
+
+
+def sponsors_with_user():
+    return Sponsor.query.options(joinedload(Sponsor.user))
+
+
+def campaigns_with_sponsor():
+    return Campaign.query.options(joinedload(Campaign.sponsor).joinedload(Sponsor.user))
+
+
+# Statement budget guard. In debug mode every request counts the statements it
+# sends to the database and fails loudly when a view goes over its budget, so
+# an N+1 regression shows up the first time the page is opened.
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def query_budget(limit):
+    """Override the default statement budget for one view."""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    # The start profiler.py times the statement from.
+    conn.info.setdefault('statement_start', []).append(time.perf_counter())
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+
+
+def _current_budget():
+    view = current_app.view_functions.get(request.endpoint)
+    return getattr(view, 'query_budget', current_app.config.get('QUERY_BUDGET'))
+
+
+def init_query_budget(app):
+    @app.after_request
+    def check_query_budget(response):
+        if not (app.debug or app.config.get('QUERY_BUDGET_ENFORCE')):
+            return response
+        budget = _current_budget()
+        count = g.get('query_count', 0)
+        if budget is not None and count > budget:
+            raise QueryBudgetExceeded(
+                f'{request.endpoint} issued {count} SQL statements (budget {budget})')
+        return response
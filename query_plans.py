@@ -0,0 +1,111 @@
+import re
+import sys
+import click
+from sqlalchemy import func, select, text
+from models import (db, User, Sponsor, Influencer, Campaign, AdRequest, SponsorInfluencerRollup,
+                    MatchTerm, CampaignMatch, InfluencerFeed)
+import exports
+import stats
+
+
+# Representative queries for every view that filters or sorts, in the shape
+# the view sends them. ``flask check-query-plans`` runs EXPLAIN QUERY PLAN on
+# each one and fails if SQLite would scan a whole table to answer it.
+
+def _page(query, *order):
+    return query.order_by(*order).limit(25)
+
+
+def view_queries():
+    newest = (AdRequest.created_at.desc(), AdRequest.id.desc())
+    return {
+        'login': User.query.filter_by(username='someone'),
+        'admin_find campaigns': _page(Campaign.query.filter_by(is_flagged=False), Campaign.id),
+        'admin_info adrequests': _page(AdRequest.query, *newest),
+        'admin_info ongoing': _page(AdRequest.query.filter_by(status='accepted'), *newest),
+        'admin_info flagged campaigns': Campaign.query.filter_by(is_flagged=True),
+        'admin_info flagged influencers': Influencer.query.filter_by(is_flagged=True),
+        'admin_info flagged sponsors': Sponsor.query.filter_by(is_flagged=True),
+        'influencer_dashboard': Influencer.query.filter_by(user_id=1),
+        'influencer_profile new requests': AdRequest.query.filter_by(
+            influencer_id=1, created_by='sponsor', status='pending'),
+        'influencer_profile active': AdRequest.query.filter_by(influencer_id=1, status='accepted'),
+        'influencer_find': _page(Campaign.query.filter(Campaign.is_public == True), Campaign.id),
+        'influencer_find feed candidates': select(MatchTerm.entity_id)
+            .where(MatchTerm.kind == 'campaign', MatchTerm.field == 'niche',
+                   MatchTerm.term == 'fitness')
+            .order_by(MatchTerm.weight.desc()).limit(1000),
+        'influencer_find recommended': _page(
+            Campaign.query.join(InfluencerFeed, InfluencerFeed.campaign_id == Campaign.id)
+            .filter(InfluencerFeed.influencer_id == 1, Campaign.is_public == True,
+                    ~select(AdRequest.id).where(AdRequest.campaign_id == Campaign.id,
+                                                AdRequest.influencer_id == 1).exists()),
+            InfluencerFeed.position),
+        'request_campaign existing': AdRequest.query.filter_by(influencer_id=1, campaign_id=1),
+        'influencer_stats earnings': select(Campaign.title, func.sum(AdRequest.payment))
+            .join(AdRequest.campaign)
+            .where(AdRequest.influencer_id == 1, AdRequest.status == 'accepted')
+            .group_by(Campaign.id),
+        'sponsor_dashboard': Sponsor.query.filter_by(user_id=1),
+        'sponsor_profile active': AdRequest.query.filter_by(sponsor_id=1, status='accepted'),
+        'sponsor_profile pending': AdRequest.query.filter_by(
+            sponsor_id=1, created_by='influencer', status='pending'),
+        'sponsor_campaigns': _page(Campaign.query.filter_by(sponsor_id=1), Campaign.id),
+        'sponsor_stats budgets': select(Campaign.title, Campaign.budget)
+            .where(Campaign.sponsor_id == 1).order_by(Campaign.budget.desc()).limit(20),
+        'sponsor_stats reach': select(Influencer.reach_count)
+            .join(SponsorInfluencerRollup, SponsorInfluencerRollup.influencer_id == Influencer.id)
+            .where(SponsorInfluencerRollup.sponsor_id == 1),
+        'sponsor_find reach': _page(Influencer.query.filter(Influencer.reach_count >= 10000),
+                                    Influencer.reach_count.desc(), Influencer.id.desc()),
+        'admin_stats reach': select(Influencer.reach_count)
+            .order_by(Influencer.reach_count.desc()).limit(20),
+        'admin_stats version': stats.admin_stats_version(),
+        'sponsor_stats version': stats.sponsor_stats_version(1),
+        'influencer_stats version': stats.influencer_stats_version(1),
+        'request_influencer match candidates': select(MatchTerm.entity_id)
+            .where(MatchTerm.kind == 'influencer', MatchTerm.field == 'niche',
+                   MatchTerm.term == 'fitness')
+            .order_by(MatchTerm.weight.desc()).limit(1000),
+        'request_influencer cached matches': select(CampaignMatch.influencer_id)
+            .where(CampaignMatch.campaign_id == 1).order_by(CampaignMatch.position),
+        'campaign_details': _page(AdRequest.query.filter_by(campaign_id=1), *newest),
+        'update_adrequest': AdRequest.query.filter_by(campaign_id=1),
+        'admin_export adrequests': exports.statement('adrequests'),
+        'admin_export adrequests by status': exports.statement(
+            'adrequests', status='accepted', start='2024-01-01', end='2024-03-31'),
+        'admin_export campaigns by sponsor': exports.statement('campaigns', sponsor='someone'),
+    }
+
+
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+def full_scans(statement):
+    if hasattr(statement, 'statement'):
+        statement = statement.statement
+    sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+    plan = db.session.execute(text('EXPLAIN QUERY PLAN ' + sql)).all()
+    details = [row[-1] for row in plan]
+    return [d for d in details if FULL_SCAN.match(d)], details
+
+
+def init_query_plans(app):
+    @app.cli.command('check-query-plans')
+    @click.option('--verbose', is_flag=True, help='Print every plan.')
+    def check_query_plans(verbose):
+        """Fail if any view query would scan a whole table."""
+        if db.engine.dialect.name != 'sqlite':
+            raise click.UsageError('EXPLAIN QUERY PLAN checks need an SQLite database.')
+        failures = 0
+        for name, statement in view_queries().items():
+            scans, plan = full_scans(statement)
+            if scans:
+                failures += 1
+                click.echo(f'FAIL {name}: ' + '; '.join(plan))
+            elif verbose:
+                click.echo(f'ok   {name}: ' + '; '.join(plan))
+        if failures:
+            click.echo(f'{failures} queries scan a whole table.')
+            sys.exit(1)
+        click.echo('Every view query uses an index.')
@@ -0,0 +1,227 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+import click
+from flask import current_app, g, request, session
+from sqlalchemy import case, delete, literal
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeout
+from werkzeug.exceptions import ServiceUnavailable, TooManyRequests
+from models import db, RateLimit
+import jobs
+
+
+# Rate limiting and admission control.
+#
+# A view wrapped in @rate_limit('name') takes a token from a bucket per
+# client (the logged-in user, or the IP address for visitors) before it
+# runs; RATE_LIMITS['name'] gives the bucket's refill rate per minute and
+# its burst size. An empty bucket answers 429 with Retry-After. The search
+# and stats pages are limited this way. Put the decorator last, under
+# @conditional, so 304 revalidations cost nothing.
+#
+# RATE_LIMIT_BACKEND picks where buckets live: 'memory' (per process, so
+# each worker allows the full rate), 'sql' (the rate_limits table, shared by
+# every worker, one upsert per limited request) or 'redis' (a Redis-compatible
+# server at RATE_LIMIT_URL, needs the redis package). If the store fails the
+# request is let through.
+#
+# Admission control turns requests away with 503 and Retry-After before any
+# view runs when this process already has ADMISSION_MAX_IN_FLIGHT requests
+# in progress, or when requests have recently waited more than
+# ADMISSION_MAX_POOL_WAIT_MS for a database connection (see database.py).
+# Shedding early keeps the requests already admitted fast instead of letting
+# every request time out.
+
+log = logging.getLogger('connetify.ratelimit')
+
+
+class MemoryBackend:
+    errors = ()
+
+    def __init__(self, size):
+        self.size = size
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, rate, burst, now):
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            self.buckets[key] = (tokens - 1 if tokens >= 1 else tokens, now)
+            self.buckets.move_to_end(key)
+            while len(self.buckets) > self.size:
+                self.buckets.popitem(last=False)
+        return tokens
+
+    def sweep(self, now, idle):
+        with self.lock:
+            idle_keys = [key for key, (tokens, updated) in self.buckets.items()
+                         if updated < now - idle]
+            for key in idle_keys:
+                del self.buckets[key]
+        return len(idle_keys)
+
+
+class SQLBackend:
+    # A dropped connection, a lock timeout or an exhausted pool.
+    errors = (DBAPIError, PoolTimeout)
+
+    def __init__(self):
+        self.table = RateLimit.__table__
+
+    def take(self, key, rate, burst, now):
+        # One upsert refills the bucket, takes a token if there is one and
+        # returns the count from before taking it.
+        table = self.table
+        insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+        refilled = table.c.tokens + (literal(now) - table.c.updated) * rate
+        refilled = case((refilled > burst, burst), else_=refilled)
+        statement = insert(table).values(key=key, available=burst, tokens=burst - 1, updated=now)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={'available': refilled,
+                  'tokens': case((refilled >= 1, refilled - 1), else_=refilled),
+                  'updated': now},
+        ).returning(table.c.available)
+        with db.engine.begin() as connection:
+            return connection.execute(statement).scalar_one()
+
+    def sweep(self, now, idle):
+        with db.engine.begin() as connection:
+            return connection.execute(
+                delete(self.table).where(self.table.c.updated < now - idle)).rowcount
+
+
+class RedisBackend:
+    # The bucket is a hash of tokens and updated, changed by a Lua script so
+    # that workers cannot race; it expires once it would be full again.
+    SCRIPT = """
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    local tokens = tonumber(bucket[1]) or burst
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + (now - updated) * rate)
+    local left = tokens
+    if tokens >= 1 then left = tokens - 1 end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(left), 'updated', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return tostring(tokens)
+    """
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+        self.errors = (redis.RedisError,)
+
+    def take(self, key, rate, burst, now):
+        return float(self.script(keys=[f'ratelimit:{key}'], args=[rate, burst, now]))
+
+    def sweep(self, now, idle):
+        # Buckets expire by themselves.
+        return 0
+
+
+def _client():
+    user_id = session.get('user_id')
+    return f'user:{user_id}' if user_id is not None else f'ip:{request.remote_addr}'
+
+
+def rate_limit(name):
+    """Answer 429 once the client has used up its RATE_LIMITS[name] bucket."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            state = current_app.extensions.get('ratelimit')
+            limit = current_app.config.get('RATE_LIMITS', {}).get(name)
+            if state is None or limit is None:
+                return view(*args, **kwargs)
+            rate, burst = limit['per_minute'] / 60, limit['burst']
+            backend = state['backend']
+            try:
+                tokens = backend.take(f'{name}:{_client()}', rate, burst, time.time())
+            except backend.errors:
+                log.warning('rate limit store unavailable, letting %s through', name, exc_info=True)
+                return view(*args, **kwargs)
+            if tokens < 1:
+                raise TooManyRequests(f'Too many {name} requests; please slow down.',
+                                      retry_after=math.ceil((1 - tokens) / rate))
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _pool_wait():
+    waits = [engine.pool.recent_wait() for engine in db.engines.values()
+             if hasattr(engine.pool, 'recent_wait')]
+    return max(waits, default=0)
+
+
+def _admit():
+    state = current_app.extensions['admission']
+    max_in_flight = current_app.config.get('ADMISSION_MAX_IN_FLIGHT')
+    max_wait = current_app.config.get('ADMISSION_MAX_POOL_WAIT_MS')
+    wait = _pool_wait() * 1000 if max_wait else 0
+    with state['lock']:
+        if max_in_flight and state['in_flight'] >= max_in_flight:
+            reason = f'{state["in_flight"]} requests in flight'
+        elif max_wait and wait > max_wait:
+            reason = f'database connections waited {wait:.0f} ms'
+        else:
+            state['in_flight'] += 1
+            g.admitted = True
+            return
+    log.warning('shedding %s %s: %s', request.method, request.path, reason)
+    raise ServiceUnavailable('The server is overloaded; please try again in a moment.',
+                             retry_after=1)
+
+
+def _release(error=None):
+    if g.pop('admitted', False):
+        state = current_app.extensions['admission']
+        with state['lock']:
+            state['in_flight'] -= 1
+
+
+def sweep():
+    """Drop buckets that have been full long enough to be forgotten."""
+    state = current_app.extensions.get('ratelimit')
+    if state is None:
+        return 0
+    limits = current_app.config.get('RATE_LIMITS', {}).values()
+    # The longest any bucket takes to fill up from empty.
+    idle = max((limit['burst'] / limit['per_minute'] * 60 for limit in limits), default=0)
+    return state['backend'].sweep(time.time(), idle)
+
+
+@jobs.task('sweep-rate-limits', max_attempts=1)
+def _sweep_rate_limits():
+    log.info('dropped %s idle rate limit buckets', sweep())
+
+
+def init_ratelimit(app):
+    name = app.config.get('RATE_LIMIT_BACKEND')
+    if name == 'memory':
+        backend = MemoryBackend(app.config.get('RATE_LIMIT_SIZE', 100000))
+    elif name == 'sql':
+        backend = SQLBackend()
+    elif name == 'redis':
+        backend = RedisBackend(app.config['RATE_LIMIT_URL'])
+    elif name:
+        raise ValueError(f'Unknown RATE_LIMIT_BACKEND {name!r}')
+    if name:
+        app.extensions['ratelimit'] = {'backend': backend}
+
+    if app.config.get('ADMISSION_MAX_IN_FLIGHT') or app.config.get('ADMISSION_MAX_POOL_WAIT_MS'):
+        app.extensions['admission'] = {'in_flight': 0, 'lock': threading.Lock()}
+        app.before_request(_admit)
+        app.teardown_request(_release)
+
+    @app.cli.command('rate-limits-sweep')
+    def rate_limits_sweep():
+        """Drop idle rate limit buckets."""
+        click.echo(f'Dropped {sweep()} idle rate limit buckets.')
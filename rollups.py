@@ -0,0 +1,253 @@
+from collections import defaultdict
+from datetime import datetime
+import click
+from sqlalchemy import case, event, func, inspect, select
+from models import (db, Sponsor, Influencer, Campaign, AdRequest, StatsRollup, SponsorRollup,
+                    InfluencerRollup, SponsorInfluencerRollup)
+import jobs
+
+
+# Pre-aggregated counters for the stats dashboards. Every flush that adds,
+# changes or deletes an ad request, campaign, influencer or sponsor turns the
+# change into +/- deltas and applies them to the rollup tables in the same
+# transaction, so the dashboards read a handful of rows instead of scanning
+# the base tables. ``flask rollups-rebuild`` recomputes everything from
+# scratch if the counters ever drift (with --queue, a job worker does it).
+# Rows that change get a new updated_at, which the stats pages use to answer
+# conditional GETs.
+
+STATUSES = ('accepted', 'pending', 'rejected', 'completed')
+
+TRACKED = {
+    AdRequest: ('status', 'payment', 'influencer_id', 'sponsor_id'),
+    Campaign: ('is_public', 'budget', 'sponsor_id'),
+}
+
+
+def _load_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Make sure the previous value of every tracked column is loaded before it is
+# overwritten, otherwise its old contribution could not be subtracted.
+for model, attributes in TRACKED.items():
+    for attribute in attributes:
+        event.listen(getattr(model, attribute), 'set', _load_old_value,
+                     active_history=True, retval=True)
+
+
+class Deltas:
+    def __init__(self):
+        self.stats = defaultdict(float)
+        self.sponsors = defaultdict(lambda: defaultdict(float))
+        self.influencers = defaultdict(lambda: defaultdict(float))
+        self.pairs = defaultdict(int)
+
+    def ad_request(self, sign, status, payment, influencer_id, sponsor_id):
+        self.stats['adrequests'] += sign
+        if status is not None:
+            self.stats[f'adrequests_{status}'] += sign
+        earnings = sign * float(payment or 0) if status == 'accepted' else 0
+        for rollup, key in ((self.sponsors, sponsor_id), (self.influencers, influencer_id)):
+            if key is None:
+                continue
+            rollup[key]['adrequests'] += sign
+            if status in STATUSES:
+                rollup[key][status] += sign
+        if influencer_id is not None:
+            self.influencers[influencer_id]['earnings'] += earnings
+        if sponsor_id is not None and influencer_id is not None:
+            self.pairs[(sponsor_id, influencer_id)] += sign
+
+    def campaign(self, sign, is_public, budget, sponsor_id):
+        self.stats['campaigns_public' if is_public else 'campaigns_private'] += sign
+        self.sponsors[sponsor_id]['campaigns'] += sign
+        self.sponsors[sponsor_id]['budget_total'] += sign * float(budget or 0)
+
+
+def _values(obj, attributes, old):
+    state = inspect(obj)
+    values = []
+    for attribute in attributes:
+        history = state.attrs[attribute].history
+        if old and history.deleted:
+            values.append(history.deleted[0])
+        else:
+            values.append(getattr(obj, attribute))
+    return values
+
+
+def _contribute(deltas, obj, sign, old):
+    if isinstance(obj, AdRequest):
+        deltas.ad_request(sign, *_values(obj, TRACKED[AdRequest], old))
+    elif isinstance(obj, Campaign):
+        deltas.campaign(sign, *_values(obj, TRACKED[Campaign], old))
+    elif isinstance(obj, Influencer):
+        deltas.stats['influencers'] += sign
+    elif isinstance(obj, Sponsor):
+        deltas.stats['sponsors'] += sign
+
+
+def _insert(connection):
+    # Imported here so the PostgreSQL dialect only loads when it is in use.
+    if connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _upsert(connection, model, keys, values, returning=None):
+    values = {name: value for name, value in values.items() if value}
+    if not values:
+        return
+    table = model.__table__
+    touched = {'updated_at': datetime.utcnow()} if 'updated_at' in table.c else {}
+    statement = _insert(connection)(table).values(**keys, **values, **touched)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={**{name: table.c[name] + statement.excluded[name] for name in values}, **touched},
+    )
+    if returning is None:
+        connection.execute(statement)
+        return
+    return connection.execute(statement.returning(table.c[returning])).scalar_one()
+
+
+def _apply(connection, deltas):
+    for (sponsor_id, influencer_id), delta in deltas.pairs.items():
+        if not delta:
+            continue
+        # The pair's count as this upsert left it, so that of two transactions
+        # adding the first request of a pair at once only one counts it.
+        after = _upsert(connection, SponsorInfluencerRollup,
+                        {'sponsor_id': sponsor_id, 'influencer_id': influencer_id},
+                        {'adrequests': delta}, returning='adrequests')
+        before = after - delta
+        if before <= 0 < after:
+            deltas.sponsors[sponsor_id]['influencers'] += 1
+        elif after <= 0 < before:
+            deltas.sponsors[sponsor_id]['influencers'] -= 1
+
+    for key, delta in deltas.stats.items():
+        _upsert(connection, StatsRollup, {'key': key}, {'value': delta})
+    for sponsor_id, values in deltas.sponsors.items():
+        _upsert(connection, SponsorRollup, {'sponsor_id': sponsor_id}, values)
+    for influencer_id, values in deltas.influencers.items():
+        _upsert(connection, InfluencerRollup, {'influencer_id': influencer_id}, values)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _update_rollups(session, flush_context):
+    deltas = Deltas()
+    with session.no_autoflush:
+        for obj in session.new:
+            _contribute(deltas, obj, +1, old=False)
+        for obj in session.dirty:
+            if session.is_modified(obj):
+                _contribute(deltas, obj, -1, old=True)
+                _contribute(deltas, obj, +1, old=False)
+        for obj in session.deleted:
+            _contribute(deltas, obj, -1, old=True)
+    _apply(session.connection(), deltas)
+
+
+def inserted(connection, model, rows):
+    """Count rows inserted through Core, which the flush hook does not see.
+
+    ``rows`` are the inserted values, as dicts.
+    """
+    deltas = Deltas()
+    for row in rows:
+        if model is AdRequest:
+            deltas.ad_request(+1, *(row.get(name) for name in TRACKED[AdRequest]))
+        elif model is Campaign:
+            deltas.campaign(+1, *(row.get(name) for name in TRACKED[Campaign]))
+        elif model is Influencer:
+            deltas.stats['influencers'] += 1
+        elif model is Sponsor:
+            deltas.stats['sponsors'] += 1
+    _apply(connection, deltas)
+
+
+def _status_counts(key_column):
+    counts = [func.count(AdRequest.id).label('adrequests')]
+    for status in STATUSES:
+        counts.append(func.sum(case((AdRequest.status == status, 1), else_=0)).label(status))
+    return select(key_column, *counts).where(key_column.isnot(None)).group_by(key_column)
+
+
+def rebuild(connection):
+    for model in (StatsRollup, SponsorRollup, InfluencerRollup, SponsorInfluencerRollup):
+        connection.execute(model.__table__.delete())
+
+    stats = {
+        'influencers': connection.scalar(select(func.count(Influencer.id))),
+        'sponsors': connection.scalar(select(func.count(Sponsor.id))),
+        'campaigns_public': connection.scalar(
+            select(func.count(Campaign.id)).where(Campaign.is_public == True)),
+        'campaigns_private': connection.scalar(
+            select(func.count(Campaign.id)).where(Campaign.is_public == False)),
+        'adrequests': connection.scalar(select(func.count(AdRequest.id))),
+    }
+    for status, count in connection.execute(
+            select(AdRequest.status, func.count(AdRequest.id))
+            .where(AdRequest.status.isnot(None)).group_by(AdRequest.status)):
+        stats[f'adrequests_{status}'] = count
+    connection.execute(StatsRollup.__table__.insert(),
+                       [{'key': key, 'value': value} for key, value in stats.items()])
+
+    connection.execute(SponsorInfluencerRollup.__table__.insert().from_select(
+        ['sponsor_id', 'influencer_id', 'adrequests'],
+        select(AdRequest.sponsor_id, AdRequest.influencer_id, func.count(AdRequest.id))
+        .where(AdRequest.influencer_id.isnot(None))
+        .group_by(AdRequest.sponsor_id, AdRequest.influencer_id),
+    ))
+
+    earnings = func.sum(case((AdRequest.status == 'accepted', AdRequest.payment), else_=0))
+    connection.execute(InfluencerRollup.__table__.insert().from_select(
+        ['influencer_id', 'adrequests', *STATUSES, 'earnings'],
+        _status_counts(AdRequest.influencer_id).add_columns(earnings),
+    ))
+
+    campaigns = (select(Campaign.sponsor_id, func.count(Campaign.id).label('campaigns'),
+                        func.sum(Campaign.budget).label('budget_total'))
+                 .group_by(Campaign.sponsor_id).subquery())
+    requests = _status_counts(AdRequest.sponsor_id).subquery()
+    pairs = (select(SponsorInfluencerRollup.sponsor_id,
+                    func.count(SponsorInfluencerRollup.influencer_id).label('influencers'))
+             .group_by(SponsorInfluencerRollup.sponsor_id).subquery())
+    connection.execute(SponsorRollup.__table__.insert().from_select(
+        ['sponsor_id', 'campaigns', 'budget_total', 'influencers', 'adrequests', *STATUSES],
+        select(
+            Sponsor.id,
+            func.coalesce(campaigns.c.campaigns, 0),
+            func.coalesce(campaigns.c.budget_total, 0),
+            func.coalesce(pairs.c.influencers, 0),
+            func.coalesce(requests.c.adrequests, 0),
+            *(func.coalesce(requests.c[status], 0) for status in STATUSES),
+        )
+        .outerjoin(campaigns, campaigns.c.sponsor_id == Sponsor.id)
+        .outerjoin(requests, requests.c.sponsor_id == Sponsor.id)
+        .outerjoin(pairs, pairs.c.sponsor_id == Sponsor.id),
+    ))
+
+
+@jobs.task('rollups-rebuild', max_attempts=1)
+def rebuild_job():
+    rebuild(db.session.connection())
+
+
+def init_rollups(app):
+    @app.cli.command('rollups-rebuild')
+    @click.option('--queue', is_flag=True, help='Leave the rebuild to the job worker.')
+    def rollups_rebuild(queue):
+        """Recompute the stats rollup tables from the base tables."""
+        if queue:
+            jobs.enqueue('rollups-rebuild')
+            db.session.commit()
+            click.echo('Stats rollup rebuild queued.')
+            return
+        with db.engine.begin() as connection:
+            rebuild(connection)
+        click.echo('Stats rollups rebuilt.')
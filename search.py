@@ -0,0 +1,173 @@
+import re
+import click
+from sqlalchemy import DDL, bindparam, event, func, literal_column, select, table, column, text
+from models import db, User, Sponsor, Influencer, Campaign
+
+
+# Full-text search over campaigns, influencers and sponsors backed by an
+# SQLite FTS5 table. Each entity gets one row whose rowid is derived from its
+# primary key, so re-indexing an entity is a delete + insert of that rowid.
+# The index is updated in the same transaction as the write that changed it.
+
+KINDS = {'campaign': 1, 'influencer': 2, 'sponsor': 3}
+
+# bm25 weight per column: kind, entity_id, title, description, niche,
+# category, industry. Matches in the title count the most.
+WEIGHTS = (0.0, 0.0, 10.0, 1.0, 3.0, 3.0, 3.0)
+TEXT_COLUMNS = 'title description niche category industry'
+
+CREATE_INDEX = DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    "kind, entity_id UNINDEXED, title, description, niche, "
+    "category, industry, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+
+event.listen(db.metadata, 'after_create', CREATE_INDEX.execute_if(dialect='sqlite'))
+
+# Row source per kind; ``e`` is the indexed entity.
+SOURCES = {
+    'campaign': (
+        "SELECT e.id * 4 + 1, 'campaign', e.id, e.title, e.description, e.niche, '', '' "
+        "FROM campaign e"
+    ),
+    'influencer': (
+        "SELECT e.id * 4 + 2, 'influencer', e.id, u.name, '', e.niche, e.category, '' "
+        "FROM influencers e JOIN users u ON u.id = e.user_id"
+    ),
+    'sponsor': (
+        "SELECT e.id * 4 + 3, 'sponsor', e.id, u.name, '', '', '', e.industry "
+        "FROM sponsors e JOIN users u ON u.id = e.user_id"
+    ),
+}
+
+INSERT = ("INSERT INTO search_index "
+          "(rowid, kind, entity_id, title, description, niche, category, industry) ")
+
+search_index = table('search_index', column('rowid'), column('kind'), column('entity_id'))
+
+
+def enabled(session=None):
+    session = session or db.session
+    return session.get_bind().dialect.name == 'sqlite'
+
+
+def _rowid(kind, entity_id):
+    return entity_id * 4 + KINDS[kind]
+
+
+def match_expression(kind, term):
+    """Turn free text into an FTS5 query for one kind of entity.
+
+    Every word must match as a prefix of a word in one of the text columns.
+    """
+    words = re.findall(r'\w+', term or '')
+    if not words:
+        return ''
+    terms = ' '.join(f'"{word}"*' for word in words)
+    return f'kind : {kind} AND {{{TEXT_COLUMNS}}} : ({terms})'
+
+
+def _remove(connection, kind, ids):
+    if ids:
+        rowids = [_rowid(kind, i) for i in ids]
+        connection.execute(search_index.delete().where(search_index.c.rowid.in_(rowids)))
+
+
+def _reindex(connection, kind, ids):
+    if ids:
+        _remove(connection, kind, ids)
+        statement = text(INSERT + SOURCES[kind] + " WHERE e.id IN :ids")
+        connection.execute(statement.bindparams(bindparam('ids', expanding=True)),
+                           {'ids': list(ids)})
+
+
+@event.listens_for(db.session, 'after_flush')
+def _sync_index(session, flush_context):
+    if not enabled(session):
+        return
+    changed = {kind: set() for kind in KINDS}
+    removed = {kind: set() for kind in KINDS}
+
+    with session.no_autoflush:
+        for obj in list(session.new) + list(session.dirty):
+            if isinstance(obj, Campaign):
+                changed['campaign'].add(obj.id)
+            elif isinstance(obj, Influencer):
+                changed['influencer'].add(obj.id)
+            elif isinstance(obj, Sponsor):
+                changed['sponsor'].add(obj.id)
+            elif isinstance(obj, User):
+                if obj.influencer is not None:
+                    changed['influencer'].add(obj.influencer.id)
+                if obj.sponsor is not None:
+                    changed['sponsor'].add(obj.sponsor.id)
+        for obj in session.deleted:
+            if isinstance(obj, Campaign):
+                removed['campaign'].add(obj.id)
+            elif isinstance(obj, Influencer):
+                removed['influencer'].add(obj.id)
+            elif isinstance(obj, Sponsor):
+                removed['sponsor'].add(obj.id)
+
+    connection = session.connection()
+    for kind in KINDS:
+        _remove(connection, kind, removed[kind])
+        _reindex(connection, kind, changed[kind] - removed[kind] - {None})
+
+
+def inserted(connection, kind, ids):
+    """Index rows inserted through Core, which the flush hook does not see."""
+    if connection.dialect.name == 'sqlite':
+        _reindex(connection, kind, ids)
+
+
+def rebuild(connection):
+    connection.execute(CREATE_INDEX)
+    connection.execute(text("DELETE FROM search_index"))
+    for source in SOURCES.values():
+        connection.execute(text(INSERT + source))
+    connection.execute(text("INSERT INTO search_index(search_index) VALUES ('optimize')"))
+
+
+def apply(query, model, term):
+    """Restrict ``query`` to ``model`` rows matching ``term``.
+
+    Returns the filtered query and the columns to order (and paginate) by:
+    best match first, then primary key.
+    """
+    kind = {Campaign: 'campaign', Influencer: 'influencer', Sponsor: 'sponsor'}[model]
+    expression = match_expression(kind, term)
+    if not expression:
+        return query.filter(db.false()), [model.id]
+
+    if not enabled():
+        pattern = f"%{term}%"
+        if model is Campaign:
+            return query.filter(Campaign.title.ilike(pattern)), [model.id]
+        return query.filter(model.user.has(User.name.ilike(pattern))), [model.id]
+
+    hits = (
+        select(
+            search_index.c.entity_id.label('entity_id'),
+            func.bm25(literal_column('search_index'),
+                      *(literal_column(str(w)) for w in WEIGHTS)).label('rank'),
+        )
+        .where(literal_column('search_index').op('MATCH')(expression))
+        .subquery('hits')
+    )
+    query = query.join(hits, hits.c.entity_id == model.id)
+    return query, [hits.c.rank, model.id]
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Keep Alembic autogenerate away from the FTS5 table and its shadow tables."""
+    return not (type_ == 'table' and name.startswith('search_index'))
+
+
+def init_search(app):
+    @app.cli.command('search-rebuild')
+    def search_rebuild():
+        """Rebuild the full-text search index from the database."""
+        with db.engine.begin() as connection:
+            rebuild(connection)
+        click.echo('Search index rebuilt.')
@@ -0,0 +1,327 @@
+import json
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.sessions import SecureCookieSession, SessionInterface, session_json_serializer
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeout
+from models import db, LoginSession
+import jobs
+
+
+# Server-side sessions. The cookie only carries a random session id; the
+# session itself (user_id, username, user_role, pending flash messages) is
+# kept in SESSION_BACKEND: 'sql' (the login_sessions table) or 'redis' (a
+# Redis-compatible server at SESSION_URL, needs the redis package). None
+# falls back to Flask's signed-cookie sessions. Because the server holds the
+# session, revoke() can end every session of a user at once, which the admin
+# does when flagging an account.
+#
+# A per-process LRU cache holds recently used sessions for SESSION_CACHE_TTL
+# seconds, so most requests read the session without touching the backend;
+# writes go through to the backend and the cache. With several worker
+# processes, a session changed or revoked through one worker may be served
+# from another worker's cache for up to SESSION_CACHE_TTL.
+#
+# Sessions expire after SESSION_IDLE_TIMEOUT seconds without a request. A
+# request that does not change the session only records that it was seen;
+# those last-seen times are written in one batch every SESSION_TOUCH_INTERVAL
+# seconds. `flask sessions-sweep` (or the sweep-sessions job) deletes
+# expired sessions. Logging in or out issues a new session id. Only a new
+# session is ever inserted: a write to one that is no longer stored (revoked,
+# or expired) is dropped with its cookie, so a request still holding it
+# cannot bring it back.
+
+log = logging.getLogger('connetify.sessions')
+
+
+class ServerSession(SecureCookieSession):
+    def __init__(self, initial=None, sid=None, user_id=None):
+        super().__init__(initial)
+        self.sid = sid
+        self.user_id = user_id
+
+
+class SQLBackend:
+    # A dropped connection, a lock timeout or an exhausted pool.
+    errors = (DBAPIError, PoolTimeout)
+
+    def __init__(self):
+        self.table = LoginSession.__table__
+
+    def load(self, sid, now):
+        with db.engine.connect() as connection:
+            row = connection.execute(
+                select(self.table.c.data, self.table.c.user_id)
+                .where(self.table.c.id == sid, self.table.c.expires_at > now)).first()
+        return (row.data, row.user_id) if row else None
+
+    def save(self, sid, data, user_id, now, expires_at, new):
+        values = {'data': data, 'user_id': user_id, 'last_seen': now, 'expires_at': expires_at}
+        with db.engine.begin() as connection:
+            if new:
+                connection.execute(insert(self.table).values(id=sid, created_at=now, **values))
+                return True
+            return connection.execute(update(self.table).where(self.table.c.id == sid)
+                                      .values(**values)).rowcount > 0
+
+    def delete(self, sids):
+        with db.engine.begin() as connection:
+            connection.execute(delete(self.table).where(self.table.c.id.in_(sids)))
+
+    def touch(self, seen, idle_timeout):
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(self.table).where(self.table.c.id == bindparam('sid'))
+                .values(last_seen=bindparam('seen'), expires_at=bindparam('expires')),
+                [{'sid': sid, 'seen': at, 'expires': at + idle_timeout}
+                 for sid, at in seen.items()])
+
+    def revoke(self, user_id):
+        with db.engine.begin() as connection:
+            connection.execute(delete(self.table).where(self.table.c.user_id == user_id))
+
+    def sweep(self, now):
+        with db.engine.begin() as connection:
+            return connection.execute(
+                delete(self.table).where(self.table.c.expires_at <= now)).rowcount
+
+
+class RedisBackend:
+    # session:<sid> holds the session with a TTL; session-user:<user id> is
+    # the set of that user's session ids, for revoke().
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.errors = (redis.RedisError,)
+
+    def load(self, sid, now):
+        value = self.client.get(f'session:{sid}')
+        if value is None:
+            return None
+        value = json.loads(value)
+        return value['data'], value['user_id']
+
+    def save(self, sid, data, user_id, now, expires_at, new):
+        # XX: an existing session is only written while it is still there.
+        saved = self.client.set(f'session:{sid}', json.dumps({'data': data, 'user_id': user_id}),
+                                exat=int(expires_at.timestamp()), xx=not new)
+        if saved and user_id is not None:
+            self.client.sadd(f'session-user:{user_id}', sid)
+        return bool(saved)
+
+    def delete(self, sids):
+        self.client.delete(*[f'session:{sid}' for sid in sids])
+
+    def touch(self, seen, idle_timeout):
+        pipeline = self.client.pipeline(transaction=False)
+        for sid, at in seen.items():
+            pipeline.expireat(f'session:{sid}', int((at + idle_timeout).timestamp()))
+        pipeline.execute()
+
+    def revoke(self, user_id):
+        sids = self.client.smembers(f'session-user:{user_id}')
+        self.client.delete(f'session-user:{user_id}', *[f'session:{sid.decode()}' for sid in sids])
+
+    def sweep(self, now):
+        # Sessions expire by themselves; drop their ids from the user sets.
+        removed = 0
+        for key in self.client.scan_iter(match='session-user:*', count=1000):
+            sids = list(self.client.smembers(key))
+            pipeline = self.client.pipeline(transaction=False)
+            for sid in sids:
+                pipeline.exists(f'session:{sid.decode()}')
+            gone = [sid for sid, alive in zip(sids, pipeline.execute()) if not alive]
+            if gone:
+                removed += self.client.srem(key, *gone)
+        return removed
+
+
+class SessionStore:
+    """The backend with the LRU cache and the batched last-seen writes in front."""
+
+    def __init__(self, backend, size, ttl, idle_timeout, touch_interval):
+        self.backend = backend
+        self.size = size
+        self.ttl = ttl
+        self.idle_timeout = timedelta(seconds=idle_timeout)
+        self.touch_interval = touch_interval
+        # sid -> (cached until, data, user id, expires at)
+        self.cache = OrderedDict()
+        self.seen = {}
+        self.next_touch = time.monotonic() + touch_interval
+        self.lock = threading.Lock()
+
+    def _cache(self, sid, data, user_id, expires_at):
+        if not self.ttl:
+            return
+        with self.lock:
+            self.cache[sid] = (time.monotonic() + self.ttl, data, user_id, expires_at)
+            self.cache.move_to_end(sid)
+            while len(self.cache) > self.size:
+                self.cache.popitem(last=False)
+
+    def load(self, sid):
+        now = datetime.utcnow()
+        with self.lock:
+            entry = self.cache.get(sid)
+            if entry is not None:
+                if entry[0] >= time.monotonic() and entry[3] > now:
+                    self.cache.move_to_end(sid)
+                    return entry[1], entry[2]
+                del self.cache[sid]
+        found = self.backend.load(sid, now)
+        if found is not None:
+            self._cache(sid, found[0], found[1], now + self.idle_timeout)
+        return found
+
+    def save(self, sid, data, user_id, new=False):
+        """Write the session; False if it is gone (revoked or expired) and was not saved."""
+        now = datetime.utcnow()
+        saved = self.backend.save(sid, data, user_id, now, now + self.idle_timeout, new)
+        with self.lock:
+            self.seen.pop(sid, None)
+            if not saved:
+                self.cache.pop(sid, None)
+        if saved:
+            self._cache(sid, data, user_id, now + self.idle_timeout)
+        return saved
+
+    def delete(self, sid):
+        with self.lock:
+            self.cache.pop(sid, None)
+            self.seen.pop(sid, None)
+        self.backend.delete([sid])
+
+    def mark_seen(self, sid):
+        with self.lock:
+            self.seen[sid] = datetime.utcnow()
+            if time.monotonic() < self.next_touch:
+                return
+            seen, self.seen = self.seen, {}
+            self.next_touch = time.monotonic() + self.touch_interval
+        try:
+            self.backend.touch(seen, self.idle_timeout)
+        except self.backend.errors:
+            log.warning('could not record %s session last-seen times', len(seen), exc_info=True)
+
+    def revoke(self, user_id):
+        with self.lock:
+            for sid in [sid for sid, entry in self.cache.items() if entry[2] == user_id]:
+                del self.cache[sid]
+                self.seen.pop(sid, None)
+        self.backend.revoke(user_id)
+
+
+class ServerSessionInterface(SessionInterface):
+    serializer = session_json_serializer
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            try:
+                found = self.store.load(sid)
+            except self.store.backend.errors:
+                log.warning('session store unavailable, starting an empty session', exc_info=True)
+                found = None
+            if found is not None:
+                return ServerSession(self.serializer.loads(found[0]), sid, found[1])
+        return ServerSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.sid is not None:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       httponly=self.get_cookie_httponly(app),
+                                       samesite=self.get_cookie_samesite(app))
+            return
+
+        if not session.modified:
+            self.store.mark_seen(session.sid)
+            if not self.should_set_cookie(app, session):
+                return
+        else:
+            # A new id whenever someone logs in or out, so an id handed out
+            # before login (or leaked after logout) is worth nothing.
+            user_id = session.get('user_id')
+            if session.sid is not None and user_id != session.user_id:
+                self.store.delete(session.sid)
+                session.sid = None
+            new = session.sid is None
+            if new:
+                session.sid = secrets.token_urlsafe(32)
+            session.user_id = user_id
+            if not self.store.save(session.sid, self.serializer.dumps(dict(session)), user_id,
+                                   new):
+                # Revoked (or expired) while this request ran: a write must
+                # not bring it back.
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       httponly=self.get_cookie_httponly(app),
+                                       samesite=self.get_cookie_samesite(app))
+                return
+
+        response.set_cookie(name, session.sid, expires=self.get_expiration_time(app, session),
+                            httponly=self.get_cookie_httponly(app), domain=domain, path=path,
+                            secure=self.get_cookie_secure(app),
+                            samesite=self.get_cookie_samesite(app))
+
+
+def revoke(user_id):
+    """Log ``user_id`` out everywhere; a no-op with cookie sessions."""
+    store = current_app.extensions.get('sessions')
+    if store is None:
+        return
+    try:
+        store.revoke(user_id)
+    except store.backend.errors:
+        log.error('could not revoke the sessions of user %s', user_id, exc_info=True)
+
+
+def sweep():
+    store = current_app.extensions.get('sessions')
+    return store.backend.sweep(datetime.utcnow()) if store is not None else 0
+
+
+@jobs.task('sweep-sessions', max_attempts=1)
+def _sweep_sessions():
+    log.info('swept %s expired sessions', sweep())
+
+
+def init_sessions(app):
+    name = app.config.get('SESSION_BACKEND')
+    if name == 'sql':
+        backend = SQLBackend()
+    elif name == 'redis':
+        backend = RedisBackend(app.config['SESSION_URL'])
+    elif name:
+        raise ValueError(f'Unknown SESSION_BACKEND {name!r}')
+    if name:
+        store = SessionStore(backend, app.config.get('SESSION_CACHE_SIZE', 10000),
+                             app.config.get('SESSION_CACHE_TTL', 5),
+                             app.config.get('SESSION_IDLE_TIMEOUT', 7 * 24 * 3600),
+                             app.config.get('SESSION_TOUCH_INTERVAL', 60))
+        app.extensions['sessions'] = store
+        app.session_interface = ServerSessionInterface(store)
+
+    @app.cli.command('sessions-sweep')
+    def sessions_sweep():
+        """Delete expired server-side sessions."""
+        click.echo(f'Deleted {sweep()} expired sessions.')
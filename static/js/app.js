@@ -0,0 +1,4 @@
+// Hide alerts after 3 seconds
+setTimeout(function () {
+  $(".alert").alert("close");
+}, 3000);
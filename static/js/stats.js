@@ -0,0 +1,82 @@
+// The stats pages. The numbers come from the stats API named by the
+// page's [data-stats-url] element: every [data-stat] element is filled from
+// the payload and the charts are drawn, again every data-stats-refresh
+// milliseconds without reloading the page. data-stats-charts picks the
+// charts from RENDERERS.
+var charts = {};
+
+function drawChart(id, type, data, options) {
+  if (charts[id]) {
+    charts[id].data = data;
+    charts[id].update();
+    return;
+  }
+  var ctx = document.getElementById(id).getContext("2d");
+  charts[id] = new Chart(ctx, { type: type, data: data, options: options });
+}
+
+function countAxis() {
+  return {
+    responsive: true,
+    scales: {
+      y: {
+        beginAtZero: true,
+        ticks: {
+          stepSize: 1, // Ensure y-axis increments by 1
+        },
+      },
+    },
+  };
+}
+
+var RENDERERS = {
+  // Admin and sponsor stats.
+  campaigns: function (stats) {
+    drawChart("budgetUtilizationChart", "pie", stats.budget_utilization_data, {
+      responsive: true,
+    });
+    drawChart("campaignStatusChart", "bar", stats.campaign_status_data, countAxis());
+    drawChart("influencerReachChart", "line", stats.influencer_reach_data, {
+      responsive: true,
+      scales: {
+        y: {
+          beginAtZero: true,
+        },
+      },
+    });
+  },
+  influencer: function (stats) {
+    drawChart("adRequestsChart", "bar", stats.adrequests_by_status, countAxis());
+    drawChart("earningsChart", "pie", stats.earnings_by_campaign, {
+      responsive: true,
+    });
+  },
+};
+
+function loadStats(url, render, interval) {
+  function refresh() {
+    fetch(url, { credentials: "same-origin" })
+      .then(function (response) {
+        return response.ok ? response.json() : null;
+      })
+      .then(function (stats) {
+        if (!stats) {
+          return;
+        }
+        document.querySelectorAll("[data-stat]").forEach(function (element) {
+          element.textContent = stats[element.dataset.stat];
+        });
+        render(stats);
+      });
+  }
+  refresh();
+  setInterval(refresh, interval);
+}
+
+document.querySelectorAll("[data-stats-url]").forEach(function (element) {
+  loadStats(
+    element.dataset.statsUrl,
+    RENDERERS[element.dataset.statsCharts],
+    Number(element.dataset.statsRefresh)
+  );
+});
@@ -0,0 +1,171 @@
+from flask import current_app
+from sqlalchemy import func, select
+from models import (db, User, Sponsor, Influencer, Campaign, AdRequest, StatsRollup, SponsorRollup,
+                    InfluencerRollup, SponsorInfluencerRollup)
+
+
+# Data for the three stats dashboards. The counters come from the rollup
+# tables maintained by rollups.py, so a dashboard reads a fixed number of rows
+# however many campaigns and ad requests exist. Charts that plot one bar per
+# campaign or influencer show the top STATS_CHART_LIMIT entries.
+#
+# The *_version functions select the newest updated_at among the rows each
+# dashboard is built from, so the stats API can answer an unchanged dashboard
+# with 304 after one statement of index lookups. Influencer and user changes are
+# tracked table-wide since any of them may appear in a chart.
+
+PALETTE = ['#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF', '#FF9F40']
+
+
+def _chart_limit():
+    return current_app.config.get('STATS_CHART_LIMIT', 20)
+
+
+def _rollup(model, key):
+    row = db.session.get(model, key)
+    return row if row is not None else model(**{c.name: 0 for c in model.__table__.columns})
+
+
+def _budget_chart(rows):
+    return {
+        'labels': [title for title, _ in rows],
+        'datasets': [{
+            'label': 'Budget Utilization',
+            'data': [budget for _, budget in rows],
+            'backgroundColor': PALETTE[:len(rows)]
+        }]
+    }
+
+
+def _reach_chart(rows):
+    return {
+        'labels': [name for name, _ in rows],
+        'datasets': [{
+            'label': 'Influencer Reach',
+            'data': [reach for _, reach in rows],
+            'backgroundColor': 'rgba(153, 102, 255, 0.2)',
+            'borderColor': 'rgba(153, 102, 255, 1)',
+            'borderWidth': 1
+        }]
+    }
+
+
+def _status_chart(label, data, labels=('Active', 'Pending', 'Completed'),
+                  colors=('#4BC0C0', '#FF9F40', '#FF6384')):
+    return {
+        'labels': list(labels),
+        'datasets': [{
+            'label': label,
+            'data': list(data),
+            'backgroundColor': list(colors)
+        }]
+    }
+
+
+def _newest(column, *where):
+    return select(func.max(column)).where(*where).scalar_subquery()
+
+
+def admin_stats_version():
+    return select(_newest(StatsRollup.updated_at), _newest(SponsorRollup.updated_at),
+                  _newest(Influencer.updated_at), _newest(User.updated_at))
+
+
+def sponsor_stats_version(user_id):
+    sponsor_id = select(Sponsor.id).where(Sponsor.user_id == user_id).scalar_subquery()
+    return select(_newest(SponsorRollup.updated_at, SponsorRollup.sponsor_id == sponsor_id),
+                  _newest(Campaign.updated_at, Campaign.sponsor_id == sponsor_id),
+                  _newest(Influencer.updated_at), _newest(User.updated_at))
+
+
+def influencer_stats_version(user_id):
+    influencer_id = select(Influencer.id).where(Influencer.user_id == user_id).scalar_subquery()
+    return select(_newest(InfluencerRollup.updated_at,
+                          InfluencerRollup.influencer_id == influencer_id),
+                  _newest(Campaign.updated_at))
+
+
+def admin_stats():
+    counters = dict(db.session.execute(select(StatsRollup.key, StatsRollup.value)).all())
+    counter = lambda key: int(counters.get(key, 0))
+
+    budgets = db.session.execute(
+        select(User.name, SponsorRollup.budget_total)
+        .join(Sponsor, Sponsor.id == SponsorRollup.sponsor_id).join(Sponsor.user)
+        .order_by(SponsorRollup.budget_total.desc()).limit(_chart_limit())
+    ).all()
+    reach = db.session.execute(
+        select(User.name, Influencer.reach_count).join(Influencer.user)
+        .order_by(Influencer.reach_count.desc()).limit(_chart_limit())
+    ).all()
+
+    return {
+        'total_public_campaigns': counter('campaigns_public'),
+        'total_private_campaigns': counter('campaigns_private'),
+        'total_influencers': counter('influencers'),
+        'total_sponsors': counter('sponsors'),
+        'budget_utilization_data': _budget_chart(budgets),
+        'campaign_status_data': _status_chart('AdRequest Status', [
+            counter('adrequests_accepted'), counter('adrequests_pending'),
+            counter('adrequests_completed')]),
+        'influencer_reach_data': _reach_chart(reach),
+    }
+
+
+def sponsor_stats(sponsor_id):
+    rollup = _rollup(SponsorRollup, sponsor_id)
+
+    budgets = db.session.execute(
+        select(Campaign.title, Campaign.budget).where(Campaign.sponsor_id == sponsor_id)
+        .order_by(Campaign.budget.desc()).limit(_chart_limit())
+    ).all()
+    reach = db.session.execute(
+        select(User.name, Influencer.reach_count)
+        .join(SponsorInfluencerRollup, SponsorInfluencerRollup.influencer_id == Influencer.id)
+        .join(Influencer.user)
+        .where(SponsorInfluencerRollup.sponsor_id == sponsor_id,
+               SponsorInfluencerRollup.adrequests > 0)
+        .order_by(SponsorInfluencerRollup.adrequests.desc()).limit(_chart_limit())
+    ).all()
+
+    return {
+        'total_campaigns': rollup.campaigns,
+        'total_influencers': rollup.influencers,
+        'total_adrequests': rollup.adrequests,
+        'budget_utilization_data': _budget_chart(budgets),
+        'campaign_status_data': _status_chart('Campaign Status',
+                                              [rollup.accepted, rollup.pending, rollup.completed],
+                                              labels=('Accepted', 'Pending', 'Completed')),
+        'influencer_reach_data': _reach_chart(reach),
+    }
+
+
+def influencer_stats(influencer_id):
+    rollup = _rollup(InfluencerRollup, influencer_id)
+
+    by_campaign = db.session.execute(
+        select(Campaign.title, func.sum(AdRequest.payment).label('earned'))
+        .join(AdRequest.campaign)
+        .where(AdRequest.influencer_id == influencer_id, AdRequest.status == 'accepted')
+        .group_by(Campaign.id).order_by(func.sum(AdRequest.payment).desc())
+        .limit(_chart_limit())
+    ).all()
+
+    return {
+        'total_adrequests': rollup.adrequests,
+        'accepted_adrequests': rollup.accepted,
+        'completed_adrequests': rollup.completed,
+        'total_earnings': rollup.earnings,
+        'earnings_by_campaign': {
+            'labels': [title for title, _ in by_campaign],
+            'datasets': [{
+                'label': 'Earnings by Campaign',
+                'data': [amount for _, amount in by_campaign],
+                'backgroundColor': PALETTE[:len(by_campaign)]
+            }]
+        },
+        'adrequests_by_status': _status_chart('Ad Requests',
+                                              [rollup.accepted, rollup.pending, rollup.completed],
+                                              labels=('Accepted', 'Pending', 'Completed'),
+                                              colors=('#36A2EB', '#FF6384', '#FFCE56')),
+    }
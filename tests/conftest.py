@@ -0,0 +1,85 @@
+import os
+import sys
+from datetime import datetime, timedelta
+import pytest
+from flask.testing import FlaskClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app
+from models import db, User, Sponsor, Influencer, Campaign
+
+PASSWORD = 'secret'
+
+
+class Client(FlaskClient):
+    def open(self, *args, **kwargs):
+        # A request context would reuse the test's app context, and so its g
+        # and database session; each request gets its own, as when served.
+        with self.application.app_context():
+            return super().open(*args, **kwargs)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}',
+                      'TESTING': True, 'RATE_LIMITS': {}, 'PASSWORD_SCRYPT_COST': 4})
+    app.test_client_class = Client
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _user(username, role):
+    return User(name=username.title(), username=username, email=f'{username}@example.com',
+                password=PASSWORD, user_role=role)
+
+
+@pytest.fixture
+def admin(app):
+    user = _user('admin', 'admin')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def sponsor(app):
+    sponsor = Sponsor(user=_user('sponsor', 'sponsor'), industry='retail')
+    db.session.add(sponsor)
+    db.session.commit()
+    return sponsor
+
+
+@pytest.fixture
+def influencer(app):
+    influencer = Influencer(user=_user('influencer', 'influencer'), category='fashion',
+                            niche='shoes', reach='12K', reach_count=12000)
+    db.session.add(influencer)
+    db.session.commit()
+    return influencer
+
+
+@pytest.fixture
+def campaign(sponsor):
+    campaign = Campaign(sponsor_id=sponsor.id, title='Spring', description='Spring shoes',
+                        niche='shoes', budget=5000, is_public=True,
+                        start_date=datetime.utcnow(),
+                        end_date=datetime.utcnow() + timedelta(days=30))
+    db.session.add(campaign)
+    db.session.commit()
+    return campaign
+
+
+@pytest.fixture
+def login(client):
+    """Log ``client`` in as ``username`` (made by one of the fixtures above)."""
+    def login(username):
+        response = client.post('/login', data={'username': username, 'password': PASSWORD})
+        assert response.status_code == 302, response.get_data(as_text=True)
+    return login
@@ -0,0 +1,29 @@
+from models import db, User, Sponsor
+
+
+def _sponsor(app, client):
+    user = User(name='Sponsor', username='sponsor', email='sponsor@example.com',
+                password='secret', user_role='sponsor')
+    db.session.add(Sponsor(user=user, industry='retail'))
+    db.session.commit()
+    response = client.post('/login', data={'username': 'sponsor', 'password': 'secret'})
+    assert response.status_code == 302
+
+
+def test_stats_api_needs_a_login_before_revalidating(app):
+    client = app.test_client()
+    response = client.get('/api/stats/admin', headers={'If-None-Match': '*'})
+    assert response.status_code == 401
+    assert 'ETag' not in response.headers
+
+
+def test_stats_api_checks_the_role_before_the_rate_limit(app):
+    app.config['RATE_LIMITS'] = {'stats': {'per_minute': 1, 'burst': 1}}
+    client = app.test_client()
+    _sponsor(app, client)
+    for _ in range(3):
+        assert client.get('/api/stats/admin').status_code == 403
+    response = client.get('/api/stats/sponsor')
+    assert response.status_code == 200
+    assert response.is_json
+    assert client.get('/api/stats/sponsor').status_code == 429
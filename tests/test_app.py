@@ -0,0 +1,26 @@
+import sys
+from app import create_app
+from views import BLUEPRINTS
+
+
+def test_config_layers_apply_in_order(tmp_path, monkeypatch):
+    settings = tmp_path / 'settings.py'
+    settings.write_text("DB_POOL_SIZE = 5\nDB_MAX_OVERFLOW = 5\n")
+    monkeypatch.setenv('CONNETIFY_SETTINGS', str(settings))
+    monkeypatch.setenv('CONNETIFY_DB_MAX_OVERFLOW', '7')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'DB_POOL_TIMEOUT': 3})
+    assert app.config['DB_POOL_SIZE'] == 5
+    assert app.config['DB_MAX_OVERFLOW'] == 7
+    assert app.config['DB_POOL_TIMEOUT'] == 3
+
+
+def test_every_area_has_its_blueprint(app):
+    assert set(BLUEPRINTS) <= set(app.blueprints)
+    assert app.url_map.bind('').match('/login') == ('auth.login', {})
+
+
+def test_workers_skip_migrations(monkeypatch):
+    monkeypatch.delenv('FLASK_RUN_FROM_CLI', raising=False)
+    sys.modules.pop('flask_migrate', None)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+    assert 'migrate' not in app.extensions and 'flask_migrate' not in sys.modules
@@ -0,0 +1,59 @@
+import shutil
+import pytest
+import assets
+
+SCRIPT = r"""// a comment
+var a = `one
+    // kept, inside a template literal
+  two`;   /* gone */
+var b = "http://example.com/x", c = /\/\/[a-z/]+/g, d = b.length / 2;
+"""
+
+
+def test_minify_js_leaves_literals_alone():
+    assert assets.minify_js(SCRIPT) == (
+        'var a = `one\n    // kept, inside a template literal\n  two`;\n'
+        'var b = "http://example.com/x", c = /\\/\\/[a-z/]+/g, d = b.length / 2;\n')
+
+
+def test_minify_css_keeps_selector_spaces():
+    assert assets.minify_css('a :hover , p { color : red ; margin: 0 auto }\n') == (
+        'a :hover,p{color:red;margin:0 auto}\n')
+
+
+def test_missing_vendor_files_come_from_their_cdn(app):
+    with app.test_request_context():
+        for name, url in assets.VENDOR.items():
+            expected = url if name in app.extensions['assets']['cdn'] else f'/static/{name}'
+            assert assets.static_url(name) == expected
+        assert assets.static_url('css/app.css').startswith('/static/')
+
+
+@pytest.fixture
+def static(tmp_path, app):
+    shutil.copytree(app.static_folder, tmp_path / 'static', ignore=shutil.ignore_patterns('dist'))
+    return tmp_path / 'static'
+
+
+def test_build_fails_without_the_vendor_files(static):
+    shutil.rmtree(static / 'vendor', ignore_errors=True)
+    with pytest.raises(assets.MissingVendorFiles):
+        assets.build(str(static))
+    assert not (static / 'dist').exists()
+
+
+def test_built_assets_are_cached_forever(app, static):
+    for name in assets.VENDOR:
+        (static / name).parent.mkdir(exist_ok=True)
+        (static / name).write_text('/* vendored */')
+    app.static_folder = str(static)
+    manifest = app.extensions['assets']['manifest'] = assets.build(str(static))
+
+    with app.test_request_context():
+        url = assets.static_url('css/app.css')
+        assert url == f'/static/{manifest["css/app.css"]}'
+        assert assets.static_url('vendor/bootstrap.min.css').startswith('/static/dist/vendor/')
+    response = app.test_client().get(url)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert not list(static.glob('dist/**/.build-*'))
@@ -0,0 +1,40 @@
+from models import db
+
+
+def test_unchanged_campaign_page_is_not_modified(client, campaign, influencer, login):
+    login('influencer')
+    url = f'/view_campaign/{campaign.id}'
+    # The first page shows the login's flash message, so it is not reusable.
+    assert 'ETag' not in client.get(url).headers
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert response.cache_control.private and response.cache_control.no_cache
+    assert 'Cookie' in response.vary
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+    campaign.title = 'Spring sale'
+    db.session.commit()
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert b'Spring sale' in response.data
+    assert response.headers['ETag'] != etag
+
+
+def test_etag_depends_on_the_viewer(app, campaign, influencer, login, client):
+    login('influencer')
+    url = f'/view_campaign/{campaign.id}'
+    client.get(url)
+    etag = client.get(url).headers['ETag']
+
+    other = app.test_client()
+    response = other.post('/login', data={'username': 'sponsor', 'password': 'secret'})
+    assert response.status_code == 302
+    other.get(url)
+    response = other.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
@@ -0,0 +1,32 @@
+from sqlalchemy import text
+from config import Config
+from models import db
+import database
+
+
+def _config(uri):
+    config = {key: getattr(Config, key) for key in dir(Config) if key.startswith('DB_')}
+    return dict(config, SQLALCHEMY_DATABASE_URI=uri)
+
+
+def test_postgres_gets_a_sized_pool_and_a_statement_timeout():
+    options = database.engine_options(_config('postgresql://connetify@db/connetify'))
+    assert options['poolclass'] is database.TimedQueuePool
+    assert (options['pool_size'], options['max_overflow']) == (10, 20)
+    assert options['pool_pre_ping']
+    assert options['connect_args'] == {'options': '-c statement_timeout=15000'}
+
+
+def test_in_memory_sqlite_keeps_its_default_pool():
+    assert database.engine_options(_config('sqlite://')) == {}
+
+
+def test_sqlite_file_runs_in_wal_mode(app):
+    assert db.session.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+    assert db.session.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+
+
+def test_pool_wait_decays_without_checkouts():
+    pool = database.TimedQueuePool(lambda: None)
+    pool._wait, pool._wait_at = 0.4, 0.0
+    assert pool.recent_wait(now=2 * pool.half_life) == 0.1
@@ -0,0 +1,56 @@
+import csv
+import io
+import json
+import os
+from sqlalchemy import select
+from models import db, AdRequest, Job
+import exports
+import jobs
+
+
+def _ad_requests(campaign, influencer, *statuses):
+    for status in statuses:
+        db.session.add(AdRequest(ad_name=f'Post {status}', description='One post', payment=100,
+                                 campaign_id=campaign.id, influencer_id=influencer.id,
+                                 sponsor_id=campaign.sponsor_id, created_by='sponsor',
+                                 status=status))
+    db.session.commit()
+
+
+def test_export_streams_in_chunks(app, campaign, influencer, monkeypatch):
+    _ad_requests(campaign, influencer, 'accepted', 'pending', 'accepted')
+    monkeypatch.setattr(exports, 'YIELD_PER', 2)
+    chunks = list(exports.generate(exports.statement('adrequests'), 'csv'))
+    assert len(chunks) == 2
+    rows = list(csv.DictReader(io.StringIO(''.join(chunks))))
+    assert [row['status'] for row in rows] == ['accepted', 'pending', 'accepted']
+    assert {row['influencer'] for row in rows} == {'influencer'}
+
+
+def test_admin_downloads_a_filtered_export(client, admin, campaign, influencer, login):
+    _ad_requests(campaign, influencer, 'accepted', 'pending')
+    login('admin')
+    response = client.get('/admin_export/adrequests?format=ndjson&status=accepted&sponsor=sponsor')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert 'attachment' in response.headers['Content-Disposition']
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [(row['ad_name'], row['campaign']) for row in rows] == [('Post accepted', 'Spring')]
+
+    response = client.get('/admin_export/adrequests?from=yesterday')
+    assert response.status_code == 302
+
+
+def test_queued_export_is_written_by_the_worker(app, client, admin, campaign, login, tmp_path):
+    app.config['EXPORT_FOLDER'] = str(tmp_path / 'exports')
+    login('admin')
+    assert client.post('/admin_export/campaigns', data={'format': 'csv'}).status_code == 302
+    job = db.session.scalars(select(Job).filter_by(name='export')).one()
+    filename = json.loads(job.payload)['filename']
+
+    assert jobs.run(jobs.claim('w1'), retry_delay=30)
+    with open(os.path.join(app.config['EXPORT_FOLDER'], filename)) as f:
+        assert [row['title'] for row in csv.DictReader(f)] == ['Spring']
+    assert exports.ready_exports() == [filename]
+    # The admin is told by email, through a job of its own.
+    assert db.session.scalars(select(Job.name).filter_by(status='queued')).all() == ['send-email']
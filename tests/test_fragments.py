@@ -0,0 +1,42 @@
+from models import db
+import fragments
+
+
+def _counts(name):
+    return dict(fragments.metrics.get(name, {'hits': 0, 'misses': 0}))
+
+
+def _misses(client, name):
+    before = _counts(name)
+    page = client.get('/admin_find').get_data(as_text=True)
+    after = _counts(name)
+    return after['misses'] - before['misses'], after['hits'] - before['hits'], page
+
+
+def test_cards_are_reused_until_their_entity_changes(client, admin, campaign, login):
+    login('admin')
+    assert _misses(client, 'admin_campaign_card')[:2] == (1, 0)
+    assert _misses(client, 'admin_campaign_card')[:2] == (0, 1)
+
+    campaign.title = 'Spring sale'
+    db.session.commit()
+    misses, hits, page = _misses(client, 'admin_campaign_card')
+    assert (misses, hits) == (1, 0)
+    assert 'Spring sale' in page
+
+
+def test_rolled_back_change_keeps_the_card(client, admin, campaign, login):
+    login('admin')
+    _misses(client, 'admin_campaign_card')
+    campaign.title = 'Never saved'
+    db.session.flush()
+    db.session.rollback()
+    assert _misses(client, 'admin_campaign_card')[:2] == (0, 1)
+
+
+def test_profiled_pages_report_fragment_hits(app, client, admin, campaign, login):
+    app.config['PROFILER_ENABLED'] = True
+    login('admin')
+    client.get('/admin_find')
+    # The campaign's card and its sponsor's.
+    assert 'frag;desc="2 hits, 0 misses"' in client.get('/admin_find').headers['Server-Timing']
@@ -0,0 +1,56 @@
+import io
+import json
+from sqlalchemy import select
+from models import db, User, Job
+import imports
+import jobs
+import passwords
+
+
+def _stored():
+    return dict(db.session.execute(select(User.username, User.password)).all())
+
+
+def test_import_queues_plaintext_passwords_for_hashing(app):
+    hashed = passwords.make_hasher(app.config).hash('already')
+    stream = io.StringIO(
+        'name,username,email,password,category,niche,reach\n'
+        'Ann,ann,ann@example.com,secret1,fashion,shoes,1000\n'
+        'Bob,bob,bob@example.com,secret2,tech,phones,2000\n'
+        f'Cat,cat,cat@example.com,{hashed},food,baking,300\n'
+        'Dan,dan,dan@example.com,scrypt$4$8$1$..$..,food,baking,300\n')
+
+    report = imports.import_file('influencers', stream, 'csv')
+
+    assert report.imported == 3
+    assert report.hashing == 2
+    assert [line for line, message in report.errors] == [5]
+    # Nothing is hashed during the import itself.
+    stored = _stored()
+    assert (stored['ann'], stored['bob'], stored['cat']) == ('secret1', 'secret2', hashed)
+    job = db.session.execute(select(Job)).scalar_one()
+    user_ids = db.session.execute(select(User.id).where(User.username.in_(['ann', 'bob'])))
+    assert (job.name, sorted(json.loads(job.payload)['user_ids'])) == (
+        'hash-passwords', sorted(user_ids.scalars()))
+
+    assert jobs.run(jobs.claim('w1'), retry_delay=30)
+    stored = _stored()
+    assert stored['cat'] == hashed
+    for username, password in [('ann', 'secret1'), ('bob', 'secret2')]:
+        assert passwords.is_hash(stored[username])
+        user = db.session.execute(select(User).filter_by(username=username)).scalar_one()
+        assert passwords.check_password(user, password)
+
+
+def test_hashing_job_leaves_a_changed_password_alone(app):
+    stream = io.StringIO('name,username,email,password,category,niche,reach\n'
+                         'Ann,ann,ann@example.com,secret1,fashion,shoes,1000\n')
+    imports.import_file('influencers', stream, 'csv')
+    user = db.session.execute(select(User).filter_by(username='ann')).scalar_one()
+    # Signing in before the job runs rehashes the password already.
+    assert passwords.check_password(user, 'secret1')
+    db.session.commit()
+    rehashed = user.password
+
+    assert jobs.run(jobs.claim('w1'), retry_delay=30)
+    assert _stored()['ann'] == rehashed
@@ -0,0 +1,95 @@
+import threading
+from datetime import datetime, timedelta
+from models import db, Job
+import jobs
+
+CRASHES = []
+
+
+@jobs.task('test-crash', max_attempts=2)
+def _crash():
+    CRASHES.append(1)
+
+
+def _worker_dies(worker):
+    """Claim the job and leave it running, as if the worker was killed."""
+    job = jobs.claim(worker)
+    db.session.execute(db.update(Job).where(Job.id == job.id)
+                       .values(locked_at=datetime.utcnow() - timedelta(hours=1)))
+    db.session.commit()
+    return job
+
+
+def test_sweep_counts_a_dead_worker_as_a_failed_attempt(app):
+    jobs.enqueue('test-crash')
+    db.session.commit()
+
+    job = _worker_dies('w1')
+    jobs.sweep(timeout=60, keep_days=7, retry_delay=30)
+    job = db.session.get(Job, job.id)
+    assert (job.status, job.attempts, job.locked_by) == ('queued', 1, None)
+    assert job.run_at > datetime.utcnow() + timedelta(seconds=20)
+    assert 'w1' in job.last_error
+
+    # Due again; the second crash uses up max_attempts.
+    job.run_at = datetime.utcnow()
+    db.session.commit()
+    _worker_dies('w2')
+    jobs.sweep(timeout=60, keep_days=7, retry_delay=30)
+    db.session.expire_all()
+    job = db.session.get(Job, job.id)
+    assert (job.status, job.attempts) == ('failed', 2)
+    assert job.finished_at is not None
+    assert jobs.claim('w3') is None
+    assert not CRASHES
+
+
+def test_sweep_leaves_running_jobs_alone(app):
+    jobs.enqueue('test-crash')
+    db.session.commit()
+    job = jobs.claim('w1')
+    jobs.sweep(timeout=60, keep_days=7, retry_delay=30)
+    assert db.session.get(Job, job.id).status == 'running'
+
+
+FLAKY = []
+
+
+@jobs.task('test-flaky', max_attempts=2)
+def _flaky(fail):
+    FLAKY.append(fail)
+    if fail:
+        raise RuntimeError('flaky')
+
+
+def test_failed_job_is_retried_with_backoff_then_fails(app):
+    FLAKY.clear()
+    jobs.enqueue('test-flaky', fail=True)
+    db.session.commit()
+
+    job = jobs.claim('w1')
+    assert not jobs.run(job, retry_delay=30)
+    job = db.session.get(Job, job.id)
+    assert (job.status, job.attempts) == ('queued', 1)
+    assert 'RuntimeError: flaky' in job.last_error
+    # Not due again for retry_delay seconds.
+    assert jobs.claim('w1') is None
+
+    job.run_at = datetime.utcnow()
+    db.session.commit()
+    assert not jobs.run(jobs.claim('w1'), retry_delay=30)
+    db.session.expire_all()
+    assert (db.session.get(Job, job.id).status, FLAKY) == ('failed', [True, True])
+
+
+def test_worker_runs_due_jobs_in_order(app):
+    FLAKY.clear()
+    jobs.enqueue('test-flaky', fail=False, delay=3600)
+    jobs.enqueue('test-flaky', fail=False)
+    jobs.enqueue('test-flaky', fail=True)
+    db.session.commit()
+    config = dict(app.config, JOB_RETRY_DELAY=30)
+    assert jobs.work(config, 'w1', threading.Event(), once=True) == (1, 1)
+    assert FLAKY == [False, True]
+    statuses = db.session.scalars(db.select(Job.status).order_by(Job.id)).all()
+    assert statuses == ['queued', 'done', 'queued']
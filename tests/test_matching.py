@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+from models import db, User, Influencer, Campaign, AdRequest, MatchTerm, CampaignMatch
+import matching
+
+
+def _form(**values):
+    form = {'title': 'Summer', 'description': 'Summer shoes', 'image': '', 'niche': 'shoes',
+            'budget': '1000', 'start_date': '2030-01-01', 'end_date': '2030-02-01',
+            'is_public': 'on'}
+    form.update(values)
+    return form
+
+
+def test_decimal_budget_is_indexed(app, client, sponsor, login):
+    login('sponsor')
+    response = client.post('/add_campaign', data=_form(budget='1500.50'))
+    assert response.status_code == 302
+    assert response.location.endswith('/sponsor_campaigns')
+    campaign = db.session.execute(db.select(Campaign).filter_by(title='Summer')).scalar_one()
+    assert campaign.budget == 1500.5
+
+    response = client.post(f'/update_campaign/{campaign.id}', data=_form(budget='99.5'))
+    assert response.status_code == 302
+    db.session.expire_all()
+    assert db.session.get(Campaign, campaign.id).budget == 99.5
+    weights = db.session.scalars(db.select(MatchTerm.weight).filter_by(
+        kind='campaign', entity_id=campaign.id)).all()
+    assert weights == [99]
+
+
+def _influencer(username, niche, reach_count=1000):
+    influencer = Influencer(user=User(name=username.title(), username=username,
+                                      email=f'{username}@example.com', password='secret',
+                                      user_role='influencer'),
+                            category='sport', niche=niche, reach=str(reach_count),
+                            reach_count=reach_count)
+    db.session.add(influencer)
+    db.session.commit()
+    return influencer
+
+
+def _cached(campaign):
+    return db.session.scalars(db.select(CampaignMatch.influencer_id).filter_by(
+        campaign_id=campaign.id).order_by(CampaignMatch.position)).all()
+
+
+def test_top_matches_are_cached_until_an_influencer_changes(campaign, influencer):
+    _influencer('baker', 'cakes')
+    assert [i.id for i, score in matching.top_matches(campaign)] == [influencer.id]
+    assert _cached(campaign) == [influencer.id]
+
+    # A new influencer sharing a niche word drops the list, and is in the next one.
+    runner = _influencer('runner', 'running shoes', reach_count=500000)
+    assert _cached(campaign) == []
+    assert [i.id for i, score in matching.top_matches(campaign)] == [runner.id, influencer.id]
+
+    runner.is_flagged = True
+    db.session.commit()
+    assert _cached(campaign) == []
+    assert [i.id for i, score in matching.top_matches(campaign)] == [influencer.id]
+
+    # Other edits leave the cache alone.
+    influencer.social_networks = 'instagram'
+    db.session.commit()
+    assert _cached(campaign) == [influencer.id]
+
+
+def test_campaign_niche_change_reranks(campaign, influencer):
+    baker = _influencer('baker', 'cakes')
+    matching.top_matches(campaign)
+    campaign.niche = 'cakes'
+    db.session.commit()
+    assert _cached(campaign) == []
+    assert [i.id for i, score in matching.top_matches(campaign)] == [baker.id]
+
+
+def _campaign(sponsor, title, niche, budget=1000, days=30):
+    campaign = Campaign(sponsor_id=sponsor.id, title=title, description=title, niche=niche,
+                        budget=budget, is_public=True, start_date=datetime.utcnow(),
+                        end_date=datetime.utcnow() + timedelta(days=days))
+    db.session.add(campaign)
+    db.session.commit()
+    return campaign
+
+
+def _feed(app, influencer):
+    with app.test_request_context():
+        return [c.id for c in matching.recommended_campaigns(influencer).items]
+
+
+def test_feed_recommends_open_campaigns_sharing_a_word(app, sponsor, campaign, influencer):
+    _campaign(sponsor, 'Cakes', 'cakes')
+    _campaign(sponsor, 'Old shoes', 'shoes', days=-1)
+    assert _feed(app, influencer) == [campaign.id]
+
+    # A new campaign in the influencer's niche drops the cached feed.
+    bigger = _campaign(sponsor, 'Big shoes', 'shoes', budget=900000)
+    assert _feed(app, influencer) == [bigger.id, campaign.id]
+
+    # Requested campaigns are left out without touching the cache.
+    db.session.add(AdRequest(ad_name='Post', description='One post', payment=100,
+                             campaign_id=bigger.id, influencer_id=influencer.id,
+                             sponsor_id=sponsor.id, created_by='influencer'))
+    db.session.commit()
+    assert _feed(app, influencer) == [campaign.id]
+
+    campaign.is_public = False
+    db.session.commit()
+    assert _feed(app, influencer) == []
@@ -0,0 +1,60 @@
+from datetime import datetime
+from sqlalchemy import func, select, update
+from mail import mail
+from models import db, User, AdRequest, Job, Notification
+import jobs
+import notifications
+
+
+def _pending(count):
+    user = User(name='Ann', username='ann', email='ann@example.com', password='x',
+                user_role='sponsor')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add_all(Notification(user_id=user.id, message=f'update {i}') for i in range(count))
+    db.session.commit()
+
+
+def test_send_digests_sends_each_notification_once(app):
+    _pending(3)
+    with mail.record_messages() as outbox:
+        notifications.send_digests()
+        notifications.send_digests()
+    assert len(outbox) == 1
+    assert outbox[0].body.count('update ') == 3
+    assert db.session.scalar(select(func.count()).select_from(Notification)) == 0
+
+
+def test_send_digests_skips_notifications_claimed_by_another_job(app):
+    _pending(2)
+    db.session.execute(update(Notification).values(claimed_by='other',
+                                                   claimed_at=datetime.utcnow()))
+    db.session.commit()
+    with mail.record_messages() as outbox:
+        notifications.send_digests()
+    assert outbox == []
+    assert db.session.scalar(select(func.count()).select_from(Notification)) == 2
+
+
+def test_request_actions_notify_the_other_party_in_one_digest(app, client, campaign, influencer,
+                                                              login):
+    requests = [AdRequest(ad_name=f'Post {n}', description='One post', payment=100,
+                          campaign_id=campaign.id, influencer_id=influencer.id,
+                          sponsor_id=campaign.sponsor_id, created_by='sponsor')
+                for n in range(2)]
+    db.session.add_all(requests)
+    db.session.commit()
+    login('influencer')
+    client.post(f'/accept_request/{requests[0].id}')
+    client.post(f'/reject_request/{requests[1].id}')
+
+    # One job for the whole window, not one per notification.
+    job = db.session.scalars(select(Job).filter_by(name='send-digests')).one()
+    assert job.run_at > datetime.utcnow()
+    job.run_at = datetime.utcnow()
+    db.session.commit()
+    with mail.record_messages() as outbox:
+        assert jobs.run(jobs.claim('w1'), retry_delay=30)
+    assert [message.recipients for message in outbox] == [['sponsor@example.com']]
+    assert 'accepted the ad request "Post 0"' in outbox[0].body
+    assert 'rejected the ad request "Post 1"' in outbox[0].body
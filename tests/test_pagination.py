@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+import pytest
+from werkzeug.exceptions import BadRequest
+from models import db, Campaign
+from pagination import paginate
+
+
+@pytest.fixture
+def campaigns(sponsor):
+    # Budgets repeat, so sorting by budget alone would not say where a page ends.
+    rows = [Campaign(sponsor_id=sponsor.id, title=f'C{n}', description='', niche='shoes',
+                     budget=n % 3, is_public=True, start_date=datetime.utcnow(),
+                     end_date=datetime.utcnow() + timedelta(days=30)) for n in range(7)]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def _page(app, cursor=None, **kwargs):
+    query = {'per_page': 3, **({'cursor': cursor} if cursor else {})}
+    with app.test_request_context('/', query_string=query):
+        page = paginate(Campaign.query, Campaign.budget, Campaign.id, **kwargs)
+        return [c.title for c in page], page.next_cursor, page.prev_cursor
+
+
+def test_pages_walk_forward_and_back(app, campaigns):
+    expected = [c.title for c in sorted(campaigns, key=lambda c: (c.budget, c.id))]
+    first, cursor, prev = _page(app)
+    assert (first, prev) == (expected[:3], None)
+    second, cursor, back = _page(app, cursor)
+    assert second == expected[3:6]
+    third, end, _ = _page(app, cursor)
+    assert (third, end) == (expected[6:], None)
+
+    assert _page(app, back)[0] == first
+
+
+def test_rows_added_while_paging_do_not_shift_the_pages(app, sponsor, campaigns):
+    first, cursor, _ = _page(app, descending=True)
+    # A new campaign sorting before the cursor appears on no later page.
+    db.session.add(Campaign(sponsor_id=sponsor.id, title='New', description='', niche='shoes',
+                            budget=99, is_public=True, start_date=datetime.utcnow(),
+                            end_date=datetime.utcnow() + timedelta(days=30)))
+    db.session.commit()
+    second, _, _ = _page(app, cursor, descending=True)
+    assert 'New' not in second
+    assert not set(first) & set(second)
+
+
+def test_bad_cursor_is_a_bad_request(app, campaigns):
+    with pytest.raises(BadRequest):
+        _page(app, 'not-a-cursor')
@@ -0,0 +1,50 @@
+import builtins
+import pytest
+from models import User
+import passwords
+
+GOOD = passwords.ScryptHasher(4).hash('secret')
+
+
+MALFORMED = [
+    'scrypt$x$8$1$c2FsdA$a2V5',
+    'scrypt$4$8$1$..$..',
+    'scrypt$4$8$1$c2FsdA$a2V5a',
+    'scrypt$99$8$1$c2FsdA$a2V5',
+    'scrypt$4$0$1$c2FsdA$a2V5',
+]
+
+
+@pytest.mark.parametrize('stored', MALFORMED)
+def test_malformed_scrypt_hash_is_not_a_hash(stored):
+    assert not passwords.is_hash(stored)
+
+
+def test_malformed_scrypt_hash_does_not_verify(app):
+    stored = 'scrypt$4$8$1$abcde$' + GOOD.split('$')[5]
+    assert not passwords.check_password(User(password=stored), 'secret')
+    assert not passwords.ScryptHasher(4).verify(stored, 'secret')
+
+
+@pytest.mark.parametrize('stored', MALFORMED + ['$argon2id$garbage'])
+def test_malformed_hash_is_not_its_own_password(app, stored):
+    assert not passwords.check_password(User(password=stored), stored)
+
+
+def test_scrypt_hash_verifies(app):
+    assert passwords.is_hash(GOOD)
+    assert passwords.check_password(User(password=GOOD), 'secret')
+    assert not passwords.check_password(User(password=GOOD), 'wrong')
+
+
+def test_argon2_hash_without_argon2_installed(app, monkeypatch):
+    real_import = builtins.__import__
+
+    def no_argon2(name, *args, **kwargs):
+        if name == 'argon2':
+            raise ImportError('No module named argon2')
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, '__import__', no_argon2)
+    stored = '$argon2id$v=19$m=65536,t=3,p=1$c2FsdHNhbHQ$a2V5a2V5a2V5'
+    assert not passwords.check_password(User(password=stored), 'secret')
@@ -0,0 +1,38 @@
+from models import db
+import principal
+
+FLAGGED = 'Your account has been flagged'
+
+
+def test_views_check_the_role(client, influencer, login):
+    response = client.get('/influencer_dashboard')
+    assert response.status_code == 302 and response.location.endswith('/login')
+    login('influencer')
+    assert client.get('/influencer_dashboard').status_code == 200
+    response = client.get('/sponsor_dashboard')
+    assert response.status_code == 302 and response.location.endswith('/login')
+
+
+def test_principal_is_cached_until_it_changes(client, influencer, login, monkeypatch):
+    loads = []
+    load = principal._load
+    monkeypatch.setattr(principal, '_load', lambda user_id: loads.append(user_id) or load(user_id))
+    login('influencer')
+    assert FLAGGED not in client.get('/influencer_dashboard').get_data(as_text=True)
+    client.get('/influencer_profile')
+    assert loads == [influencer.user_id]
+
+    # Flagging the profile drops the cached copy, so the next page sees it.
+    influencer.is_flagged = True
+    db.session.commit()
+    assert FLAGGED in client.get('/influencer_dashboard').get_data(as_text=True)
+    assert loads == [influencer.user_id] * 2
+
+
+def test_cache_keeps_the_most_recent_users():
+    cache = principal.PrincipalCache(size=2, ttl=60)
+    for user_id in (1, 2, 3):
+        cache.put(user_id, f'user {user_id}')
+    assert [cache.get(user_id) for user_id in (1, 2, 3)] == [None, 'user 2', 'user 3']
+    cache.drop([2])
+    assert cache.get(2) is None
@@ -0,0 +1,28 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+from app import create_app
+from models import db
+import profiler
+
+
+def test_failed_statement_is_not_left_timing(app):
+    connection = db.session.connection()
+    with pytest.raises(OperationalError):
+        db.session.execute(db.text('SELECT * FROM no_such_table'))
+    assert connection.info['statement_start'] == []
+
+
+def test_slow_query_log_is_added_once(tmp_path):
+    path = tmp_path / 'slow.log'
+    before = list(profiler.slow_query_log.handlers)
+    try:
+        for _ in range(2):
+            create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'TESTING': True,
+                        'RATE_LIMITS': {}, 'PROFILER_SLOW_QUERY_LOG': str(path)})
+        added = [handler for handler in profiler.slow_query_log.handlers if handler not in before]
+        assert len(added) == 1
+    finally:
+        for handler in profiler.slow_query_log.handlers[:]:
+            if handler not in before:
+                profiler.slow_query_log.removeHandler(handler)
+                handler.close()
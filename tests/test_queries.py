@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from models import db, User, Sponsor, Influencer, Campaign
+import queries
+
+
+def _add_accounts(count, start=0):
+    for n in range(start, start + count):
+        sponsor = Sponsor(user=User(name=f'S{n}', username=f's{n}', email=f's{n}@example.com',
+                                    password='secret', user_role='sponsor'), industry='retail')
+        db.session.add(sponsor)
+        db.session.add(Influencer(user=User(name=f'I{n}', username=f'i{n}',
+                                            email=f'i{n}@example.com', password='secret',
+                                            user_role='influencer'),
+                                  category='sport', niche='running', reach='100', reach_count=100))
+        db.session.flush()
+        db.session.add(Campaign(sponsor_id=sponsor.id, title=f'C{n}', description='Run',
+                                niche='running', budget=100, is_public=True,
+                                start_date=datetime.utcnow(),
+                                end_date=datetime.utcnow() + timedelta(days=30)))
+    db.session.commit()
+
+
+def _statements(client, url):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        assert client.get(url).status_code == 200
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    return len(statements)
+
+
+def test_list_pages_cost_the_same_however_many_rows(client, admin, login):
+    _add_accounts(2)
+    login('admin')
+    client.get('/admin_find')
+    few = _statements(client, '/admin_find')
+    _add_accounts(10, start=2)
+    assert _statements(client, '/admin_find') == few
+
+
+def test_view_over_its_budget_fails(app, client, admin, login):
+    login('admin')
+    app.config.update(QUERY_BUDGET_ENFORCE=True, QUERY_BUDGET=1)
+    with pytest.raises(queries.QueryBudgetExceeded):
+        client.get('/admin_find')
+    # A view with a budget of its own (None: unlimited) is left alone.
+    assert client.get('/admin_import').status_code == 200
@@ -0,0 +1,17 @@
+from models import db, AdRequest
+import query_plans
+
+
+def test_view_queries_use_an_index(campaign, influencer):
+    db.session.add(AdRequest(ad_name='Post', description='One post', payment=100,
+                             campaign_id=campaign.id, influencer_id=influencer.id,
+                             sponsor_id=campaign.sponsor_id, created_by='sponsor'))
+    db.session.commit()
+    # No ANALYZE: statistics from a row or two would make SQLite prefer scans.
+
+    failures = {}
+    for name, statement in query_plans.view_queries().items():
+        scans, plan = query_plans.full_scans(statement)
+        if scans:
+            failures[name] = plan
+    assert failures == {}
@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+import ratelimit
+
+
+@pytest.fixture(params=['memory', 'sql'])
+def limited(request, app):
+    if request.param == 'sql':
+        app.extensions['ratelimit']['backend'] = ratelimit.SQLBackend()
+    app.config['RATE_LIMITS'] = {'stats': {'per_minute': 6, 'burst': 2}}
+    return app.extensions['ratelimit']['backend']
+
+
+def test_bucket_empties_and_refills(limited):
+    takes = [limited.take('k', 0.1, 2, now) for now in (100, 100, 100)]
+    assert takes == [2, 1, 0]
+    # 0.1 tokens a second: one more after ten seconds.
+    assert limited.take('k', 0.1, 2, 110) == pytest.approx(1)
+    assert limited.take('k', 0.1, 2, 110) == pytest.approx(0)
+    assert limited.take('other', 0.1, 2, 110) == 2
+
+
+def test_client_over_its_limit_gets_429(app, limited, sponsor, influencer, login, client):
+    login('sponsor')
+    assert [client.get('/sponsor_stats').status_code for _ in range(3)] == [200, 200, 429]
+    response = client.get('/sponsor_stats')
+    # A token comes back every ten seconds.
+    assert 1 <= int(response.headers['Retry-After']) <= 10
+
+    # Every client has a bucket of its own.
+    other = app.test_client()
+    other.post('/login', data={'username': 'influencer', 'password': 'secret'})
+    assert other.get('/influencer_stats').status_code == 200
+
+
+def test_requests_pass_when_the_sql_store_fails(app, sponsor, login, client):
+    def locked(*args):
+        raise OperationalError('INSERT', {}, Exception('database is locked'))
+
+    backend = app.extensions['ratelimit']['backend'] = ratelimit.SQLBackend()
+    backend.take = locked
+    app.config['RATE_LIMITS'] = {'stats': {'per_minute': 6, 'burst': 2}}
+    login('sponsor')
+    assert [client.get('/sponsor_stats').status_code for _ in range(3)] == [200, 200, 200]
+
+
+def test_admission_control_sheds_when_full(app, client):
+    state = app.extensions['admission']
+    app.config['ADMISSION_MAX_IN_FLIGHT'] = 2
+    state['in_flight'] = 2
+    response = client.get('/login')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+    state['in_flight'] = 1
+    assert client.get('/login').status_code == 200
+    assert state['in_flight'] == 1
@@ -0,0 +1,38 @@
+import pytest
+from models import db, User, Influencer, parse_reach
+
+
+@pytest.mark.parametrize('text, count', [
+    ('12000', 12000), ('12,000', 12000), (' 15k ', 15000), ('1.5M', 1500000), ('2B', 2000000000),
+])
+def test_parse_reach(text, count):
+    assert parse_reach(text) == count
+
+
+@pytest.mark.parametrize('text', ['', 'lots', '-5', 'nan', 'inf', '1e400'])
+def test_parse_reach_rejects(text):
+    with pytest.raises(ValueError):
+        parse_reach(text)
+
+
+def test_reach_count_follows_reach(influencer):
+    influencer.reach = '1.2M'
+    db.session.commit()
+    assert db.session.get(Influencer, influencer.id, populate_existing=True).reach_count == 1200000
+
+
+def test_sponsor_filters_and_sorts_by_reach(client, sponsor, influencer, login):
+    big = Influencer(user=User(name='Big', username='big', email='big@example.com',
+                               password='secret', user_role='influencer'),
+                     category='sport', niche='running', reach='2M')
+    db.session.add(big)
+    db.session.commit()
+    small, big = f'/view_influencer_details/{influencer.id}"', f'/view_influencer_details/{big.id}"'
+    login('sponsor')
+
+    page = client.get('/sponsor_find?min_reach=1M').get_data(as_text=True)
+    assert big in page and small not in page
+    page = client.get('/sponsor_find?sort=reach').get_data(as_text=True)
+    assert page.index(big) < page.index(small)
+    page = client.get('/sponsor_find?min_reach=lots').get_data(as_text=True)
+    assert 'Reach filters must be numbers' in page
@@ -0,0 +1,82 @@
+from sqlalchemy import select
+from models import (db, AdRequest, StatsRollup, SponsorRollup, InfluencerRollup,
+                    SponsorInfluencerRollup)
+import rollups
+
+
+def _ad_request(campaign, influencer):
+    ad_request = AdRequest(ad_name='Post', description='One post', payment=100,
+                           campaign_id=campaign.id, influencer_id=influencer.id,
+                           sponsor_id=campaign.sponsor_id, created_by='sponsor')
+    db.session.add(ad_request)
+    db.session.commit()
+    return ad_request
+
+
+def _stats():
+    return dict(db.session.execute(select(StatsRollup.key, StatsRollup.value)).all())
+
+
+def _rollup(sponsor_id):
+    return db.session.get(SponsorRollup, sponsor_id, populate_existing=True)
+
+
+def _tables():
+    """Every rollup row, without the timestamps."""
+    tables = {}
+    for model in (StatsRollup, SponsorRollup, InfluencerRollup, SponsorInfluencerRollup):
+        columns = [c for c in model.__table__.c if c.name != 'updated_at']
+        rows = db.session.execute(select(*columns)).all()
+        # Rows left at zero by deletes are the same as no row.
+        tables[model.__tablename__] = sorted(tuple(row) for row in rows if any(row[1:]))
+    return tables
+
+
+def test_changes_keep_the_rollups_equal_to_a_rebuild(campaign, influencer):
+    ad_request = _ad_request(campaign, influencer)
+    ad_request.status = 'accepted'
+    ad_request.payment = 250
+    campaign.budget = 8000
+    campaign.is_public = False
+    db.session.commit()
+
+    stats = _stats()
+    assert (stats['adrequests_accepted'], stats['adrequests_pending']) == (1, 0)
+    assert (stats['campaigns_public'], stats['campaigns_private']) == (0, 1)
+    sponsor = _rollup(campaign.sponsor_id)
+    assert (sponsor.campaigns, sponsor.budget_total, sponsor.accepted) == (1, 8000, 1)
+    assert db.session.get(InfluencerRollup, influencer.id).earnings == 250
+
+    _ad_request(campaign, influencer)
+    db.session.delete(ad_request)
+    db.session.commit()
+    incremental = _tables()
+    rollups.rebuild(db.session.connection())
+    db.session.commit()
+    assert _tables() == incremental
+
+
+def test_sponsor_counts_each_influencer_once(campaign, influencer):
+    first = _ad_request(campaign, influencer)
+    second = _ad_request(campaign, influencer)
+    assert _rollup(campaign.sponsor_id).influencers == 1
+
+    db.session.delete(first)
+    db.session.commit()
+    assert _rollup(campaign.sponsor_id).influencers == 1
+    db.session.delete(second)
+    db.session.commit()
+    assert _rollup(campaign.sponsor_id).influencers == 0
+
+
+def test_request_without_status_has_no_status_key(campaign, influencer):
+    ad_request = _ad_request(campaign, influencer)
+    ad_request.status = None
+    db.session.commit()
+    assert 'adrequests_None' not in _stats()
+
+    incremental = {key: value for key, value in _stats().items() if value}
+    rollups.rebuild(db.session.connection())
+    db.session.commit()
+    assert 'adrequests_None' not in _stats()
+    assert {key: value for key, value in _stats().items() if value} == incremental
@@ -0,0 +1,43 @@
+from models import db, Influencer, Campaign
+import search
+
+
+def _find(model, term):
+    query, order = search.apply(model.query, model, term)
+    return [row.id for row in query.order_by(*order)]
+
+
+def test_search_matches_word_prefixes_best_first(sponsor, campaign, influencer):
+    other = Campaign(sponsor_id=sponsor.id, title='Autumn', description='Boots and shoes',
+                     niche='boots', budget=100, is_public=True,
+                     start_date=campaign.start_date, end_date=campaign.end_date)
+    db.session.add(other)
+    db.session.commit()
+
+    # A title match outranks one in the description.
+    assert _find(Campaign, 'sho') == [campaign.id, other.id]
+    assert _find(Campaign, 'autumn boo') == [other.id]
+    assert _find(Campaign, 'winter') == []
+    assert _find(Campaign, '  ') == []
+    # Kinds are kept apart: an influencer in the shoes niche is not a campaign.
+    assert _find(Influencer, 'shoes') == [influencer.id]
+
+
+def test_index_follows_edits_and_deletes(campaign, influencer):
+    campaign.title, campaign.description = 'Sneaker drop', 'Limited sneakers'
+    influencer.user.name = 'Zoe Runner'
+    db.session.commit()
+    assert _find(Campaign, 'sneaker') == [campaign.id]
+    assert _find(Campaign, 'spring') == []
+    assert _find(Influencer, 'zoe') == [influencer.id]
+
+    db.session.delete(campaign)
+    db.session.commit()
+    assert _find(Campaign, 'sneaker') == []
+
+
+def test_rebuild_restores_the_index(campaign):
+    db.session.execute(db.text('DELETE FROM search_index'))
+    assert _find(Campaign, 'spring') == []
+    search.rebuild(db.session.connection())
+    assert _find(Campaign, 'spring') == [campaign.id]
@@ -0,0 +1,96 @@
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.exc import OperationalError
+from models import db, LoginSession
+import sessions
+
+
+def test_sql_session_store_failure_starts_an_empty_session(app):
+    store = app.extensions['sessions']
+
+    def locked(*args, **kwargs):
+        raise OperationalError('SELECT', {}, Exception('database is locked'))
+
+    store.backend.load = store.backend.touch = locked
+    client = app.test_client()
+    client.set_cookie('session', 'x' * 43)
+    assert client.get('/login').status_code == 200
+
+
+def test_revoked_session_is_not_written_back(app, client, sponsor, login):
+    store = app.extensions['sessions']
+    login('sponsor')
+    sid = client.get_cookie('session').value
+    cached = store.load(sid)
+
+    sessions.revoke(sponsor.user_id)
+    # Another worker still has it cached, and the request flashes a message.
+    store._cache(sid, cached[0], cached[1], datetime.utcnow() + store.idle_timeout)
+    response = client.get('/admin_stats')
+
+    assert response.status_code == 302
+    assert store.backend.load(sid, datetime.utcnow()) is None
+    assert client.get_cookie('session') is None
+    assert not store.save(sid, cached[0], cached[1])
+
+
+def _rows():
+    return dict(db.session.execute(select(LoginSession.id, LoginSession.user_id)).all())
+
+
+def test_login_and_logout_issue_new_server_side_sessions(client, sponsor, login):
+    with client.session_transaction() as session:
+        session['theme'] = 'dark'
+    before = client.get_cookie('session').value
+    assert _rows() == {before: None}
+
+    login('sponsor')
+    sid = client.get_cookie('session').value
+    assert sid != before
+    assert _rows() == {sid: sponsor.user_id}
+
+    client.get('/logout')
+    after = client.get_cookie('session').value
+    assert after not in (before, sid)
+    assert _rows() == {after: None}
+
+
+def test_unchanged_requests_read_the_cache_and_batch_last_seen(app, client, sponsor, login,
+                                                               monkeypatch):
+    store = app.extensions['sessions']
+    login('sponsor')
+    client.get('/sponsor_profile')
+    loads, touches = [], []
+    load = store.backend.load
+    monkeypatch.setattr(store.backend, 'load', lambda *args: loads.append(args) or load(*args))
+    monkeypatch.setattr(store.backend, 'touch', lambda seen, idle: touches.append(dict(seen)))
+
+    for _ in range(3):
+        assert client.get('/sponsor_profile').status_code == 200
+    assert loads == [] and touches == []
+
+    store.next_touch = 0
+    client.get('/sponsor_profile')
+    assert list(touches[0]) == [client.get_cookie('session').value]
+
+
+def test_cache_keeps_the_most_recent_sessions(app):
+    store = sessions.SessionStore(app.extensions['sessions'].backend, size=2, ttl=60,
+                                  idle_timeout=3600, touch_interval=60)
+    for sid in ('a', 'b', 'c'):
+        store.save(sid, '{}', None, new=True)
+    store.load('b')
+    store.save('d', '{}', None, new=True)
+    assert list(store.cache) == ['b', 'd']
+
+
+def test_expired_sessions_are_ignored_and_swept(app):
+    store = app.extensions['sessions']
+    store.save('old', '{}', None, new=True)
+    db.session.execute(update(LoginSession).values(expires_at=datetime.utcnow()))
+    db.session.commit()
+    store.cache.clear()
+
+    assert store.load('old') is None
+    assert sessions.sweep() == 1
+    assert _rows() == {}
@@ -0,0 +1,50 @@
+from models import db, Campaign, AdRequest
+import stats
+
+
+def _ad_request(campaign, influencer, status, payment):
+    db.session.add(AdRequest(ad_name='Post', description='One post', payment=payment,
+                             campaign_id=campaign.id, influencer_id=influencer.id,
+                             sponsor_id=campaign.sponsor_id, created_by='sponsor', status=status))
+
+
+def test_dashboards_add_up(sponsor, campaign, influencer):
+    _ad_request(campaign, influencer, 'accepted', 300)
+    _ad_request(campaign, influencer, 'accepted', 200)
+    _ad_request(campaign, influencer, 'pending', 900)
+    _ad_request(campaign, influencer, 'completed', 50)
+    db.session.commit()
+
+    admin = stats.admin_stats()
+    assert (admin['total_public_campaigns'], admin['total_private_campaigns']) == (1, 0)
+    assert (admin['total_influencers'], admin['total_sponsors']) == (1, 1)
+    assert admin['campaign_status_data']['datasets'][0]['data'] == [2, 1, 1]
+    assert admin['budget_utilization_data']['datasets'][0]['data'] == [5000]
+    assert admin['influencer_reach_data']['datasets'][0]['data'] == [12000]
+
+    mine = stats.sponsor_stats(sponsor.id)
+    assert mine['total_campaigns'] == 1
+    assert (mine['total_influencers'], mine['total_adrequests']) == (1, 4)
+    assert mine['budget_utilization_data']['labels'] == ['Spring']
+    assert mine['influencer_reach_data']['labels'] == ['Influencer']
+
+    theirs = stats.influencer_stats(influencer.id)
+    assert theirs['total_adrequests'] == 4
+    assert (theirs['accepted_adrequests'], theirs['completed_adrequests']) == (2, 1)
+    assert theirs['total_earnings'] == 500
+    assert theirs['earnings_by_campaign']['datasets'][0]['data'] == [500]
+
+
+def test_dashboards_of_new_accounts_are_empty(sponsor, influencer):
+    assert stats.sponsor_stats(sponsor.id)['total_campaigns'] == 0
+    assert stats.influencer_stats(influencer.id)['total_earnings'] == 0
+
+
+def test_charts_are_capped(app, sponsor, campaign):
+    app.config['STATS_CHART_LIMIT'] = 1
+    for title in ('Summer', 'Autumn'):
+        db.session.add(Campaign(sponsor_id=sponsor.id, title=title, description='',
+                                niche='shoes', budget=10, is_public=True,
+                                start_date=campaign.start_date, end_date=campaign.end_date))
+    db.session.commit()
+    assert stats.sponsor_stats(sponsor.id)['budget_utilization_data']['labels'] == ['Spring']
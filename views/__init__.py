@@ -0,0 +1,12 @@
+from importlib import import_module
+
+
+# One blueprint per area of the site. URLs are unchanged; endpoints are
+# namespaced by blueprint, e.g. url_for('sponsor.campaign_details', ...).
+
+BLUEPRINTS = ('auth', 'admin', 'sponsor', 'influencer', 'stats', 'common', 'api')
+
+
+def register_blueprints(app):
+    for name in BLUEPRINTS:
+        app.register_blueprint(import_module(f'views.{name}').bp)
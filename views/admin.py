@@ -0,0 +1,185 @@
+import io
+from datetime import datetime
+from flask import (Blueprint, Response, g, render_template, request, redirect, url_for, flash, session,
+                   send_from_directory, stream_with_context)
+from models import db, Sponsor, Influencer, Campaign, AdRequest
+from pagination import paginate
+from principal import login_required
+from ratelimit import rate_limit
+import exports
+import imports
+import queries
+import search
+import sessions
+
+
+# Admin dashboard, listings, moderation (flagging), bulk imports and exports.
+
+bp = Blueprint('admin', __name__)
+
+
+@bp.route('/admin_dashboard')
+@login_required(role='admin')
+def admin_dashboard():
+    user_role = session.get('user_role')
+    return render_template('admin_dashboard.html', user_role=user_role)
+
+@bp.route('/admin_find')
+@login_required(role='admin')
+@rate_limit('search')
+def admin_find():
+    user_role = session.get('user_role')
+    
+    search_query = request.args.get('search')
+    if search_query:
+        campaigns, campaign_order = search.apply(Campaign.query, Campaign, search_query)
+        influencers, influencer_order = search.apply(queries.influencers_with_user(), Influencer, search_query)
+        sponsors, sponsor_order = search.apply(queries.sponsors_with_user(), Sponsor, search_query)
+    else:
+        campaigns, campaign_order = Campaign.query.filter_by(is_flagged=False), [Campaign.id]
+        influencers, influencer_order = queries.influencers_with_user(), [Influencer.id]
+        sponsors, sponsor_order = queries.sponsors_with_user(), [Sponsor.id]
+
+    campaigns = paginate(campaigns, *campaign_order, param='campaigns')
+    influencers = paginate(influencers, *influencer_order, param='influencers')
+    sponsors = paginate(sponsors, *sponsor_order, param='sponsors')
+    
+    
+    return render_template('admin_find.html', user_role=user_role , campaigns=campaigns, influencers=influencers, sponsors=sponsors)
+
+@bp.route('/flag_influencer/<int:influencer_id>',methods=['GET'])
+@login_required(role='admin')
+def flag_influencer(influencer_id):
+    influencer = Influencer.query.get(influencer_id)
+    if not influencer:
+        flash('Influencer not found.', 'danger')
+        return redirect(url_for('admin.admin_find'))
+    influencer.is_flagged = not influencer.is_flagged
+    db.session.commit()
+    if influencer.is_flagged:
+        sessions.revoke(influencer.user_id)
+        flash('Influencer is flagged successfully.', 'success')
+    else:
+        flash('Influencer is unflagged successfully.', 'success')
+        return redirect(url_for('admin.admin_info'))
+    
+    return redirect(url_for('admin.admin_find'))
+
+@bp.route('/flag_campaign/<int:campaign_id>',methods=['GET'])
+@login_required(role='admin')
+def flag_campaign(campaign_id):
+    user_role = session.get('user_role')
+    campaign = Campaign.query.get(campaign_id)
+    if not campaign:
+        flash('Campaign not found.', 'danger')
+        return redirect(url_for('admin.admin_find'))
+    campaign.is_flagged = not campaign.is_flagged
+    db.session.commit()
+    if campaign.is_flagged:
+        flash('Campaign is flagged successfully.', 'success')
+    else:
+        flash('Campaign is unflagged successfully.', 'success')
+        return redirect(url_for('admin.admin_info'))
+    return redirect(url_for('admin.admin_find'))
+
+@bp.route('/flag_sponsor/<int:sponsor_id>',methods=['GET'])
+@login_required(role='admin')
+def flag_sponsor(sponsor_id):
+    sponsor = Sponsor.query.get(sponsor_id)
+    if not sponsor:
+        flash('Sponsor not found.', 'danger')
+        return redirect(url_for('admin.admin_find'))
+    sponsor.is_flagged = not sponsor.is_flagged
+    db.session.commit()
+    if sponsor.is_flagged:
+        sessions.revoke(sponsor.user_id)
+        flash('Sponsor is flagged successfully.', 'success')
+    else:
+        flash('Sponsor is unflagged successfully.', 'success')
+        return redirect(url_for('admin.admin_info'))
+    return redirect(url_for('admin.admin_find'))
+
+@bp.route('/admin_info')
+@login_required(role='admin')
+def admin_info():
+    user_role = session.get('user_role')
+    adrequests = paginate(AdRequest.query, AdRequest.created_at, AdRequest.id,
+                          param='adrequests', descending=True)
+    ongoing_campaigns = paginate(AdRequest.query.filter_by(status='accepted'),
+                                 AdRequest.created_at, AdRequest.id,
+                                 param='ongoing', descending=True)
+    flagged_campaigns = queries.campaigns_with_sponsor().filter_by(is_flagged=True).all()
+    flagged_influencers = queries.influencers_with_user().filter_by(is_flagged=True).all()
+    flagged_sponsors = queries.sponsors_with_user().filter_by(is_flagged=True).all()
+    
+    return render_template('admin_info.html',user_role=user_role, adrequests=adrequests, flagged_campaigns=flagged_campaigns, flagged_influencers=flagged_influencers, flagged_sponsors=flagged_sponsors,ongoing_campaigns=ongoing_campaigns, export_files=exports.ready_exports())
+
+@bp.route('/admin_import', methods=['GET', 'POST'])
+@login_required(role='admin')
+@queries.query_budget(None)
+def admin_import():
+    user_role = session.get('user_role')
+
+    report = None
+    if request.method == 'POST':
+        kind = request.form.get('kind')
+        upload = request.files.get('file')
+        if kind not in imports.IMPORTERS or not upload or not upload.filename:
+            flash('Choose what to import and a file.', 'danger')
+            return redirect(url_for('admin.admin_import'))
+        try:
+            file_format = imports.format_for(upload.filename)
+        except ValueError:
+            flash('Upload a .csv, .ndjson or .jsonl file.', 'danger')
+            return redirect(url_for('admin.admin_import'))
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+        try:
+            report = imports.import_file(kind, stream, file_format)
+        except UnicodeDecodeError:
+            flash('The file is not UTF-8 text; rows before the error were imported.', 'danger')
+            return redirect(url_for('admin.admin_import'))
+        flash(f'Imported {report.imported} of {report.rows} {kind}.'
+              + (f' {report.hashing} plaintext passwords are queued for hashing.'
+                 if report.hashing else ''),
+              'warning' if report.errors else 'success')
+
+    return render_template('admin_import.html', user_role=user_role, report=report,
+                           kinds=sorted(imports.IMPORTERS))
+
+@bp.route('/admin_export/<kind>', methods=['GET', 'POST'])
+@login_required(role='admin')
+def admin_export(kind):
+    file_format = request.values.get('format', 'csv')
+    if kind not in exports.EXPORTS or file_format not in exports.FORMATS:
+        flash('Unknown export.', 'danger')
+        return redirect(url_for('admin.admin_info'))
+    filters = {'sponsor': request.values.get('sponsor'), 'status': request.values.get('status'),
+               'start': request.values.get('from'), 'end': request.values.get('to')}
+
+    # POST leaves the export to the job worker; GET streams it right away.
+    if request.method == 'POST':
+        try:
+            filename = exports.queue_export(kind, file_format, filters,
+                                            notify=g.user.email)
+        except ValueError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('admin.admin_info'))
+        db.session.commit()
+        flash(f'{filename} is being prepared; you will get an email when it is ready.', 'success')
+        return redirect(url_for('admin.admin_info'))
+
+    try:
+        statement = exports.statement(kind, **filters)
+    except ValueError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('admin.admin_info'))
+
+    filename = f'{kind}-{datetime.utcnow():%Y%m%d-%H%M%S}.{file_format}'
+    return Response(stream_with_context(exports.generate(statement, file_format)),
+                    mimetype=exports.FORMATS[file_format],
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@bp.route('/admin_exports/<filename>')
+@login_required(role='admin')
+def admin_export_file(filename):
+    return send_from_directory(exports.export_folder(), filename, as_attachment=True)
@@ -0,0 +1,58 @@
+from flask import Blueprint, abort, current_app, g, session
+from conditional import conditional
+from fragments import cached
+from principal import api_login_required, load_principal
+from ratelimit import rate_limit
+import stats
+
+
+# JSON for the stats dashboards. The pages are static shells that fetch these
+# payloads and refresh them every STATS_REFRESH_SECONDS. Clients may reuse a
+# payload for STATS_MAX_AGE seconds and then revalidate it against the
+# rollups' updated_at, and the server keeps each version of a payload for
+# STATS_CACHE_TTL seconds, so the shell and the data are cached separately.
+# The login check comes first, so a visitor or another role gets 401/403
+# without taking a rate limit token or a 304 from the version query.
+
+bp = Blueprint('api', __name__, url_prefix='/api')
+
+
+def _payload(name, build):
+    # The ETag already names the viewer and the data version, so it is the
+    # cache key.
+    dump = lambda: current_app.json.dumps(build())
+    body = cached(name, g.etag, dump, current_app.config.get('STATS_CACHE_TTL', 300))
+    return current_app.response_class(body, mimetype='application/json')
+
+
+def _profile():
+    if load_principal() is None or g.account is None:
+        abort(404)
+    return g.account
+
+
+@bp.route('/stats/admin')
+@api_login_required(role='admin')
+@conditional(stats.admin_stats_version, max_age='STATS_MAX_AGE')
+@rate_limit('stats')
+def admin_stats():
+    return _payload('stats_admin', stats.admin_stats)
+
+
+@bp.route('/stats/sponsor')
+@api_login_required(role='sponsor')
+@conditional(lambda: stats.sponsor_stats_version(session.get('user_id')), max_age='STATS_MAX_AGE')
+@rate_limit('stats')
+def sponsor_stats():
+    return _payload('stats_sponsor', lambda: stats.sponsor_stats(
+        _profile().id))
+
+
+@bp.route('/stats/influencer')
+@api_login_required(role='influencer')
+@conditional(lambda: stats.influencer_stats_version(session.get('user_id')),
+             max_age='STATS_MAX_AGE')
+@rate_limit('stats')
+def influencer_stats():
+    return _payload('stats_influencer', lambda: stats.influencer_stats(
+        _profile().id))
@@ -0,0 +1,149 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from models import db, User, Sponsor, Influencer, parse_reach
+import passwords
+
+
+# Login, logout and account registration.
+
+bp = Blueprint('auth', __name__)
+
+
+@bp.route('/', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        user = User.query.filter_by(username=username).first()
+
+        if passwords.check_password(user, password):
+            # Saves the password hash if check_password() replaced it.
+            db.session.commit()
+            session['user_id'] = user.id  # Store user ID in session upon successful login
+            session['username'] = user.username
+            # Set user role in the session
+            session['user_role'] = user.user_role
+            
+            flash('Login successful!', 'success')
+            
+            if session.get('user_role') == 'admin':
+                return redirect(url_for('admin.admin_dashboard'))  
+            elif session.get('user_role') == 'influencer':
+                return redirect(url_for('influencer.influencer_dashboard'))  
+            elif session.get('user_role') == 'sponsor':
+                return redirect(url_for('sponsor.sponsor_dashboard')) 
+
+        else:
+            flash('Invalid username or password', 'danger')
+
+    return render_template('login.html')
+
+@bp.route('/logout')
+def logout():
+    session.pop('user_id', None)
+    session.pop('user_role', None)
+    flash('You have been logged out.', 'success')
+    return redirect(url_for('auth.login'))
+
+@bp.route('/sponsor_reg', methods=['GET', 'POST'])
+def register_sponsor():
+    if request.method == 'POST':
+        name = request.form['name']
+        username = request.form['username']
+        email = request.form['email']
+        password = request.form['password']
+        industry = request.form['industry']
+
+        existing_user = User.query.filter((User.username == username) | (User.email == email)).first()
+        if existing_user:
+            flash('Username or email already exists.', 'danger')
+            return redirect(url_for('auth.register_sponsor'))
+
+        user = User(name=name, username=username, email=email,
+                    password=passwords.hash_password(password), user_role='sponsor')
+        sponsor = Sponsor(industry=industry, user=user)
+        db.session.add(user)
+        db.session.add(sponsor)
+
+        try:
+            db.session.commit()
+            flash('Registration successful! You can now log in.', 'success')
+            return redirect(url_for('auth.login'))
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error occurred: {str(e)}', 'danger')
+            print(f"Error occurred: {str(e)}")
+            return redirect(url_for('auth.register_sponsor'))
+
+    return render_template('sponsor_reg.html')
+
+@bp.route('/influencer_reg', methods=['GET', 'POST'])
+def register_influencer():
+    if request.method == 'POST':
+        name= request.form['name']
+        username = request.form['username']
+        email = request.form['email']
+        password = request.form['password']
+        category = request.form['category']
+        niche = request.form['niche']
+        reach = request.form['reach']
+        social_networks = request.form.getlist('social')
+
+        try:
+            parse_reach(reach)
+        except ValueError:
+            flash('Reach must be a number such as 12000, 15K or 1.5M.', 'danger')
+            return redirect(url_for('auth.register_influencer'))
+
+        existing_user = User.query.filter((User.username == username) | (User.email == email)).first()
+        if existing_user:
+            flash('Username or email already exists.', 'danger')
+            return redirect(url_for('auth.register_influencer'))
+
+        user = User(name=name, username=username, email=email,
+                    password=passwords.hash_password(password), user_role='influencer')
+        influencer = Influencer(social_networks=",".join(social_networks), user=user , category=category, niche=niche, reach=reach)
+        db.session.add(user)
+        db.session.add(influencer)
+
+        try:
+            db.session.commit()
+            flash('Registration successful! You can now log in.', 'success')
+            return redirect(url_for('auth.login'))
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error occurred: {str(e)}', 'danger')
+            print(f"Error occurred: {str(e)}")
+            return redirect(url_for('auth.register_influencer'))
+
+    return render_template('influencer_reg.html')
+
+@bp.route('/admin_reg.html', methods=['GET', 'POST'])
+def admin_registration():
+    if request.method == 'POST':
+        name= request.form['name']
+        username = request.form['username']
+        email = request.form['email']
+        password = request.form['password']
+       
+
+        existing_user = User.query.filter((User.username == username) | (User.email == email)).first()
+        if existing_user:
+            flash('Username or email already exists.', 'danger')
+            return redirect(url_for('auth.register_influencer'))
+
+        user = User(name=name, username=username, email=email,
+                    password=passwords.hash_password(password), user_role='admin')
+        db.session.add(user)
+
+        try:
+            db.session.commit()
+            flash('Registration successful! You can now log in.', 'success')
+            return redirect(url_for('auth.login'))
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error occurred: {str(e)}', 'danger')
+            print(f"Error occurred: {str(e)}")
+            return redirect(url_for('auth.admin_registration'))
+
+    return render_template('admin_reg.html')
@@ -0,0 +1,77 @@
+from flask import Blueprint, render_template, redirect, url_for, flash, session
+from sqlalchemy import select
+from conditional import conditional
+from models import db, User, Sponsor, Influencer, Campaign, AdRequest
+from notifications import notify
+from principal import login_required
+
+
+# Detail pages and ad request actions shared by sponsors and influencers.
+
+bp = Blueprint('common', __name__)
+
+
+@bp.route('/accept_request/<int:request_id>', methods=['POST'])
+@login_required()
+def accept_request(request_id):
+    user_role = session.get('user_role')
+    ad_request = AdRequest.query.get_or_404(request_id)
+    ad_request.status = 'accepted'
+    notify(ad_request, user_role,
+           f'{session.get("username")} accepted the ad request "{ad_request.ad_name}".')
+    db.session.commit()
+    flash('Ad request accepted!', 'success')
+    if user_role == 'sponsor':
+        return redirect(url_for('sponsor.sponsor_profile'))
+    elif user_role == 'influencer':
+        return redirect(url_for('influencer.influencer_profile'))
+
+@bp.route('/reject_request/<int:request_id>', methods=['POST'])
+@login_required()
+def reject_request(request_id):
+    user_role = session.get('user_role')
+    ad_request = AdRequest.query.get_or_404(request_id)
+    ad_request.status = 'rejected'
+    notify(ad_request, user_role,
+           f'{session.get("username")} rejected the ad request "{ad_request.ad_name}".')
+    db.session.commit()
+    flash('Ad request rejected.', 'success')
+    if user_role == 'sponsor':
+        return redirect(url_for('sponsor.sponsor_profile'))
+    elif user_role == 'influencer':
+        return redirect(url_for('influencer.influencer_profile'))
+
+@bp.route('/ad_view/<string:source>/<int:request_id>', methods=['GET'])
+@bp.route('/ad_view/<int:request_id>', methods=['GET'])
+@login_required()
+@conditional(lambda request_id, source=None:
+             select(AdRequest.updated_at).where(AdRequest.id == request_id))
+def view_ad(request_id,source=None):
+    ad_request = AdRequest.query.get_or_404(request_id)
+    user_role = session.get('user_role')
+    return render_template('ad_view.html', source=source,ad_request=ad_request, user_role=user_role)
+
+@bp.route('/view_campaign/<int:campaign_id>', methods=['GET'])
+@login_required()
+@conditional(lambda campaign_id: select(Campaign.updated_at).where(Campaign.id == campaign_id))
+def view_campaign(campaign_id):
+    user_role = session.get('user_role')
+    campaign = Campaign.query.get_or_404(campaign_id)
+    return render_template('view_campaign.html',campaign= campaign, user_role=user_role)
+
+@bp.route('/view_influencer_details/<int:influencer_id>', methods=['GET'])
+@conditional(lambda influencer_id: select(Influencer.updated_at, User.updated_at)
+             .join(Influencer.user).where(Influencer.id == influencer_id))
+def view_influencer_details(influencer_id):
+    influencer = Influencer.query.get_or_404(influencer_id)
+    user_role = session.get('user_role')
+    return render_template('view_influencer_details.html',  user_role=user_role,influencer=influencer)
+
+@bp.route('/vew_sponsor_details/<int:sponsor_id>')
+@conditional(lambda sponsor_id: select(Sponsor.updated_at, User.updated_at)
+             .join(Sponsor.user).where(Sponsor.id == sponsor_id))
+def view_sponsor_details(sponsor_id):
+    sponsor=Sponsor.query.get_or_404(sponsor_id)
+    user_role = session.get('user_role')
+    
+    return render_template('view_sponsor_details.html', user_role=user_role, sponsor=sponsor)
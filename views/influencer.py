@@ -0,0 +1,151 @@
+from datetime import datetime
+from flask import Blueprint, g, render_template, request, redirect, url_for, flash, session
+from models import db, Influencer, Campaign, AdRequest, parse_reach
+from notifications import notify
+from pagination import paginate
+from principal import login_required
+from ratelimit import rate_limit
+import matching
+import search
+
+
+# Influencer dashboard, profile and campaign discovery.
+
+bp = Blueprint('influencer', __name__)
+
+
+@bp.route('/influencer_dashboard')
+@login_required(role='influencer')
+def influencer_dashboard():
+    user_role = session.get('user_role')
+    influencer = g.account
+    flagged_influencer = influencer.is_flagged if influencer else False
+    return render_template('influencer_dashboard.html', user_role=user_role, flagged_influencer=flagged_influencer ,influencer=influencer)
+
+@bp.route('/influencer_profile')
+@login_required(role='influencer')
+def influencer_profile():
+    user_role = session.get('user_role')
+
+    influencer = g.account
+    if not influencer:
+        flash('Influencer profile not found.', 'error')
+        return redirect(url_for('auth.login'))
+    new_requests = AdRequest.query.filter_by(influencer_id=influencer.id,created_by='sponsor', status='pending').all()
+    active_campaigns = AdRequest.query.filter_by(influencer_id=influencer.id,status='accepted').all()
+    ad_requests = influencer.ad_requests
+    
+    return render_template('influencer_profile.html', influencer=influencer, new_requests=new_requests, active_campaigns=active_campaigns, ad_requests=ad_requests, user_role=user_role)
+
+@bp.route('/edit_influencer_profile/<int:influencer_id>', methods=['GET', 'POST'])
+@login_required(role='influencer')
+def edit_influencer_profile(influencer_id):
+    user_role = session.get('user_role')
+
+    influencer = Influencer.query.get_or_404(influencer_id)
+    user = influencer.user
+
+    if request.method == 'POST':
+        name = request.form['name']
+        username = request.form['username']
+        email = request.form['email']
+        social_networks = request.form.getlist('social')
+        reach = request.form.get('reach', influencer.reach)
+
+        try:
+            parse_reach(reach)
+        except ValueError:
+            flash('Reach must be a number such as 12000, 15K or 1.5M.', 'danger')
+            return redirect(url_for('influencer.edit_influencer_profile', influencer_id=influencer.id))
+
+        user.name = name
+        user.username = username
+        user.email = email
+        influencer.social_networks = ",".join(social_networks)
+        influencer.reach = reach
+
+        try:
+            db.session.commit()
+            flash('Profile updated successfully!', 'success')
+            return redirect(url_for('influencer.influencer_profile'))
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error updating profile: {str(e)}', 'danger')
+
+    return render_template('edit_influencer_profile.html', influencer=influencer, user=user, user_role=user_role)
+
+@bp.route('/modify_request/<int:request_id>', methods=['GET', 'POST'])
+@login_required(role='influencer')
+def modify_request(request_id):
+    user_role=session.get('user_role')
+    ad_request = AdRequest.query.get_or_404(request_id)
+    
+    if request.method == 'POST':
+        ad_request.modified_terms = request.form['modified_terms']
+        ad_request.modified_payment = request.form['modified_payment']
+        ad_request.negotiation_status = 'pending'
+        ad_request.created_by=user_role
+        notify(ad_request, user_role,
+               f'{session.get("username")} proposed new terms for "{ad_request.ad_name}".')
+        
+        db.session.commit()
+        flash('Request modified successfully. Waiting for sponsor approval.', 'success')
+        return redirect(url_for('influencer.influencer_profile'))
+    
+    return render_template('modify_request.html', request=ad_request, user_role=user_role)
+
+@bp.route('/influencer_find')
+@login_required(role='influencer')
+@rate_limit('search')
+def influencer_find():
+    user_role = session.get('user_role')
+    search_query = request.args.get('search')
+    campaigns, order = Campaign.query.filter( Campaign.is_public == True), [Campaign.id]
+    recommended = None
+    if search_query:
+        campaigns, order = search.apply(campaigns, Campaign, search_query)
+    else:
+        influencer = g.account
+        if influencer:
+            recommended = matching.recommended_campaigns(influencer)
+    campaigns = paginate(campaigns, *order, param='campaigns')
+
+    return render_template('influencer_find.html', campaigns=campaigns, recommended=recommended, user_role=user_role)
+
+@bp.route('/request_campaign/<int:campaign_id>', methods=['POST'])
+@login_required(role='influencer')
+def request_campaign(campaign_id):
+    user_role = session.get('user_role')
+    influencer = g.account
+    influencer_id = influencer.id
+    influencer_name = session.get('username')
+    campaign = Campaign.query.get_or_404(campaign_id)
+    
+     # Check if an ad request already exists for this campaign and influencer
+    existing_request = AdRequest.query.filter_by(influencer_id=influencer_id, campaign_id=campaign_id).first()
+    if existing_request:
+        flash('You have already requested this campaign.', 'warning')
+    else:
+        # Create a new ad request
+        ad_request = AdRequest(
+            ad_name=campaign.title,  
+            description=campaign.description,  
+            payment=campaign.budget,  
+            influencer_name=influencer_name,  
+            influencer_id=influencer_id,
+            campaign_id=campaign_id,
+            sponsor_id=campaign.sponsor_id,  
+            status='pending',  
+            created_by=user_role,
+            created_at=datetime.utcnow()  
+        )
+        
+        db.session.add(ad_request)
+        notify(ad_request, user_role,
+               f'{influencer_name} asked to join your campaign "{campaign.title}".')
+        db.session.commit()
+        
+
+        flash('Campaign requested successfully!', 'success')
+
+    return redirect(url_for('influencer.influencer_find'))
@@ -0,0 +1,347 @@
+from datetime import datetime
+from flask import Blueprint, g, render_template, request, redirect, url_for, flash, session
+from models import db, User, Influencer, Campaign, AdRequest, parse_reach
+from notifications import notify
+from pagination import paginate
+from principal import login_required
+from ratelimit import rate_limit
+import matching
+import queries
+import search
+
+
+# Sponsor dashboard, campaigns and ad requests.
+
+bp = Blueprint('sponsor', __name__)
+
+
+@bp.route('/delete_ad/<int:request_id>', methods=['POST'])
+@login_required(role='sponsor')
+def delete_ad(request_id):
+    user_role = session.get('user_role')
+    ad_request = AdRequest.query.get_or_404(request_id)
+    campaign_id = ad_request.campaign_id  
+    db.session.delete(ad_request)
+    db.session.commit()
+    flash('Ad request deleted successfully', 'success')
+    return redirect(url_for('sponsor.campaign_details', campaign_id=campaign_id))
+
+@bp.route('/sponsor_dashboard')
+@login_required(role='sponsor')
+def sponsor_dashboard():
+    user_role= session.get('user_role')
+    sponsor_id = session['user_id']
+    sponsor = g.account
+    campaign = Campaign.query.filter_by(sponsor_id=sponsor_id).first()
+    flagged_sponsor = sponsor.is_flagged if sponsor else False
+    flagged_campaigns = Campaign.is_flagged if campaign else False
+   
+
+    return render_template('sponsor_dashboard.html', user_role=user_role, sponsor=sponsor, flagged_campaigns=flagged_campaigns, flagged_sponsor=flagged_sponsor)
+
+@bp.route('/sponsor_profile')
+@login_required(role='sponsor')
+def sponsor_profile():
+    user_role = session.get('user_role')
+
+    sponsor = g.account
+    active_campaigns = AdRequest.query.filter_by(sponsor_id=sponsor.id, status='accepted').all()
+    pending_requests = AdRequest.query.filter_by(sponsor_id=sponsor.id,created_by='influencer',status='pending').all()
+    
+    
+
+    return render_template('sponsor_profile.html',sponsor=sponsor, user_role=user_role, pending_requests=pending_requests,active_campaigns=active_campaigns)
+
+@bp.route('/approve_modification/<int:request_id>', methods=['POST'])
+@login_required(role='sponsor')
+def approve_modification(request_id):
+    user_role= session.get('user_role')
+    ad_request = AdRequest.query.get_or_404(request_id)
+    
+    ad_request.terms = ad_request.modified_terms
+    ad_request.payment = ad_request.modified_payment
+    ad_request.modified_terms = None
+    ad_request.modified_payment = None
+    ad_request.negotiation_status = 'approved'
+    ad_request.status = 'accepted'
+    ad_request.created_by = user_role
+    notify(ad_request, user_role,
+           f'{session.get("username")} approved your new terms for "{ad_request.ad_name}".')
+    
+    db.session.commit()
+    flash('Modification approved successfully.', 'success')
+    return redirect(url_for('sponsor.sponsor_profile'))
+
+@bp.route('/reject_modification/<int:request_id>', methods=['POST'])
+@login_required(role='sponsor')
+def reject_modification(request_id):
+    sponsor = g.account
+    user_role = session.get('user_role')
+    ad_request = AdRequest.query.get_or_404(request_id)
+    
+    ad_request.modified_terms = None
+    ad_request.modified_payment = None
+    ad_request.negotiation_status = 'rejected'
+    
+    db.session.commit()
+    flash('Modification rejected.', 'danger')
+    return render_template('sponsor_profile.html', sposnor=sponsor, user_role=user_role)
+
+@bp.route('/sponsor_campaigns')
+@login_required(role='sponsor')
+def sponsor_campaigns():
+    user_role = session.get('user_role')
+    sponsor = g.account
+    
+    search_query = request.args.get('search')
+    campaigns, order = Campaign.query.filter_by(sponsor_id=sponsor.id), [Campaign.id]
+    if search_query:
+        campaigns, order = search.apply(campaigns, Campaign, search_query)
+    campaigns = paginate(campaigns, *order, param='campaigns')
+    
+    return render_template('sponsor_campaigns.html', user_role=user_role, campaigns=campaigns, sponsor=sponsor)
+
+@bp.route('/add_campaign', methods=['GET', 'POST'])
+@login_required(role='sponsor')
+def add_campaign():
+    user_role = session.get('user_role')
+    if request.method == 'POST':
+        title = request.form.get('title')
+        description = request.form.get('description')
+        image = request.form.get('image')  
+        niche = request.form.get('niche')
+        budget = request.form.get('budget')
+        is_public = request.form.get('is_public') == 'on'
+        start_date = request.form.get('start_date')
+        end_date = request.form.get('end_date')
+
+        # Ensure all required fields are present
+        if not all([title, description, niche, budget, start_date, end_date]):
+            flash('All fields except image are required.', 'danger')
+            return redirect(url_for('sponsor.add_campaign'))
+
+        try:
+            sponsor = g.account
+
+            if not sponsor:
+                flash('Sponsor not found.', 'danger')
+                return redirect(url_for('sponsor.add_campaign'))
+
+            new_campaign = Campaign(
+                title=title,
+                description=description,
+                image=image,
+                niche=niche,
+                is_public=is_public,
+                start_date=datetime.strptime(start_date, '%Y-%m-%d'),
+                end_date=datetime.strptime(end_date, '%Y-%m-%d'),
+                budget=budget,
+                sponsor_id=sponsor.id
+            )
+
+            db.session.add(new_campaign)
+            db.session.commit()
+
+            flash('Campaign added successfully!', 'success')
+            return redirect(url_for('sponsor.sponsor_campaigns'))
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error adding campaign: {str(e)}', 'danger')
+            return redirect(url_for('sponsor.add_campaign'))
+
+    return render_template('add_campaign.html', user_role=user_role)
+
+@bp.route('/update_campaign/<int:campaign_id>', methods=['GET', 'POST'])
+@login_required(role='sponsor')
+def update_campaign(campaign_id):
+    campaign = Campaign.query.get_or_404(campaign_id)
+
+    if request.method == 'POST':
+        campaign.title = request.form['title']
+        campaign.description = request.form['description']
+        campaign.image = request.form['image']
+        campaign.niche = request.form['niche']
+        campaign.budget = request.form['budget']  
+        campaign.start_date = datetime.strptime(request.form['start_date'], '%Y-%m-%d')
+        campaign.end_date = datetime.strptime(request.form['end_date'], '%Y-%m-%d')
+        campaign.is_public = request.form.get('is_public') == 'on' 
+        
+        
+        try:
+            campaign.date = datetime.strptime(request.form['start_date'], '%Y-%m-%d')
+        except ValueError:
+            flash('Invalid date format. Please use YYYY-MM-DD.', 'danger')
+            return redirect(url_for('sponsor.update_campaign', campaign_id=campaign_id))
+
+        db.session.commit()
+        flash('Campaign updated successfully!', 'success')
+        return redirect(url_for('sponsor.sponsor_campaigns'))
+
+    return render_template('update_campaign.html', campaign=campaign, user_role='sponsor')
+
+@bp.route('/delete_campaign/<int:campaign_id>', methods=['POST'])
+@login_required(role='sponsor')
+def delete_campaign(campaign_id):
+    try:
+        campaign = Campaign.query.get_or_404(campaign_id)
+        
+        # Delete the campaign
+        db.session.delete(campaign)
+        db.session.commit()
+        
+        flash('Campaign and associated requests deleted successfully!', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'An error occurred while deleting the campaign: {str(e)}', 'danger')
+    
+    return redirect(url_for('sponsor.sponsor_campaigns'))
+
+@bp.route('/campaign_details/<int:campaign_id>', methods=['GET','POST'] )
+def campaign_details(campaign_id):
+    campaign= Campaign.query.get_or_404(campaign_id)
+    user_role = session.get('user_role')
+    
+    ad_requests = paginate(AdRequest.query.filter_by(campaign_id=campaign.id),
+                           AdRequest.created_at, AdRequest.id,
+                           param='ad_requests', descending=True)
+    
+    return render_template('campaign_details.html', campaign=campaign, ad_requests=ad_requests, user_role=user_role)
+
+@bp.route('/update_adrequest/<int:campaign_id>', methods=['GET', 'POST'])
+@login_required(role='sponsor')
+def update_adrequest(campaign_id):
+    user_role = session.get('user_role')
+    ad_request = AdRequest.query.filter_by(campaign_id=campaign_id).first()
+    if not ad_request:
+        flash('Ad request not found.', 'danger')
+        return redirect(url_for('sponsor.sponsor_campaigns'))
+    influencer_name = ad_request.influencer_name
+    if request.method == 'GET':
+            influencer_id = request.args.get('influencer_id')
+            if influencer_id:
+               influencer = db.session.get(Influencer, influencer_id)
+               if influencer:
+                  ad_request.influencer_name = influencer.user.name
+    if request.method == 'POST':
+        terms = request.form['terms']
+        payment = request.form['payment']
+        influencer_name = request.form['influencer']
+        
+        ad_request.terms = terms
+        ad_request.payment = payment
+        ad_request.influencer_name = influencer_name
+        
+        if ad_request.status == 'rejected':
+            ad_request.status = 'pending'
+            
+        elif ad_request.negotiation_status == 'rejected':
+            ad_request.negotiation_status = 'no negotiation'
+            
+        elif ad_request.created_by == 'influencer':
+            ad_request.created_by = 'sponsor'
+        
+
+        try:
+            
+            db.session.commit()
+            flash('Ad request updated successfully!', 'success')
+            return redirect(url_for('sponsor.sponsor_campaigns'))
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error updating ad request: {str(e)}', 'danger')
+
+    return render_template('update_adrequest.html', ad_request=ad_request, user_role=user_role)
+
+@bp.route('/create_add_request/<int:campaign_id>', methods=['GET', 'POST'])
+@login_required(role='sponsor')
+def create_add_request(campaign_id):
+    user_role = session.get('user_role')
+    campaign= Campaign.query.get_or_404(campaign_id)
+    influencer_name = None
+    if request.method == 'GET':
+        influencer_id = request.args.get('influencer_id')
+        if influencer_id:
+            influencer = db.session.get(Influencer, influencer_id)
+            if influencer:
+                influencer_name = influencer.user.name
+
+    if request.method == 'POST':
+        ad_name = request.form['ad_name']
+        description = request.form['description']
+        terms = request.form['terms']
+        payment = request.form['payment']
+        influencer_name = request.form['influencer']
+        
+        sponsor = g.account
+        influencer = Influencer.query.join(User).filter(User.name == influencer_name).first()
+
+        if not sponsor or not influencer:
+            flash('Sponsor or Influencer not found', 'danger')
+            return redirect(url_for('sponsor.create_add_request'))
+
+        new_ad_request = AdRequest(
+            ad_name=ad_name, 
+            description=description, 
+            terms=terms, 
+            payment=payment, 
+            sponsor_id=sponsor.id,
+            influencer_name=influencer_name,
+            influencer_id=influencer.id,
+            campaign_id=campaign_id,
+            created_by=user_role
+        )  
+        
+        db.session.add(new_ad_request)
+        notify(new_ad_request, user_role,
+               f'{session.get("username")} sent you the ad request "{ad_name}" '
+               f'for the campaign "{campaign.title}".')
+        db.session.commit()
+        
+        flash('Ad request created successfully!', 'success')
+        return redirect(url_for('sponsor.campaign_details', campaign_id=campaign_id))
+
+    return render_template('create_add_request.html', user_role=user_role,influencer_name=influencer_name, campaign=campaign)
+
+@bp.route('/sponsor_find')
+@login_required(role='sponsor')
+@rate_limit('search')
+def sponsor_find():
+    sponsor = g.account
+    
+    search_query = request.args.get('search')
+    sort = request.args.get('sort')
+    try:
+        min_reach = parse_reach(request.args['min_reach']) if request.args.get('min_reach') else None
+        max_reach = parse_reach(request.args['max_reach']) if request.args.get('max_reach') else None
+    except ValueError:
+        flash('Reach filters must be numbers such as 12000, 15K or 1.5M.', 'danger')
+        min_reach = max_reach = None
+
+    campaigns, campaign_order = Campaign.query.filter_by(sponsor_id=sponsor.id), [Campaign.id]
+    influencers, influencer_order = queries.influencers_with_user(), [Influencer.id]
+    if search_query:
+        campaigns, campaign_order = search.apply(campaigns, Campaign, search_query)
+        influencers, influencer_order = search.apply(influencers, Influencer, search_query)
+    if min_reach is not None:
+        influencers = influencers.filter(Influencer.reach_count >= min_reach)
+    if max_reach is not None:
+        influencers = influencers.filter(Influencer.reach_count <= max_reach)
+
+    campaigns = paginate(campaigns, *campaign_order, param='campaigns')
+    if sort == 'reach':
+        influencers = paginate(influencers, Influencer.reach_count, Influencer.id,
+                               param='influencers', descending=True)
+    else:
+        influencers = paginate(influencers, *influencer_order, param='influencers')
+    
+    return render_template('sponsor_find.html', user_role='sponsor', campaigns=campaigns,influencers=influencers)
+
+@bp.route('/request_influencer/<string:source>/<int:campaign_id>', methods=['GET', 'POST'])
+@bp.route('/request_influencer/<string:source>/<int:campaign_id>', methods=['GET', 'POST'])
+@login_required(role='sponsor')
+def request_influencer(source,campaign_id):
+    user_role = session.get('user_role')
+    campaign = Campaign.query.get_or_404(campaign_id)
+    matches = matching.top_matches(campaign) if not request.args.get('influencers') else []
+    influencers = paginate(queries.influencers_with_user(), Influencer.id, param='influencers')
+    return render_template('request_influencer.html',source=source ,user_role=user_role, campaign_id=campaign_id,influencers=influencers,matches=matches)
@@ -0,0 +1,35 @@
+from flask import Blueprint, render_template, session
+from conditional import conditional
+from principal import login_required
+from ratelimit import rate_limit
+
+
+# The admin, sponsor and influencer stats dashboards. The pages carry no
+# numbers; they load them from the stats API (views/api.py).
+
+bp = Blueprint('stats', __name__)
+
+
+@bp.route('/admin_stats')
+@login_required(role='admin')
+@conditional()
+@rate_limit('stats')
+def admin_stats():
+    user_role = session.get('user_role')
+    return render_template('admin_stats.html', user_role=user_role)
+
+@bp.route('/influencer_stats')
+@login_required(role='influencer')
+@conditional()
+@rate_limit('stats')
+def influencer_stats():
+    user_role = session.get('user_role')
+    return render_template('influencer_stats.html', user_role=user_role)
+
+@bp.route('/sponsor_stats')
+@login_required(role='sponsor')
+@conditional()
+@rate_limit('stats')
+def sponsor_stats():
+    user_role = session.get('user_role')
+    return render_template('sponsor_stats.html', user_role=user_role)